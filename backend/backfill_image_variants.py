@@ -0,0 +1,77 @@
+"""
+Generate thumbnails, web renditions and perceptual hashes for evidence that
+doesn't have them yet.
+
+Works on the blob store, so run migrate_evidence_blobs.py first to bring
+existing uploads/tasks (and uploads/complaints) files into it. Run from the
+backend directory:
+
+    python backfill_image_variants.py               # all blobs missing variants
+    python backfill_image_variants.py --limit 500   # at most 500 this run
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from sqlmodel import Session, select
+
+from core.database import engine
+from migrate_evidence_blobs import add_missing_columns
+from models.evidence_blob import EvidenceBlob
+from utils.image_variants import IMAGE_WORKERS, process_variants, generate_variants, save_variants, shutdown_pool
+from utils.storage import get_storage
+
+
+def backfill(limit: int | None, workers: int):
+    add_missing_columns()
+    with Session(engine) as session:
+        query = select(EvidenceBlob.id, EvidenceBlob.path).where(
+            (EvidenceBlob.thumbnail_path == None) | (EvidenceBlob.phash == None)  # noqa: E711
+        )
+        if limit:
+            query = query.limit(limit)
+        pending = session.exec(query).all()
+
+    print(f"{len(pending)} blob(s) need variants, using {workers} worker process(es)")
+    started = time.perf_counter()
+    if not get_storage().is_local:
+        # Object storage: each blob is fetched, processed and its renditions uploaded back
+        asyncio.run(backfill_remote(pending, workers))
+        print(f"Processed {len(pending)} blob(s) in {time.perf_counter() - started:.1f}s")
+        return
+
+    done = failed = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(generate_variants, path, blob_id): blob_id for blob_id, path in pending}
+        for future in as_completed(futures):
+            blob_id = futures[future]
+            try:
+                save_variants(blob_id, future.result())
+                done += 1
+            except Exception as e:
+                failed += 1
+                print(f"  failed {blob_id}: {e}")
+
+    print(f"Generated variants for {done} blob(s), {failed} failed, in {time.perf_counter() - started:.1f}s")
+
+
+async def backfill_remote(pending: list, workers: int):
+    sem = asyncio.Semaphore(workers * 2)
+
+    async def one(blob_id: str, path: str):
+        async with sem:
+            await process_variants(blob_id, path)
+
+    try:
+        await asyncio.gather(*(one(blob_id, path) for blob_id, path in pending))
+    finally:
+        shutdown_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill evidence thumbnails and web renditions")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=IMAGE_WORKERS)
+    args = parser.parse_args()
+    backfill(args.limit, args.workers)
@@ -0,0 +1,122 @@
+"""
+Tasks/sec for dispatching a batch of jobs: looping the single-task endpoints
+(POST /admin/tasks/, PATCH /admin/tasks/{id}) against the bulk endpoints
+(POST / PATCH /admin/bulk/tasks).
+
+    uvicorn fake_sms_gateway:app --port 8900
+    AT_BASE_URL=http://localhost:8900/version1/messaging uvicorn main:app --port 8000
+    python seed_admin.py
+    python benchmarks/bench_bulk_tasks.py --tasks 500 --concurrency 10
+
+Each worker can only hold one active task, so the benchmark prepares --tasks
+load-test workers and deletes their tasks between runs (not timed). The single
+endpoint sends its SMS inline; the bulk endpoint queues them, so compare the
+SMS status afterwards as well.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+import httpx
+
+from load_test_notifications import Recorder, ensure_workers, login
+
+
+async def clear_tasks(client: httpx.AsyncClient, usernames: set[str]):
+    resp = await client.get("/admin/tasks/", params={"fields": "id,assigned_to"})
+    resp.raise_for_status()
+    for task in resp.json():
+        if task["assigned_to"] in usernames:
+            await client.delete(f"/admin/tasks/{task['id']}")
+
+
+def new_task(username: str) -> dict:
+    return {
+        "title": f"Bulk bench {uuid.uuid4().hex[:8]}",
+        "description": "Generated by bench_bulk_tasks.py",
+        "assigned_to": username,
+    }
+
+
+async def run_single(client: httpx.AsyncClient, usernames: list[str], concurrency: int) -> tuple[float, float]:
+    rec = Recorder()
+    sem = asyncio.Semaphore(concurrency)
+    task_ids = []
+
+    async def create(username: str):
+        async with sem:
+            resp = await rec.call("create_task", client.post("/admin/tasks/", params=new_task(username)))
+            if resp is not None and resp.status_code < 400:
+                task_ids.append(resp.json()["id"])
+
+    async def update(task_id: str):
+        async with sem:
+            await rec.call("update_task", client.patch(f"/admin/tasks/{task_id}", params={"status": "in_progress"}))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(create(u) for u in usernames))
+    created = time.perf_counter() - started
+
+    started = time.perf_counter()
+    await asyncio.gather(*(update(t) for t in task_ids))
+    updated = time.perf_counter() - started
+    rec.report(created + updated)
+    return len(task_ids) / created, len(task_ids) / updated
+
+
+async def run_bulk(client: httpx.AsyncClient, usernames: list[str], batch_size: int) -> tuple[float, float]:
+    task_ids = []
+    started = time.perf_counter()
+    for start in range(0, len(usernames), batch_size):
+        batch = [new_task(u) for u in usernames[start:start + batch_size]]
+        resp = await client.post("/admin/bulk/tasks", json=batch)
+        resp.raise_for_status()
+        task_ids += [r["task"]["id"] for r in resp.json()["results"] if r["ok"]]
+    created = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for start in range(0, len(task_ids), batch_size):
+        batch = [{"task_id": t, "status": "in_progress"} for t in task_ids[start:start + batch_size]]
+        resp = await client.patch("/admin/bulk/tasks", json=batch)
+        resp.raise_for_status()
+    updated = time.perf_counter() - started
+    print(f"\nbulk: {len(task_ids)} tasks in {created:.2f}s, updated in {updated:.2f}s ({batch_size} per request)")
+    return len(task_ids) / created, len(task_ids) / updated
+
+
+async def main(args):
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout) as client:
+        token = await login(client, args.admin_username, args.admin_password)
+        client.headers["Authorization"] = f"Bearer {token}"
+
+        print(f"Preparing {args.tasks} workers...")
+        usernames = await ensure_workers(client, args.tasks, args.prefix)
+        await clear_tasks(client, set(usernames))
+
+        single = await run_single(client, usernames, args.concurrency)
+        await clear_tasks(client, set(usernames))
+        bulk = await run_bulk(client, usernames, args.batch_size)
+        await clear_tasks(client, set(usernames))
+
+        print(f"\n{'':<10}{'create tasks/s':>16}{'update tasks/s':>16}")
+        print(f"{'single':<10}{single[0]:>16.1f}{single[1]:>16.1f}")
+        print(f"{'bulk':<10}{bulk[0]:>16.1f}{bulk[1]:>16.1f}")
+        print(f"{'speedup':<10}{bulk[0] / single[0]:>15.1f}x{bulk[1] / single[1]:>15.1f}x")
+
+        resp = await client.get("/sms/status")
+        if resp.status_code == 200:
+            print("\nSMS status:", resp.json())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--admin-username", default="admin")
+    parser.add_argument("--admin-password", default="admin123")
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--prefix", default="bulkbench_worker_")
+    asyncio.run(main(parser.parse_args()))
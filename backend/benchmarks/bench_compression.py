@@ -0,0 +1,74 @@
+"""
+Bytes on the wire and compression cost for the large JSON list endpoints, per
+encoding the API offers (identity, gzip, br, zstd).
+
+    uvicorn main:app --port 8000
+    python benchmarks/bench_compression.py --requests 50
+
+For each endpoint and encoding it reports the compressed response size, the
+ratio against identity and the median request latency. It then re-compresses
+the identity body locally with the server's encoder settings to report the
+CPU time compression adds per response, and the throughput per core.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.compression import ENCODERS
+
+ENDPOINTS = ["/admin/tasks/", "/admin/audit-logs/", "/admin/complaints/", "/complaints/"]
+
+
+def encode_cost(encoding: str, body: bytes, rounds: int) -> float:
+    timings = []
+    for _ in range(rounds):
+        started = time.process_time()
+        ENCODERS[encoding]().compress(body, final=True)
+        timings.append(time.process_time() - started)
+    return statistics.median(timings)
+
+
+def main(args):
+    with httpx.Client(base_url=args.base_url, timeout=120) as client:
+        resp = client.post("/auth/login", json={"username": args.admin_username, "password": args.admin_password})
+        resp.raise_for_status()
+        auth = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+        print(f"{'endpoint':<22}{'encoding':<10}{'wire KB':>10}{'ratio':>8}{'p50 ms':>10}{'cpu ms':>10}{'MB/s/core':>11}")
+        for path in ENDPOINTS:
+            identity = None
+            for encoding in ["identity", *ENCODERS]:
+                latencies, wire = [], 0
+                for _ in range(args.requests):
+                    started = time.perf_counter()
+                    with client.stream("GET", path, headers={**auth, "Accept-Encoding": encoding}) as r:
+                        body = b"".join(r.iter_raw())
+                        served = r.headers.get("content-encoding", "identity")
+                    latencies.append(time.perf_counter() - started)
+                    wire = len(body)
+                if encoding == "identity":
+                    identity = body
+                cpu = encode_cost(encoding, identity, args.rounds) if encoding != "identity" else 0.0
+                note = "" if served == encoding else f"  (served {served})"
+                print(
+                    f"{path:<22}{encoding:<10}{wire / 1024:>10.1f}{len(identity) / max(wire, 1):>8.1f}"
+                    f"{statistics.median(latencies) * 1000:>10.1f}{cpu * 1000:>10.2f}"
+                    f"{(len(identity) / cpu / 1e6 if cpu else 0):>11.0f}{note}"
+                )
+            print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--admin-username", default="admin")
+    parser.add_argument("--admin-password", default="admin123")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=10, help="local compression rounds per encoding")
+    main(parser.parse_args())
@@ -0,0 +1,85 @@
+"""
+Throughput benchmark: evidence served by the public /uploads StaticFiles mount
+versus the authorized /evidence/{blob_id} route (full, conditional and range GETs).
+
+    PUBLIC_UPLOADS=true uvicorn main:app --port 8000
+    python benchmarks/bench_evidence_serving.py --requests 2000 --concurrency 32
+
+Without PUBLIC_UPLOADS=true the mount is off and only the /evidence scenarios run.
+
+Needs at least one task with evidence in the blob store; the first one found via
+GET /admin/tasks/ is used. Run the API with EVIDENCE_OFFLOAD=nginx behind a
+proxy to measure the offloaded path instead.
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+
+async def run(client: httpx.AsyncClient, name: str, url: str, headers: dict, total: int, concurrency: int):
+    sem = asyncio.Semaphore(concurrency)
+    latencies = []
+    transferred = 0
+    statuses = {}
+
+    async def one():
+        nonlocal transferred
+        async with sem:
+            started = time.perf_counter()
+            resp = await client.get(url, headers=headers)
+            latencies.append(time.perf_counter() - started)
+            transferred += len(resp.content)
+            statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))]
+    print(
+        f"{name:<28}{total / elapsed:>10.1f}{transferred / elapsed / 1e6:>10.2f}"
+        f"{latencies[len(latencies) // 2] * 1000:>10.2f}{p99 * 1000:>10.2f}   {statuses}"
+    )
+
+
+async def main(args):
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+        resp = await client.post("/auth/login", json={"username": args.admin_username, "password": args.admin_password})
+        resp.raise_for_status()
+        auth = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+        tasks = (await client.get("/admin/tasks/", headers=auth)).json()
+        evidence = next((e for t in tasks for e in t.get("evidence", []) if e.get("blob_id")), None)
+        if evidence is None:
+            raise SystemExit("No blob-backed evidence found; upload some first.")
+
+        blob_url = f"/evidence/{evidence['blob_id']}"
+        etag = (await client.get(blob_url, headers=auth)).headers["etag"]
+        size = len((await client.get(blob_url, headers=auth)).content)
+        print(f"Evidence {evidence['blob_id'][:12]}… ({size} bytes), {args.requests} requests, concurrency {args.concurrency}\n")
+
+        print(f"{'scenario':<28}{'req/s':>10}{'MB/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+        # file_url is the uploads/ path only when the server runs with PUBLIC_UPLOADS=true
+        if not evidence["file_url"].startswith("/evidence/"):
+            await run(client, "/uploads mount", f"/{evidence['file_url']}", {}, args.requests, args.concurrency)
+        await run(client, "/evidence full", blob_url, auth, args.requests, args.concurrency)
+        await run(client, "/evidence If-None-Match", blob_url, {**auth, "If-None-Match": etag},
+                  args.requests, args.concurrency)
+        await run(client, "/evidence Range 64KiB", blob_url, {**auth, "Range": "bytes=0-65535"},
+                  args.requests, args.concurrency)
+        if evidence.get("thumbnail_url"):
+            await run(client, "/evidence thumbnail", f"{blob_url}?variant=thumbnail", auth,
+                      args.requests, args.concurrency)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--admin-username", default="admin")
+    parser.add_argument("--admin-password", default="admin123")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    asyncio.run(main(parser.parse_args()))
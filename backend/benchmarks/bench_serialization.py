@@ -0,0 +1,126 @@
+"""
+Serialization benchmark for the large list responses: 10k tasks (with evidence)
+and 100k audit log entries, built in an in-memory SQLite DB and loaded the way
+the endpoints load them.
+
+    python benchmarks/bench_serialization.py
+    python benchmarks/bench_serialization.py --tasks 20000 --audit-logs 200000
+
+Paths compared:
+- per-row model + FastAPI: model instance per row, then response_model
+  validation and jsonable_encoder + json.dumps (what a custom response class
+  such as ORJSONResponse gets you, minus the final dumps)
+- jsonable_encoder + orjson: same, with orjson for the final dumps (if installed)
+- TypeAdapter.dump_json: utils/serialization.py, one validation pass from the
+  ORM attributes straight to JSON bytes
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, SQLModel, create_engine, insert, select
+
+from models.audit_log import AuditLog
+from models.task import Task, TaskEvidence
+from models.user import User
+from schemas.tasks import TaskWithEvidenceRead
+from utils.serialization import AUDIT_LOG_LIST, TASK_WITH_EVIDENCE_LIST
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def seed(engine, n_tasks: int, n_logs: int):
+    now = datetime.utcnow()
+    user_id = uuid.uuid4()
+    tasks, evidence, logs = [], [], []
+    for i in range(n_tasks):
+        task_id = str(uuid.uuid4())
+        tasks.append({"id": task_id, "title": f"Inspect transformer #{i}", "description": "Routine inspection " * 4,
+                      "status": "completed", "assigned_to": f"worker{i % 200}", "assigned_by": "admin",
+                      "created_at": now - timedelta(minutes=i), "updated_at": now})
+        for j in range(2):
+            evidence.append({"id": str(uuid.uuid4()), "task_id": task_id,
+                             "file_url": f"uploads/tasks/{task_id}_{j}.jpg", "uploaded_at": now})
+    for i in range(n_logs):
+        logs.append({"id": uuid.uuid4(), "action": "viewed_tasks_list", "details": f"Viewed task #{i}",
+                     "user_id": user_id, "created_at": now - timedelta(seconds=i)})
+    with Session(engine) as session:
+        session.execute(insert(User), [{"id": user_id, "username": "admin", "password_hash": "x",
+                                        "phone_number": "+254700000000"}])
+        session.execute(insert(Task), tasks)
+        session.execute(insert(TaskEvidence), evidence)
+        for start in range(0, len(logs), 20000):
+            session.execute(insert(AuditLog), logs[start:start + 20000])
+        session.commit()
+
+
+def timed(label: str, fn, repeat: int):
+    best = float("inf")
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = len(fn())
+        best = min(best, time.perf_counter() - started)
+    print(f"  {label:<38}{best * 1000:>10.1f} ms{size / 1e6:>10.2f} MB")
+
+
+def main(args):
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    seed(engine, args.tasks, args.audit_logs)
+
+    with Session(engine) as session:
+        tasks = session.exec(
+            select(Task).options(selectinload(Task.evidences).selectinload(TaskEvidence.blob))
+        ).all()
+        tasks_field = TypeAdapter(List[TaskWithEvidenceRead])
+
+        def per_row_tasks():
+            models = [TaskWithEvidenceRead.model_validate(t) for t in tasks]
+            return json.dumps(jsonable_encoder(tasks_field.validate_python(models))).encode()
+
+        print(f"{args.tasks} tasks with {args.tasks * 2} evidence rows")
+        timed("per-row model + FastAPI (json)", per_row_tasks, args.repeat)
+        if orjson:
+            timed("jsonable_encoder + orjson", lambda: orjson.dumps(jsonable_encoder(
+                tasks_field.validate_python(tasks, from_attributes=True))), args.repeat)
+        timed("TypeAdapter.dump_json", lambda: TASK_WITH_EVIDENCE_LIST.dump(tasks), args.repeat)
+
+    with Session(engine) as session:
+        orm_logs = session.exec(select(AuditLog)).all()
+        logs_field = TypeAdapter(List[AuditLog])
+        print(f"\n{args.audit_logs} audit log entries")
+        timed("ORM rows + FastAPI (json)",
+              lambda: json.dumps(jsonable_encoder(logs_field.validate_python(orm_logs))).encode(), args.repeat)
+        if orjson:
+            timed("ORM rows + jsonable_encoder + orjson",
+                  lambda: orjson.dumps(jsonable_encoder(orm_logs)), args.repeat)
+        timed("ORM rows + TypeAdapter.dump_json", lambda: AUDIT_LOG_LIST.dump(orm_logs), args.repeat)
+
+        def plain_rows():
+            return AUDIT_LOG_LIST.dump(session.execute(select(AuditLog.__table__)).all())
+
+        timed("plain rows + TypeAdapter (incl. query)", plain_rows, args.repeat)
+        timed("ORM query alone", lambda: session.exec(select(AuditLog)).all() and b"", 1)
+        session.expunge_all()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=10_000)
+    parser.add_argument("--audit-logs", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    main(parser.parse_args())
@@ -0,0 +1,130 @@
+"""
+End-to-end load test for the SMS notification paths in routes/admin.py
+(create_task, reset_task_status, broadcast), run against the local fake gateway
+so the numbers reflect the API and not the provider.
+
+    uvicorn fake_sms_gateway:app --port 8900
+    AT_BASE_URL=http://localhost:8900/version1/messaging uvicorn main:app --port 8000
+    python seed_admin.py
+    python benchmarks/load_test_notifications.py --workers 50 --rounds 5 --concurrency 20
+
+The API must listen on port 8000 because admin routes call /sms/send-sms over
+loopback. Each round, every load-test worker gets a task created, reset and
+deleted; a broadcast is sent once per round. Reports throughput and
+p50/p95/p99/max latency per endpoint.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from collections import defaultdict
+
+import httpx
+
+
+def percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def call(self, name: str, request):
+        started = time.perf_counter()
+        try:
+            resp = await request
+            ok = resp.status_code < 400
+        except httpx.HTTPError:
+            resp, ok = None, False
+        self.latencies[name].append(time.perf_counter() - started)
+        if not ok:
+            self.errors[name] += 1
+        return resp
+
+    def report(self, elapsed: float):
+        print(f"\n{'endpoint':<20}{'calls':>8}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+        for name, samples in self.latencies.items():
+            print(
+                f"{name:<20}{len(samples):>8}{self.errors[name]:>8}{len(samples) / elapsed:>10.1f}"
+                f"{statistics.median(samples) * 1000:>10.1f}{percentile(samples, 0.95) * 1000:>10.1f}"
+                f"{percentile(samples, 0.99) * 1000:>10.1f}{max(samples) * 1000:>10.1f}"
+            )
+        total = sum(len(s) for s in self.latencies.values())
+        print(f"\n{total} requests in {elapsed:.2f}s → {total / elapsed:.1f} req/s overall")
+
+
+async def login(client: httpx.AsyncClient, username: str, password: str) -> str:
+    resp = await client.post("/auth/login", json={"username": username, "password": password})
+    resp.raise_for_status()
+    return resp.json()["access_token"]
+
+
+async def ensure_workers(client: httpx.AsyncClient, count: int, prefix: str) -> list[str]:
+    usernames = []
+    for i in range(count):
+        username = f"{prefix}{i}"
+        resp = await client.post("/admin/workers/", params={
+            "username": username,
+            "password": "loadtest",
+            "phone_number": f"+2547{90000000 + i:08d}",
+        })
+        if resp.status_code not in (200, 400):  # 400 = already exists from a previous run
+            resp.raise_for_status()
+        usernames.append(username)
+    return usernames
+
+
+async def worker_round(client: httpx.AsyncClient, rec: Recorder, username: str, sem: asyncio.Semaphore):
+    async with sem:
+        resp = await rec.call("create_task", client.post("/admin/tasks/", params={
+            "title": f"Load test {uuid.uuid4().hex[:8]}",
+            "description": "Generated by load_test_notifications.py",
+            "assigned_to": username,
+        }))
+        if resp is None or resp.status_code >= 400:
+            return
+        task_id = resp.json()["id"]
+        await rec.call("reset_task_status", client.post(
+            f"/admin/tasks/{task_id}/reset-task-status", params={"reason": "load test"}
+        ))
+        await rec.call("delete_task", client.delete(f"/admin/tasks/{task_id}"))
+
+
+async def main(args):
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout) as client:
+        token = await login(client, args.admin_username, args.admin_password)
+        client.headers["Authorization"] = f"Bearer {token}"
+
+        print(f"Preparing {args.workers} workers...")
+        usernames = await ensure_workers(client, args.workers, args.prefix)
+
+        rec = Recorder()
+        sem = asyncio.Semaphore(args.concurrency)
+        started = time.perf_counter()
+        for _ in range(args.rounds):
+            jobs = [worker_round(client, rec, u, sem) for u in usernames]
+            jobs.append(rec.call("broadcast", client.post("/admin/broadcast", params={"message": "Load test broadcast"})))
+            await asyncio.gather(*jobs)
+        elapsed = time.perf_counter() - started
+
+        rec.report(elapsed)
+        resp = await client.get("/sms/status")
+        if resp.status_code == 200:
+            print("\nSMS status:", resp.json())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--admin-username", default="admin")
+    parser.add_argument("--admin-password", default="admin123")
+    parser.add_argument("--workers", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--prefix", default="loadtest_worker_")
+    asyncio.run(main(parser.parse_args()))
@@ -1,5 +1,5 @@
 from typing import Annotated
-from models import audit_log, complaints, task, user
+from models import audit_log, complaints, employee_complaint, evidence_blob, sms_delivery, sync, task, user
 from fastapi import Depends, FastAPI, HTTPException, Query
 from sqlmodel import Field, Session, SQLModel, create_engine, select
 
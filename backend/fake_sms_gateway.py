@@ -0,0 +1,159 @@
+"""
+Local stand-in for the Africa's Talking messaging API.
+
+Run it and point the backend at it:
+
+    uvicorn fake_sms_gateway:app --port 8900
+    AT_BASE_URL=http://localhost:8900/version1/messaging uvicorn main:app --port 8000
+
+Behaviour is configured through environment variables:
+
+    FAKE_SMS_LATENCY_MEDIAN_MS   median response latency (lognormal), default 150
+    FAKE_SMS_LATENCY_SIGMA       lognormal sigma (spread / tail), default 0.5
+    FAKE_SMS_LATENCY_MAX_MS      cap on a single latency sample, default 10000
+    FAKE_SMS_ERROR_RATE          fraction of requests answered with HTTP 500, default 0
+    FAKE_SMS_THROTTLE_RATE       fraction of requests answered with HTTP 429, default 0
+    FAKE_SMS_DEFAULT_STATUS      recipient status when not overridden, default "Success"
+    FAKE_SMS_STATUSES            per-recipient overrides, "+2547...=InvalidPhoneNumber,+2547...=UserInBlacklist"
+    FAKE_SMS_DELIVERY_CALLBACK   if set, a delivery report is POSTed there after each send
+                                 (e.g. http://localhost:8000/sms/delivery-report)
+    FAKE_SMS_SEED                random seed for reproducible runs
+
+Settings can also be changed at runtime with PUT /config.
+"""
+import os
+import math
+import uuid
+import random
+import asyncio
+import httpx
+from typing import Optional
+from fastapi import FastAPI, Request, BackgroundTasks
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+# Provider status codes for the statuses we emulate
+STATUS_CODES = {
+    "Processed": 100,
+    "Success": 101,
+    "Queued": 102,
+    "RiskHold": 401,
+    "InvalidSenderId": 402,
+    "InvalidPhoneNumber": 403,
+    "UnsupportedNumberType": 404,
+    "InsufficientBalance": 405,
+    "UserInBlacklist": 406,
+    "CouldNotRoute": 407,
+    "InternalServerError": 500,
+    "GatewayError": 501,
+    "RejectedByGateway": 502,
+}
+
+
+def _parse_statuses(raw: str) -> dict[str, str]:
+    statuses = {}
+    for item in filter(None, (part.strip() for part in raw.split(","))):
+        number, _, status = item.partition("=")
+        statuses[number.strip()] = status.strip()
+    return statuses
+
+
+class GatewayConfig(BaseModel):
+    latency_median_ms: float = float(os.getenv("FAKE_SMS_LATENCY_MEDIAN_MS", "150"))
+    latency_sigma: float = float(os.getenv("FAKE_SMS_LATENCY_SIGMA", "0.5"))
+    latency_max_ms: float = float(os.getenv("FAKE_SMS_LATENCY_MAX_MS", "10000"))
+    error_rate: float = float(os.getenv("FAKE_SMS_ERROR_RATE", "0"))
+    throttle_rate: float = float(os.getenv("FAKE_SMS_THROTTLE_RATE", "0"))
+    default_status: str = os.getenv("FAKE_SMS_DEFAULT_STATUS", "Success")
+    statuses: dict[str, str] = _parse_statuses(os.getenv("FAKE_SMS_STATUSES", ""))
+    delivery_callback: Optional[str] = os.getenv("FAKE_SMS_DELIVERY_CALLBACK") or None
+
+
+config = GatewayConfig()
+rng = random.Random(os.getenv("FAKE_SMS_SEED"))
+stats = {"requests": 0, "errors": 0, "throttled": 0, "recipients": 0}
+
+app = FastAPI(title="Fake Africa's Talking gateway")
+
+
+def _latency_seconds() -> float:
+    if config.latency_median_ms <= 0:
+        return 0.0
+    sample = rng.lognormvariate(math.log(config.latency_median_ms), config.latency_sigma)
+    return min(sample, config.latency_max_ms) / 1000
+
+
+async def _send_delivery_report(message_id: str, number: str, status: str):
+    # Mirror the provider: only messages that were accepted get a final report
+    final = "Success" if status == "Success" else "Failed"
+    form = {
+        "id": message_id,
+        "phoneNumber": number,
+        "status": final,
+        "networkCode": "63902",
+        "retryCount": "0",
+    }
+    if final == "Failed":
+        form["failureReason"] = status
+    try:
+        async with httpx.AsyncClient(timeout=5) as client:
+            await client.post(config.delivery_callback, data=form)
+    except httpx.HTTPError:
+        pass
+
+
+@app.post("/version1/messaging")
+async def send_messages(request: Request, background_tasks: BackgroundTasks):
+    form = await request.form()
+    stats["requests"] += 1
+
+    await asyncio.sleep(_latency_seconds())
+
+    roll = rng.random()
+    if roll < config.error_rate:
+        stats["errors"] += 1
+        return JSONResponse(status_code=500, content="Internal Server Error")
+    if roll < config.error_rate + config.throttle_rate:
+        stats["throttled"] += 1
+        return JSONResponse(status_code=429, content="Too Many Requests")
+
+    recipients = []
+    for number in filter(None, (n.strip() for n in str(form.get("to", "")).split(","))):
+        status = config.statuses.get(number, config.default_status)
+        accepted = status in ("Success", "Processed", "Queued")
+        message_id = f"ATXid_{uuid.uuid4().hex}" if accepted else "None"
+        recipients.append({
+            "statusCode": STATUS_CODES.get(status, 500),
+            "number": number,
+            "status": status,
+            "cost": "KES 0.8000" if accepted else "0",
+            "messageId": message_id,
+        })
+        if accepted and config.delivery_callback:
+            background_tasks.add_task(_send_delivery_report, message_id, number, status)
+    stats["recipients"] += len(recipients)
+
+    sent = sum(1 for r in recipients if r["messageId"] != "None")
+    return JSONResponse(status_code=201, content={
+        "SMSMessageData": {
+            "Message": f"Sent to {sent}/{len(recipients)} Total Cost: KES {0.8 * sent:.4f}",
+            "Recipients": recipients,
+        }
+    })
+
+
+@app.get("/config", response_model=GatewayConfig)
+def get_config():
+    return config
+
+
+@app.put("/config", response_model=GatewayConfig)
+def update_config(new_config: GatewayConfig):
+    global config
+    config = new_config
+    return config
+
+
+@app.get("/stats")
+def get_stats():
+    return stats
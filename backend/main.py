@@ -3,13 +3,40 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from core.database import create_db_and_tables
 from contextlib import asynccontextmanager
-from routes import complaints, auth, worker, admin,sms
+from routes import complaints, auth, worker, admin,sms, evidence, resumable, direct_uploads, exports, events, sync, bulk
+from utils.image_variants import shutdown_pool
+from utils import evidence_gc, phash_index
+from utils.sync import tombstone_pruner
+from utils.compression import CompressionMiddleware
+from utils.uploads import UploadSizeLimitMiddleware
+from utils.event_bus import bus
+from utils.security import shutdown_hash_pool
+from utils.storage import PUBLIC_UPLOADS
+import asyncio
 import os
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     create_db_and_tables()
+    phash_index.index.rebuild()
+    background = [
+        asyncio.create_task(sms.deferred_sms_worker()),
+        asyncio.create_task(sms.delivery_buffer.run()),
+        asyncio.create_task(sms.inbound_buffer.run()),
+        asyncio.create_task(sms.notification_buffer.run()),
+        asyncio.create_task(sms.broadcast_buffer.run()),
+        asyncio.create_task(resumable.expired_upload_cleaner()),
+        asyncio.create_task(evidence_gc.reclaimer.run()),
+        asyncio.create_task(evidence_gc.gc_loop()),
+        asyncio.create_task(tombstone_pruner()),
+    ]
     yield
+    bus.close()  # ends open event streams so shutdown doesn't wait on them
+    for job in background:
+        job.cancel()
+    await asyncio.gather(*background, return_exceptions=True)
+    shutdown_pool()
+    shutdown_hash_pool()
 
 app = FastAPI(title="Field Service Tracker", lifespan=lifespan)
 
@@ -22,19 +49,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large JSON responses (br/zstd/gzip by Accept-Encoding); photo and ZIP routes are excluded
+app.add_middleware(CompressionMiddleware)
+
+# Cut off multipart uploads over MAX_UPLOAD_REQUEST_BYTES while they stream in, before they are spooled
+app.add_middleware(UploadSizeLimitMiddleware)
+
 # Path where images are stored
 UPLOAD_DIR = "uploads"
 
 # Make sure the folder exists
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-# Expose uploads directory at /uploads
-app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
+# Evidence is served through the authorized /evidence/{blob_id} route and the API returns those URLs.
+# PUBLIC_UPLOADS=true re-exposes uploads/ at /uploads (no auth, by path) for legacy clients.
+if PUBLIC_UPLOADS:
+    app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
 app.include_router(auth.router, prefix="/auth")
 app.include_router(admin.router, prefix="/admin")
+app.include_router(bulk.router, prefix="/admin/bulk")
 app.include_router(worker.router, prefix="/worker")
+app.include_router(resumable.router, prefix="/worker")
+app.include_router(direct_uploads.router, prefix="/worker")
+app.include_router(sync.router, prefix="/worker")
 app.include_router(complaints.router, prefix="/complaints")
 app.include_router(sms.router, prefix="/sms")
+app.include_router(evidence.router, prefix="/evidence")
+app.include_router(exports.router, prefix="/admin/exports")
+app.include_router(events.router, prefix="/events")
 
 @app.get("/", tags=["Test"])
 def root():
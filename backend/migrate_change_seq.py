@@ -0,0 +1,31 @@
+"""
+One-off migration for delta sync (GET /worker/sync): adds the change_seq
+columns to an existing DB. The changecounter and tombstone tables are created
+by create_db_and_tables as usual.
+
+Existing rows keep change_seq 0; clients start with a full snapshot anyway,
+and every later write stamps a real sequence number. Run from the backend
+directory:
+
+    python migrate_change_seq.py
+"""
+from sqlalchemy import text
+
+from core.database import create_db_and_tables, engine
+
+
+def add_missing_columns():
+    with engine.begin() as conn:
+        for table in ("task", "taskevidence", "employeecomplaint"):
+            columns = {row[1] for row in conn.execute(text(f"PRAGMA table_info({table})"))}
+            if columns and "change_seq" not in columns:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN change_seq INTEGER NOT NULL DEFAULT 0"))
+                print(f"Added column {table}.change_seq")
+            if columns:
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_change_seq ON {table} (change_seq)"))
+
+
+if __name__ == "__main__":
+    add_missing_columns()
+    create_db_and_tables()
+    print("Done")
@@ -0,0 +1,132 @@
+"""
+One-off migration: move existing evidence files into the content-addressed
+blob store (uploads/blobs/ab/cd/<sha256><ext>) and deduplicate them.
+
+- adds taskevidence.blob_id and complaint.evidence_blob_id to an existing DB
+- hashes every file referenced by TaskEvidence.file_url / Complaint.evidence
+- the first copy of each hash is moved into the store, later copies are deleted
+- rows are repointed at the blob and reference counts are set accordingly
+
+Files under uploads/tasks and uploads/complaints that no row references are
+left alone and only reported. Run from the backend directory:
+
+    python migrate_evidence_blobs.py            # migrate
+    python migrate_evidence_blobs.py --dry-run  # report only
+"""
+import argparse
+import hashlib
+import mimetypes
+import os
+from collections import Counter
+
+from sqlalchemy import text
+from sqlmodel import Session, select
+
+from core.database import create_db_and_tables, engine
+from models.complaints import Complaint
+from models.evidence_blob import EvidenceBlob
+from models.task import TaskEvidence
+from utils.blob_store import blob_path
+
+LEGACY_DIRS = [os.path.join("uploads", "tasks"), os.path.join("uploads", "complaints")]
+
+
+def add_missing_columns():
+    with engine.begin() as conn:
+        for table, column in (("taskevidence", "blob_id"), ("complaint", "evidence_blob_id")):
+            columns = {row[1] for row in conn.execute(text(f"PRAGMA table_info({table})"))}
+            if columns and column not in columns:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} VARCHAR REFERENCES evidenceblob (id)"))
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_{column} ON {table} ({column})"))
+                print(f"Added column {table}.{column}")
+
+        # Image variant metadata (added after the blob store itself)
+        columns = {row[1] for row in conn.execute(text("PRAGMA table_info(evidenceblob)"))}
+        for column, sql_type in (("width", "INTEGER"), ("height", "INTEGER"),
+                                 ("thumbnail_path", "VARCHAR"), ("web_path", "VARCHAR"), ("phash", "VARCHAR")):
+            if columns and column not in columns:
+                conn.execute(text(f"ALTER TABLE evidenceblob ADD COLUMN {column} {sql_type}"))
+                print(f"Added column evidenceblob.{column}")
+        if columns:
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_evidenceblob_phash ON evidenceblob (phash)"))
+
+
+def sha256_of(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def migrate(dry_run: bool):
+    add_missing_columns()
+    create_db_and_tables()
+
+    stats = Counter()
+    with Session(engine) as session:
+        blobs: dict[str, EvidenceBlob] = {b.id: b for b in session.exec(select(EvidenceBlob)).all()}
+        referenced = set()
+
+        def adopt(path: str) -> EvidenceBlob | None:
+            if not os.path.isfile(path):
+                stats["missing_files"] += 1
+                return None
+            referenced.add(os.path.normpath(path))
+            sha256 = sha256_of(path)
+            size = os.path.getsize(path)
+            blob = blobs.get(sha256)
+            if blob is None:
+                target = blob_path(sha256, os.path.splitext(path)[1])
+                blob = EvidenceBlob(id=sha256, path=target, size=size,
+                                    content_type=mimetypes.guess_type(path)[0], ref_count=0)
+                blobs[sha256] = blob
+                stats["blobs_created"] += 1
+                if not dry_run:
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    os.replace(path, target)
+                    session.add(blob)
+            else:
+                stats["duplicates_removed"] += 1
+                stats["bytes_reclaimed"] += size
+                if not dry_run and os.path.normpath(path) != os.path.normpath(blob.path):
+                    os.remove(path)
+            blob.ref_count += 1
+            return blob
+
+        for evidence in session.exec(select(TaskEvidence).where(TaskEvidence.blob_id == None)).all():  # noqa: E711
+            blob = adopt(evidence.file_url)
+            if blob and not dry_run:
+                evidence.blob_id = blob.id
+                evidence.file_url = blob.path
+                session.add(evidence)
+            stats["task_evidence_rows"] += 1
+
+        for complaint in session.exec(
+            select(Complaint).where(Complaint.evidence != None, Complaint.evidence_blob_id == None)  # noqa: E711
+        ).all():
+            blob = adopt(complaint.evidence)
+            if blob and not dry_run:
+                complaint.evidence_blob_id = blob.id
+                complaint.evidence = blob.path
+                session.add(complaint)
+            stats["complaint_rows"] += 1
+
+        if not dry_run:
+            session.commit()
+
+    for directory in LEGACY_DIRS:
+        if os.path.isdir(directory):
+            for name in os.listdir(directory):
+                if os.path.normpath(os.path.join(directory, name)) not in referenced:
+                    stats["unreferenced_legacy_files"] += 1
+
+    prefix = "[dry run] " if dry_run else ""
+    for key, value in sorted(stats.items()):
+        print(f"{prefix}{key}: {value}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deduplicate evidence into the blob store")
+    parser.add_argument("--dry-run", action="store_true")
+    migrate(parser.parse_args().dry_run)
@@ -1,8 +1,10 @@
 import uuid
 from datetime import datetime
 from typing import Optional
-from sqlmodel import SQLModel, Field
+from sqlmodel import SQLModel, Field, Relationship
 import enum
+from models.evidence_blob import EvidenceBlob
+from utils.storage import evidence_url
 
 
 class ComplaintCategory(str, enum.Enum):
@@ -23,6 +25,20 @@ class Complaint(SQLModel, table=True):
     description: str
     category: ComplaintCategory
     evidence: Optional[str] = None  # could be JSON list of URLs if you later allow uploads
+    evidence_blob_id: Optional[str] = Field(default=None, foreign_key="evidenceblob.id", index=True)
     status: ComplaintStatus = Field(default=ComplaintStatus.pending)
     location: Optional[str] = None  # helps identify where issue happened
-    submitted_at: datetime = Field(default_factory=datetime.now, nullable=False)  # ✅ fixed
\ No newline at end of file
+    submitted_at: datetime = Field(default_factory=datetime.now, nullable=False)  # ✅ fixed
+
+    evidence_blob: Optional[EvidenceBlob] = Relationship()
+
+    # What the API returns: /evidence/{blob_id} URLs (admins only) unless PUBLIC_UPLOADS is on
+    @property
+    def evidence_url(self) -> Optional[str]:
+        return evidence_url(self.evidence_blob_id, self.evidence)
+
+    @property
+    def evidence_thumbnail_url(self) -> Optional[str]:
+        if not self.evidence_blob:
+            return None
+        return evidence_url(self.evidence_blob_id, self.evidence_blob.thumbnail_path, "thumbnail")
\ No newline at end of file
@@ -15,3 +15,4 @@ class EmployeeComplaint(SQLModel, table=True):
     description: str
     status: EmployeeComplaintStatus = Field(default=EmployeeComplaintStatus.pending)
     submitted_at: datetime = Field(default_factory=datetime.utcnow)
+    change_seq: int = Field(default=0, index=True)  # set on every write (utils/sync.py)
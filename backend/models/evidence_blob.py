@@ -0,0 +1,20 @@
+from datetime import datetime
+from sqlmodel import SQLModel, Field
+
+
+# Content-addressed evidence file: one row (and one file on disk) per distinct
+# SHA-256, shared by every TaskEvidence / Complaint that uploaded the same bytes.
+class EvidenceBlob(SQLModel, table=True):
+    id: str = Field(primary_key=True)  # sha256 hex digest
+    path: str  # e.g. uploads/blobs/ab/cd/<sha256>.jpg (served under /uploads)
+    size: int
+    content_type: str | None = None
+    ref_count: int = Field(default=0)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    # Derivatives generated in the background (utils/image_variants.py)
+    width: int | None = None
+    height: int | None = None
+    thumbnail_path: str | None = None
+    web_path: str | None = None
+    phash: str | None = Field(default=None, index=True)  # 64-bit dHash as 16 hex chars (utils/phash_index.py)
@@ -0,0 +1,27 @@
+from datetime import datetime
+from typing import Optional
+from sqlmodel import SQLModel, Field
+
+
+# Delivery status of an outgoing SMS, keyed by the provider's messageId.
+# Rows are created when we send (status "Sent") and upserted from delivery reports.
+class SmsDelivery(SQLModel, table=True):
+    message_id: str = Field(primary_key=True)
+    phone_number: Optional[str] = Field(default=None, index=True)
+    status: str  # e.g. "Sent", "Submitted", "Buffered", "Success", "Failed", "Rejected"
+    failure_reason: Optional[str] = None
+    network_code: Optional[str] = None
+    retry_count: Optional[int] = None
+    task_id: Optional[str] = Field(default=None, index=True)  # set for task notifications
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+# Inbound SMS (worker replies), keyed by the provider's message id.
+class SmsInbound(SQLModel, table=True):
+    id: str = Field(primary_key=True)
+    phone_number: str = Field(index=True)
+    to: Optional[str] = None
+    text: str
+    link_id: Optional[str] = None
+    received_at: datetime = Field(default_factory=datetime.utcnow)
@@ -0,0 +1,22 @@
+from datetime import datetime
+from typing import Optional
+from sqlmodel import SQLModel, Field
+
+
+# Single row (id=1): last change sequence number handed out (utils/sync.py).
+# Every transaction that writes a synced row takes the next number, so
+# change_seq columns only ever grow, in commit order.
+class ChangeCounter(SQLModel, table=True):
+    id: int = Field(default=1, primary_key=True)
+    value: int = Field(default=0)
+    pruned_through: int = Field(default=0)  # tombstones up to this seq have been deleted
+
+
+# Deleted (or reassigned-away) row that worker clients still have to drop
+class Tombstone(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    entity: str  # "task" / "evidence"
+    entity_id: str
+    worker: str = Field(index=True)
+    change_seq: int = Field(index=True)
+    deleted_at: datetime = Field(default_factory=datetime.utcnow)
@@ -3,6 +3,8 @@
 # from typing import Optional
 # from sqlmodel import SQLModel, Field, Relationship
 # import enum
+from models.evidence_blob import EvidenceBlob
+from utils.storage import evidence_url
 
 # class TaskStatus(str, enum.Enum):
 #     pending = "pending"
@@ -21,6 +23,7 @@
 
 import uuid
 from datetime import datetime
+from typing import Optional
 from sqlmodel import SQLModel, Field, Relationship
 import enum
 
@@ -40,6 +43,7 @@ class Task(SQLModel, table=True):
     assigned_by: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+    change_seq: int = Field(default=0, index=True)  # set on every write (utils/sync.py)
 
     evidences: list["TaskEvidence"] = Relationship(back_populates="task")
 
@@ -48,6 +52,26 @@ class TaskEvidence(SQLModel, table=True):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True, index=True)
     task_id: str = Field(foreign_key="task.id")
     file_url: str
+    blob_id: Optional[str] = Field(default=None, foreign_key="evidenceblob.id", index=True)
     uploaded_at: datetime = Field(default_factory=datetime.utcnow)
+    change_seq: int = Field(default=0, index=True)  # set on every write (utils/sync.py)
 
     task: Task = Relationship(back_populates="evidences")
+    blob: Optional[EvidenceBlob] = Relationship()
+
+    # What the API returns: /evidence/{blob_id} URLs unless PUBLIC_UPLOADS is on
+    @property
+    def url(self) -> str:
+        return evidence_url(self.blob_id, self.file_url)
+
+    @property
+    def thumbnail_url(self) -> Optional[str]:
+        return evidence_url(self.blob_id, self.blob.thumbnail_path, "thumbnail") if self.blob else None
+
+    @property
+    def web_url(self) -> Optional[str]:
+        return evidence_url(self.blob_id, self.blob.web_path, "web") if self.blob else None
+
+    @property
+    def phash(self) -> Optional[str]:
+        return self.blob.phash if self.blob else None
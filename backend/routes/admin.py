@@ -1,13 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlmodel import Session, select
+from sqlalchemy import delete, func
+from sqlalchemy.orm import selectinload
 from typing import List
 from models.task import Task, TaskStatus, TaskEvidence
 from models.user import User, UserRole, UserStatus
 from models.employee_complaint import EmployeeComplaint
 from models.complaints import Complaint
 from models.audit_log import AuditLog
+from models.sms_delivery import SmsDelivery
+from models.evidence_blob import EvidenceBlob
 from core.database import get_session
+from schemas.audit_logs import AuditLogRead
+from schemas.tasks import TaskRead, TaskWithEvidenceRead
+from schemas.users import WorkerRead
+from utils.serialization import AUDIT_LOG_LIST, TASK_WITH_EVIDENCE_LIST, WORKER_LIST
+from utils.cache import cache
+from utils.change_versions import cache_headers, not_modified, versions
+from utils.event_bus import bus, publish_task
+from utils.fieldsets import FIELDS_QUERY, columns, parse_fields, schema_fields, subset_list
 from utils.security import admin_required, hash_password
+from routes.sms import PRIORITY_LOW, broadcast_buffer
+from utils.event_buffer import BufferFull
+from utils.idempotency import Idempotency, idempotency
+from utils.phash_index import PHASH_MATCH_DISTANCE, hamming, index as phash_index, is_degenerate, matching_evidence
+from utils.evidence_gc import collect_garbage, delete_task_evidence, schedule_reclaim, snapshot as evidence_gc_snapshot
+from utils.storage import evidence_url
 from datetime import datetime
 from typing import Optional
 from pydantic import BaseModel
@@ -23,44 +43,9 @@ class TaskStatus(str, Enum):
     in_progress = "in_progress"
     completed = "completed"
 
-class TaskEvidenceRead(BaseModel):
-    id: str
-    file_url: str
-    uploaded_at: datetime
-
-    class Config:
-        from_attributes = True
-
-
-# Task response model
-class TaskRead(BaseModel):
-    id: str
-    title: str
-    description: str
-    status: TaskStatus
-    assigned_to: str
-    assigned_by: str
-    created_at: datetime
-    updated_at: datetime
-    evidence: List[TaskEvidenceRead] = []
-
-    class Config:
-        from_attributes = True
-
-# Worker response model
-class WorkerRead(BaseModel):
-    id: uuid.UUID
-    username: str
-    role: UserRole
-    status: UserStatus
-    created_at: datetime
-    updated_at: datetime
-
-    class Config:
-        from_attributes = True 
 
 # Helper: Audit log
-def log_action(session: Session, performed_by: User, action: str, details: str = None):
+def log_action(session: Session, performed_by: User, action: str, details: str = None, commit: bool = True):
     audit = AuditLog(
         action=action,
         details=details,
@@ -68,7 +53,8 @@ def log_action(session: Session, performed_by: User, action: str, details: str =
         created_at=datetime.utcnow()
     )
     session.add(audit)
-    session.commit()
+    if commit:
+        session.commit()
 
 
 # # Add a new worker
@@ -183,9 +169,12 @@ def add_worker(
         raise HTTPException(status_code=400, detail="Phone number already exists")
 
     # 4️⃣ Test phone number validity by sending SMS
+    # (deferred when the SMS provider circuit is open, so outages don't block onboarding)
     sms_payload = {
         "phone_number": phone_number,
-        "message": f"Hello {username}, this is a verification test for your registration."
+        "message": f"Hello {username}, this is a verification test for your registration.",
+        "defer": True,
+        "priority": "low"
     }
 
     try:
@@ -198,6 +187,8 @@ def add_worker(
     except Exception as sms_err:
         raise HTTPException(status_code=400, detail=f"Failed to verify phone number: {sms_err}")
 
+    sms_verified = not sms_result.get("result", {}).get("deferred", False)
+
     # 5️⃣ Create worker
     user = User(
         username=username,
@@ -214,7 +205,8 @@ def add_worker(
         session,
         performed_by=admin.id,
         action="created_worker",
-        details=f"Worker {username} with phone {phone_number} created and verified via SMS."
+        details=f"Worker {username} with phone {phone_number} created and "
+                + ("verified via SMS." if sms_verified else "SMS verification deferred (provider unavailable).")
     )
 
     return {
@@ -222,19 +214,27 @@ def add_worker(
         "worker_id": str(user.id),
         "username": user.username,
         "phone_number": user.phone_number,
-        "sms_verified": True
+        "sms_verified": sms_verified
     }
 
 
 # List all workers
 @router.get("/workers/", response_model=List[WorkerRead])
 def list_workers(
+    fields: Optional[str] = FIELDS_QUERY,
     session: Session = Depends(get_session),
     admin: User = Depends(admin_required)
 ):
-    workers = session.exec(select(User).where(User.role == "worker")).all()
+    names = schema_fields(WorkerRead, fields)
+    if names is None:
+        workers = session.exec(select(User).where(User.role == "worker")).all()
+        # Serialize before log_action commits: the commit expires every loaded row
+        response = WORKER_LIST.response(workers)
+    else:
+        workers = session.execute(select(*columns(User, names)).where(User.role == "worker")).all()
+        response = subset_list(WorkerRead, names).response(workers)
     log_action(session, performed_by=admin.id, action="viewed_workers_list")
-    return workers
+    return response
 
 
 # View worker profile
@@ -329,7 +329,8 @@ def update_worker_status(
 def send_dismissal_sms(phone_number: str, worker_name: str):
     sms_payload = {
         "phone_number": phone_number,
-        "message": f"Hello {worker_name}, you have been dismissed from your duties."
+        "message": f"Hello {worker_name}, you have been dismissed from your duties.",
+        "priority": "high"
     }
 
     try:
@@ -363,22 +364,73 @@ def remove_worker(username: str, session: Session = Depends(get_session), admin:
     # Send dismissal SMS
     send_dismissal_sms(worker.phone_number, worker.username)
 
-    # Delete worker from database
+    # Delete the worker with their tasks and evidence, set-based, in one commit
+    worker_tasks = select(Task.id).where(Task.assigned_to == worker.username)
+    reclaim = delete_task_evidence(session, worker_tasks)
+    removed_tasks = session.execute(delete(Task).where(Task.assigned_to == worker.username)).rowcount
     session.delete(worker)
-    session.commit()
 
     # Log the action
     log_action(
         session,
         performed_by=admin.id,
         action="removed_worker",
-        details=f"Worker '{worker.username}' removed and notified via SMS"
+        details=f"Worker '{worker.username}' removed with {removed_tasks} task(s) and notified via SMS",
+        commit=False,
     )
+    session.commit()
+    schedule_reclaim(reclaim)
+    bus.publish("worker.removed", worker=username, username=username, tasks_removed=removed_tasks)
 
     return {"detail": f"Worker '{worker.username}' removed and SMS sent successfully"}
 
 
 
+# Broadcast an SMS to all active workers
+@router.post("/broadcast", status_code=status.HTTP_202_ACCEPTED)
+def broadcast_message(
+    message: str,
+    session: Session = Depends(get_session),
+    admin: User = Depends(admin_required)
+):
+    """
+    Queue the message for every active worker and return at once. It goes out
+    in the background on the low-priority lane (task assignments and dismissals
+    go first); each outcome is audited as sms_notification_sent / _deferred / _failed.
+    """
+    workers = session.exec(
+        select(User).where(User.role == UserRole.worker, User.status == UserStatus.active)
+    ).all()
+
+    broadcast_id = uuid.uuid4()
+    queued = dropped = 0
+    for worker in workers:
+        try:
+            broadcast_buffer.add({
+                "idempotency_key": f"broadcast-{broadcast_id}-{worker.id}",
+                "phone_number": worker.phone_number,
+                "message": message,
+                "priority": PRIORITY_LOW,
+                "task_id": None,
+                "about": "broadcast",
+                "username": worker.username,
+                "performed_by": admin.id,
+            })
+            queued += 1
+        except BufferFull:
+            dropped += 1
+
+    log_action(
+        session,
+        performed_by=admin.id,
+        action="broadcast_queued",
+        details=f"Broadcast {broadcast_id} to {len(workers)} workers | queued={queued} dropped={dropped}"
+    )
+
+    # "dropped": the broadcast buffer was full for those workers; nothing was sent to them
+    return {"broadcast_id": str(broadcast_id), "recipients": len(workers), "queued": queued, "dropped": dropped}
+
+
 # @router.post("/tasks/", response_model=Task)
 # def create_task(
 #     title: str, description: str, assigned_to: str,
@@ -440,29 +492,20 @@ def remove_worker(username: str, session: Session = Depends(get_session), admin:
 
 
 
-class TaskResponse(BaseModel):
-    id: str
-    title: str
-    description: str
-    assigned_to: str
-    assigned_by: str
-    status: str
-    created_at: datetime
-    updated_at: datetime
-
-    class Config:
-        from_attributes = True
-
-
-
-@router.post("/tasks/", response_model=TaskResponse)
+@router.post("/tasks/", response_model=TaskRead)
 def create_task(
     title: str,
     description: str,
     assigned_to: str,
     session: Session = Depends(get_session),
-    admin: User = Depends(admin_required)
+    admin: User = Depends(admin_required),
+    idem: Idempotency = Depends(idempotency)
 ):
+    # Retried request with the same Idempotency-Key → original response, no new task/SMS
+    replayed = idem.replay()
+    if replayed:
+        return replayed
+
     try:
         # 1️⃣ Ensure worker exists
         worker = session.exec(
@@ -499,17 +542,24 @@ def create_task(
         session.add(task)
         session.commit()
         session.refresh(task)
+        publish_task("task.created", task)
 
         # ✅ Send SMS notification
         sms_payload = {
             "phone_number": worker.phone_number,
-            "message": f"You have been assigned a new task: {task.title}"
+            "message": f"You have been assigned a new task: {task.title}",
+            "priority": "high",
+            "task_id": task.id
         }
 
         try:
             with httpx.Client() as client:
                 print("👉 Sending SMS request...")  # DEBUG
-                sms_response = client.post("http://localhost:8000/sms/send-sms", json=sms_payload)
+                sms_response = client.post(
+                    "http://localhost:8000/sms/send-sms",
+                    json=sms_payload,
+                    headers={"Idempotency-Key": f"task-assigned-{task.id}"}
+                )
                 sms_response.raise_for_status()
 
             sms_result = sms_response.json()
@@ -540,7 +590,7 @@ def create_task(
             details=f"Task '{task.title}' assigned to {task.assigned_to}"
         )
 
-        return task  # FastAPI will serialize via TaskResponse
+        return idem.save(TaskRead.model_validate(task))  # FastAPI will serialize via TaskRead
 
     except HTTPException:
         raise
@@ -553,35 +603,36 @@ def create_task(
 
 
 
-@router.get("/tasks/", response_model=List[TaskRead])
+@router.get("/tasks/", response_model=List[TaskWithEvidenceRead])
 def list_tasks(
+    request: Request,
+    fields: Optional[str] = FIELDS_QUERY,
     session: Session = Depends(get_session),
     admin: User = Depends(admin_required)
 ):
-    tasks = session.exec(select(Task)).all()
-    response_tasks: List[TaskRead] = []
-
-    for task in tasks:
-        evidences = session.exec(
-            select(TaskEvidence).where(TaskEvidence.task_id == task.id)
+    names = schema_fields(TaskWithEvidenceRead, fields)
+
+    # Unchanged since the client's last poll → 304 without querying; the poll is still audited
+    etag = versions.etag("task", "taskevidence", "evidenceblob")
+    if cached := not_modified(request, etag):
+        log_action(session, performed_by=admin.id, action="viewed_tasks_list", details="Unchanged since last poll")
+        return cached
+
+    if names is None or "evidence" in names:
+        # Two extra queries for all evidence + blobs, instead of one per task
+        tasks = session.exec(
+            select(Task).options(selectinload(Task.evidences).selectinload(TaskEvidence.blob))
         ).all()
-
-        response_tasks.append(
-            TaskRead(
-                id=task.id,
-                title=task.title,
-                description=task.description,
-                status=task.status,
-                assigned_to=task.assigned_to,
-                assigned_by=task.assigned_by,
-                created_at=task.created_at,
-                updated_at=task.updated_at,
-                evidence=evidences
-            )
-        )
-
+        adapter = TASK_WITH_EVIDENCE_LIST if names is None else subset_list(TaskWithEvidenceRead, names)
+    else:
+        # Just the requested columns: no ORM rows, no evidence queries
+        tasks = session.execute(select(*columns(Task, names))).all()
+        adapter = subset_list(TaskWithEvidenceRead, names)
+
+    # Serialize before log_action commits: the commit expires every loaded row
+    response = adapter.response(tasks, headers=cache_headers(etag))
     log_action(session, performed_by=admin.id, action="viewed_tasks_list")
-    return response_tasks
+    return response
 
 # @router.get("/tasks/", response_model=List[TaskRead])
 # def list_tasks(
@@ -601,7 +652,7 @@ def list_tasks(
 #     return tasks
 
 # View task details
-@router.get("/tasks/{task_id}", response_model=TaskRead)
+@router.get("/tasks/{task_id}", response_model=TaskWithEvidenceRead)
 def view_task(task_id: str, session: Session = Depends(get_session), admin: User = Depends(admin_required)):
     task = session.get(Task, task_id)
     if not task:
@@ -610,8 +661,115 @@ def view_task(task_id: str, session: Session = Depends(get_session), admin: User
     log_action(session, performed_by=admin.id, action="viewed_task", details=f"Viewed task '{task.title}'")
     return task
 
+# SMS delivery status for a task's notifications (from provider delivery reports)
+@router.get("/tasks/{task_id}/sms-deliveries", response_model=List[SmsDelivery])
+def view_task_sms_deliveries(task_id: str, session: Session = Depends(get_session), admin: User = Depends(admin_required)):
+    task = session.get(Task, task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    deliveries = session.exec(
+        select(SmsDelivery).where(SmsDelivery.task_id == task_id).order_by(SmsDelivery.created_at)
+    ).all()
+    return deliveries
+
+# Evidence photo reuse (perceptual hash matches across tasks)
+class EvidenceMatch(BaseModel):
+    evidence_id: str
+    task_id: str
+    task_title: str
+    assigned_to: str
+    file_url: str
+    blob_id: Optional[str] = None
+    uploaded_at: datetime
+    distance: int  # differing bits out of 64; 0 = same or visually identical photo
+
+
+def _evidence_match(distance: int, evidence: TaskEvidence, task: Task) -> EvidenceMatch:
+    return EvidenceMatch(
+        evidence_id=evidence.id, task_id=task.id, task_title=task.title, assigned_to=task.assigned_to,
+        file_url=evidence.url, blob_id=evidence.blob_id, uploaded_at=evidence.uploaded_at, distance=distance,
+    )
+
+
+@router.get("/evidence/{evidence_id}/matches", response_model=List[EvidenceMatch])
+def view_evidence_matches(
+    evidence_id: str,
+    max_distance: int = PHASH_MATCH_DISTANCE,
+    include_same_task: bool = False,
+    session: Session = Depends(get_session),
+    admin: User = Depends(admin_required)
+):
+    evidence = session.get(TaskEvidence, evidence_id)
+    if not evidence:
+        raise HTTPException(status_code=404, detail="Evidence not found")
+    if not evidence.phash:
+        raise HTTPException(status_code=409, detail="Evidence has not been hashed yet")
+
+    return [
+        _evidence_match(distance, match, task)
+        for distance, match, task in matching_evidence(session, evidence.phash, min(max_distance, 32))
+        if match.id != evidence.id and (include_same_task or task.id != evidence.task_id)
+    ]
+
+
+@router.get("/evidence/reused")
+def list_reused_evidence(
+    max_distance: int = PHASH_MATCH_DISTANCE,
+    session: Session = Depends(get_session),
+    admin: User = Depends(admin_required)
+):
+    """
+    Groups of near-identical photos that appear as evidence on more than one task.
+    """
+    hashes = dict(session.exec(
+        select(EvidenceBlob.id, EvidenceBlob.phash)
+        .join(TaskEvidence, TaskEvidence.blob_id == EvidenceBlob.id)
+        .where(EvidenceBlob.phash != None)  # noqa: E711
+        .distinct()
+    ).all())
+    # Blank / low-detail photos all hash alike; they are not evidence of reuse
+    hashes = {blob_id: phash for blob_id, phash in hashes.items() if not is_degenerate(phash)}
+
+    # Union-find over blobs that are within max_distance of each other
+    parent = {blob_id: blob_id for blob_id in hashes}
+
+    def root(blob_id):
+        while parent[blob_id] != blob_id:
+            parent[blob_id] = parent[parent[blob_id]]
+            blob_id = parent[blob_id]
+        return blob_id
+
+    for blob_id, phash in hashes.items():
+        for _, other in phash_index.search(phash, min(max_distance, 32)):
+            if other in parent:
+                parent[root(other)] = root(blob_id)
+
+    clusters: dict[str, list] = {}
+    for evidence, task in session.exec(
+        select(TaskEvidence, Task).join(Task, Task.id == TaskEvidence.task_id).where(TaskEvidence.blob_id.in_(hashes))
+    ).all():
+        clusters.setdefault(root(evidence.blob_id), []).append((evidence, task))
+
+    groups = []
+    for items in clusters.values():
+        if len({task.id for _, task in items}) < 2:
+            continue
+        items.sort(key=lambda item: item[0].uploaded_at)
+        anchor = int(hashes[items[0][0].blob_id], 16)
+        groups.append({
+            "tasks": len({task.id for _, task in items}),
+            "workers": sorted({task.assigned_to for _, task in items}),
+            "evidence": [
+                _evidence_match(hamming(anchor, int(hashes[e.blob_id], 16)), e, t) for e, t in items
+            ],
+        })
+    groups.sort(key=lambda group: group["tasks"], reverse=True)
+    return {"index": phash_index.snapshot(), "groups": groups}
+
+
 # Update task
-@router.patch("/tasks/{task_id}", response_model=TaskRead)
+@router.patch("/tasks/{task_id}", response_model=TaskWithEvidenceRead)
 def update_task(task_id: str, title: str = None, description: str = None, status: str = None, session: Session = Depends(get_session), admin: User = Depends(admin_required)):
     task = session.get(Task, task_id)
     if not task:
@@ -628,6 +786,7 @@ def update_task(task_id: str, title: str = None, description: str = None, status
     session.add(task)
     session.commit()
     session.refresh(task)
+    publish_task("task.updated", task)
 
     log_action(session, performed_by=admin.id, action="updated_task", details=f"Updated task '{task.title}'")
     return task
@@ -704,9 +863,6 @@ def update_task(task_id: str, title: str = None, description: str = None, status
 #         "reason": reason
 #     }
 
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-UPLOADS_DIR = os.path.join(BASE_DIR, "..", "uploads")
-
 @router.post("/tasks/{task_id}/reset-task-status")
 def reset_task_status(
     task_id: str,
@@ -724,44 +880,34 @@ def reset_task_status(
     if not worker:
         raise HTTPException(status_code=404, detail="Assigned worker not found")
 
-    # 3️⃣ Delete attached evidences (images/files)
-    evidences = session.exec(select(TaskEvidence).where(TaskEvidence.task_id == task.id)).all()
-    for evidence in evidences:
-        try:
-            # Build full file path
-            full_path = os.path.join(UPLOADS_DIR, evidence.file_url)
-            if os.path.exists(full_path):
-                os.remove(full_path)
-
-            # Delete from DB
-            session.delete(evidence)
-
-            # Log deletion
-            log_action(
-                session,
-                performed_by=admin.id,
-                action="evidence_deleted",
-                details=f"Deleted evidence {evidence.file_url} for task '{task.title}'"
-            )
-        except Exception as file_err:
-            log_action(
-                session,
-                performed_by=admin.id,
-                action="evidence_deletion_failed",
-                details=f"Failed to delete evidence {evidence.file_url} | Error: {file_err}"
-            )
+    # 3️⃣ Delete attached evidences in one pass; files are removed in the background
+    evidence_count = session.exec(
+        select(func.count()).select_from(TaskEvidence).where(TaskEvidence.task_id == task.id)
+    ).one()
+    reclaim = delete_task_evidence(session, [task.id])
+    log_action(
+        session,
+        performed_by=admin.id,
+        action="evidence_deleted",
+        details=f"Deleted {evidence_count} evidence file(s) for task '{task.title}'",
+        commit=False,
+    )
 
-    # 4️⃣ Reset status to pending
+    # 4️⃣ Reset status to pending (same commit as the deletes)
     task.status = TaskStatus.pending
     session.add(task)
     session.commit()
     session.refresh(task)
+    schedule_reclaim(reclaim)
+    publish_task("task.reset", task, reason=reason)
 
     # 5️⃣ Notify worker via SMS
     sms_payload = {
         "phone_number": worker.phone_number,
         "message": f"Your task '{task.title}' has been reset by admin. Reason: {reason}. "
-                   f"Please work on it again."
+                   f"Please work on it again.",
+        "priority": "high",
+        "task_id": task.id
     }
 
     try:
@@ -817,46 +963,56 @@ def delete_task(
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
 
+    # Evidence rows go with the task; their files are reclaimed after the commit
+    reclaim = delete_task_evidence(session, [task.id])
     session.delete(task)
+    assigned_to = task.assigned_to
+    log_action(session, performed_by=admin.id, action="deleted_task", details=f"Task ID: {task_id}", commit=False)
     session.commit()
-
-    log_action(session, performed_by=admin.id, action="deleted_task", details=f"Task ID: {task_id}")
+    schedule_reclaim(reclaim)
+    bus.publish("task.deleted", worker=assigned_to, task_id=task_id)
 
     return {"detail": f"Task {task_id} deleted successfully"}
 
+# Columns of the merged complaint list (both complaint tables)
+ADMIN_COMPLAINT_FIELDS = ("id", "description", "category", "status", "evidence", "created_at")
+
+
 @router.get("/complaints/")
 def list_complaints(
+    request: Request,
+    fields: Optional[str] = FIELDS_QUERY,
     session: Session = Depends(get_session),
     admin: User = Depends(admin_required)
 ):
-    # Fetch from both tables
-    employee_complaints = session.exec(select(EmployeeComplaint)).all()
-    general_complaints = session.exec(select(Complaint)).all()
+    names = parse_fields(fields, ADMIN_COMPLAINT_FIELDS) or ADMIN_COMPLAINT_FIELDS
 
-    # Merge results into one list with normalized format
-    response = []
+    # Unchanged since the client's last poll → 304 without querying; the poll is still audited
+    etag = versions.etag("employeecomplaint", "complaint")
+    if cached := not_modified(request, etag):
+        log_action(session, performed_by=admin.id, action="viewed_complaints_list", details="Unchanged since last poll")
+        return cached
 
-    # Employee complaints
-    for c in employee_complaints:
-        response.append({
-            "id": str(c.id),
-            "description": c.description,
-            "category": None,                # no category in EmployeeComplaint
-            "status": c.status,
-            "evidence": None,                # Employee complaints don't have evidence
-            "created_at": c.submitted_at,    # use submitted_at for created time
-        })
-
-    # General complaints
-    for c in general_complaints:
-        response.append({
-            "id": str(c.id),
-            "description": c.description,
-            "category": c.category,
-            "status": c.status,
-            "evidence": c.evidence,          # evidence may be None
-            "created_at": c.submitted_at,    # use submitted_at
-        })
+    # Merge both tables into one list with normalized format; only the requested columns are read
+    response = []
+    sources = (
+        # Employee complaints: no category or evidence, submitted_at is the created time
+        {"id": EmployeeComplaint.id, "description": EmployeeComplaint.description,
+         "status": EmployeeComplaint.status, "created_at": EmployeeComplaint.submitted_at},
+        # General complaints
+        {"id": Complaint.id, "description": Complaint.description, "category": Complaint.category,
+         "status": Complaint.status, "evidence": Complaint.evidence, "created_at": Complaint.submitted_at},
+    )
+    for source in sources:
+        # At least one column, so a row comes back per complaint
+        selected = [source[name].label(name) for name in names if name in source] or [source["id"].label("id")]
+        if "evidence" in names and "evidence" in source:
+            selected.append(Complaint.evidence_blob_id.label("evidence_blob_id"))
+        for row in session.execute(select(*selected)).mappings():
+            item = {name: row.get(name) for name in names}
+            if item.get("evidence"):
+                item["evidence"] = evidence_url(row["evidence_blob_id"], item["evidence"])
+            response.append(item)
 
     # Log admin action
     log_action(
@@ -865,7 +1021,7 @@ def list_complaints(
         action="viewed_complaints_list"
     )
 
-    return response
+    return JSONResponse(jsonable_encoder(response), headers=cache_headers(etag))
 
 
 # # List complaints from both tables
@@ -935,6 +1091,10 @@ def update_complaint_status(
 
     session.commit()
     updated = emp_complaint or complaint
+    # Employee complaints also go to the worker who filed them
+    filed_by = session.get(User, emp_complaint.worker_id) if emp_complaint else None
+    bus.publish("complaint.updated", worker=filed_by.username if filed_by else None,
+                complaint_id=complaint_id, status=status, table=updated.__class__.__name__)
 
     log_action(
         session,
@@ -947,7 +1107,41 @@ def update_complaint_status(
 
 
 # Optional: View audit logs
-@router.get("/audit-logs/", response_model=List[AuditLog])
-def view_audit_logs(session: Session = Depends(get_session), admin: User = Depends(admin_required)):
-    logs = session.exec(select(AuditLog)).all()
-    return logs
\ No newline at end of file
+@router.get("/audit-logs/", response_model=List[AuditLogRead])
+def view_audit_logs(
+    fields: Optional[str] = FIELDS_QUERY,
+    session: Session = Depends(get_session),
+    admin: User = Depends(admin_required)
+):
+    names = schema_fields(AuditLogRead, fields)
+    # Plain rows, not ORM objects: no identity map / instance state for every log entry
+    if names is None:
+        logs = session.execute(select(AuditLog.__table__)).all()
+        return AUDIT_LOG_LIST.response(logs)
+    logs = session.execute(select(*columns(AuditLog, names))).all()
+    return subset_list(AuditLogRead, names).response(logs)
+
+
+# Response cache hit ratio and memory use
+@router.get("/maintenance/cache")
+def cache_status(admin: User = Depends(admin_required)):
+    return cache.stats()
+
+
+# Reclaim storage held by dead evidence (also runs periodically in the background)
+@router.get("/maintenance/evidence-gc")
+def evidence_gc_status(admin: User = Depends(admin_required)):
+    return evidence_gc_snapshot()
+
+
+@router.post("/maintenance/evidence-gc")
+def run_evidence_gc(dry_run: bool = True, session: Session = Depends(get_session), admin: User = Depends(admin_required)):
+    report = collect_garbage(dry_run=dry_run)
+    if not dry_run:
+        log_action(
+            session,
+            performed_by=admin.id,
+            action="evidence_gc",
+            details=f"Reclaimed {report['files_reclaimed']} file(s), {report['bytes_reclaimed']} bytes",
+        )
+    return report
@@ -0,0 +1,408 @@
+import csv
+import io
+import logging
+import os
+import uuid
+from datetime import datetime
+from typing import List
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from sqlalchemy import insert, or_
+from sqlmodel import Session, select
+from core.database import get_session
+from models.audit_log import AuditLog
+from models.complaints import Complaint, ComplaintStatus
+from models.employee_complaint import EmployeeComplaint
+from models.task import Task, TaskStatus
+from models.user import User, UserRole, UserStatus
+from routes.admin import normalize_phone_number
+from routes.sms import PRIORITY_HIGH, PRIORITY_LOW, notification_buffer
+from schemas.bulk import (
+    BulkComplaintResponse, BulkComplaintStatus, BulkTaskCreate, BulkTaskResponse, BulkTaskUpdate,
+    BulkWorkerCreate, BulkWorkerResponse,
+)
+from schemas.tasks import TaskRead
+from utils.event_bus import bus, publish_task
+from utils.event_buffer import BufferFull
+from utils.idempotency import Idempotency, idempotency
+from utils.security import admin_required, hash_passwords
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["Admin"])
+
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "1000"))
+
+ACTIVE_STATUSES = [TaskStatus.pending, TaskStatus.in_progress]
+TASK_STATUSES = {status.value for status in TaskStatus}
+COMPLAINT_STATUSES = {status.value for status in ComplaintStatus}
+
+
+def _check_size(items: list):
+    if not items:
+        raise HTTPException(status_code=400, detail="No items given")
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ITEMS} items per request")
+
+
+def _failed(index: int, status_code: int, detail: str) -> dict:
+    return {"index": index, "ok": False, "status_code": status_code, "detail": detail}
+
+
+def _audit(admin: User, action: str, details: str) -> dict:
+    return {"id": uuid.uuid4(), "action": action, "details": details, "user_id": admin.id,
+            "created_at": datetime.utcnow()}
+
+
+def _summary(results: list) -> dict:
+    succeeded = sum(result["ok"] for result in results)
+    return {"succeeded": succeeded, "failed": len(results) - succeeded, "results": results}
+
+
+# Onboard many workers in one transaction
+def _import_workers(items: List[BulkWorkerCreate], dry_run: bool, session: Session, admin: User) -> dict:
+    """
+    add_worker for every item: phone numbers normalized and checked in one
+    pass, one query for existing usernames / phone numbers, passwords hashed
+    in the process pool, one INSERT. Verification SMS are queued instead of
+    sent inline, so a row isn't rejected for an SMS failure; the outcome shows
+    up in the audit log.
+    """
+    _check_size(items)
+
+    # 1️⃣ Normalize and check each row, and against the rest of the file
+    results, candidates, names, phones = [], [], set(), set()
+    for index, item in enumerate(items):
+        username = item.username.strip()
+        if not username or not item.password:
+            results.append({**_failed(index, 400, "Username and password are required"), "username": username})
+            continue
+        try:
+            phone_number = normalize_phone_number(item.phone_number)
+        except HTTPException as e:
+            results.append({**_failed(index, e.status_code, e.detail), "username": username})
+            continue
+        if username in names:
+            results.append({**_failed(index, 400, "Username appears more than once in this import"), "username": username})
+            continue
+        if phone_number in phones:
+            results.append({**_failed(index, 400, "Phone number appears more than once in this import"), "username": username})
+            continue
+        names.add(username)
+        phones.add(phone_number)
+        candidates.append((index, username, phone_number, item.password))
+
+    # 2️⃣ One query for usernames and phone numbers that are already taken
+    taken_names, taken_phones = set(), set()
+    if candidates:
+        for name, phone in session.exec(
+            select(User.username, User.phone_number).where(or_(User.username.in_(names), User.phone_number.in_(phones)))
+        ).all():
+            taken_names.add(name)
+            taken_phones.add(phone)
+
+    accepted = []
+    for index, username, phone_number, password in candidates:
+        if username in taken_names:
+            results.append({**_failed(index, 400, "Username already exists"), "username": username})
+        elif phone_number in taken_phones:
+            results.append({**_failed(index, 400, "Phone number already exists"), "username": username})
+        else:
+            accepted.append((index, username, phone_number, password))
+
+    if dry_run:
+        for index, username, phone_number, _ in accepted:
+            results.append({"index": index, "ok": True, "status_code": 200, "username": username,
+                            "phone_number": phone_number})
+        results.sort(key=lambda result: result["index"])
+        return {**_summary(results), "dry_run": True}
+
+    # 3️⃣ bcrypt in parallel, then one INSERT for the users and one for their audit entries
+    hashes = hash_passwords([password for *_, password in accepted])
+    now = datetime.now()
+    rows, logs = [], []
+    for (index, username, phone_number, _), password_hash in zip(accepted, hashes):
+        rows.append({
+            "id": uuid.uuid4(), "username": username, "password_hash": password_hash, "phone_number": phone_number,
+            "role": UserRole.worker, "status": UserStatus.active, "created_at": now, "updated_at": now,
+        })
+        logs.append(_audit(admin, "created_worker", f"Worker '{username}' ({phone_number}) created by bulk import"))
+    if rows:
+        session.execute(insert(User), rows)
+        session.execute(insert(AuditLog), logs)
+        session.commit()
+
+    # 4️⃣ Verification SMS in the background, low-priority lane like add_worker's
+    queued = 0
+    for (index, username, phone_number, _), row in zip(accepted, rows):
+        result = {"index": index, "ok": True, "status_code": 200, "username": username,
+                  "phone_number": phone_number, "worker_id": str(row["id"])}
+        try:
+            notification_buffer.add({
+                "idempotency_key": f"worker-verification-{row['id']}",
+                "phone_number": phone_number,
+                "message": f"Hello {username}, this is a verification test for your registration.",
+                "priority": PRIORITY_LOW,
+                "task_id": None,
+                "about": "phone verification",
+                "username": username,
+                "performed_by": admin.id,
+            })
+            result["verification"] = "queued"
+            queued += 1
+        except BufferFull:
+            result["verification"] = "dropped"
+            logger.warning("Notification buffer full, no verification SMS for %s", username)
+        results.append(result)
+
+    results.sort(key=lambda result: result["index"])
+    return {**_summary(results), "verifications_queued": queued}
+
+
+@router.post("/workers", response_model=BulkWorkerResponse)
+def bulk_import_workers(
+    items: List[BulkWorkerCreate],
+    dry_run: bool = False,
+    session: Session = Depends(get_session),
+    admin: User = Depends(admin_required),
+    idem: Idempotency = Depends(idempotency)
+):
+    """
+    Import workers from a JSON array of {username, password, phone_number}.
+    With dry_run=true the rows are only validated.
+    """
+    replayed = idem.replay()
+    if replayed:
+        return replayed
+    return idem.save(_import_workers(items, dry_run, session, admin))
+
+
+@router.post("/workers/csv", response_model=BulkWorkerResponse)
+def bulk_import_workers_csv(
+    file: UploadFile = File(...),
+    dry_run: bool = False,
+    session: Session = Depends(get_session),
+    admin: User = Depends(admin_required),
+    idem: Idempotency = Depends(idempotency)
+):
+    """
+    Import workers from a CSV file with a header row containing username,
+    password and phone_number (other columns are ignored). Result indexes
+    count data rows from 0.
+    """
+    replayed = idem.replay()
+    if replayed:
+        return replayed
+    try:
+        text = file.file.read().decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV must be UTF-8 encoded")
+
+    reader = csv.DictReader(io.StringIO(text))
+    header = {(name or "").strip().lower(): name for name in reader.fieldnames or []}
+    missing = [name for name in BulkWorkerCreate.model_fields if name not in header]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"CSV is missing column(s): {', '.join(missing)}")
+    # Cells are trimmed, except passwords: spaces in those are deliberate
+    items = [
+        BulkWorkerCreate(
+            username=(row.get(header["username"]) or "").strip(),
+            password=row.get(header["password"]) or "",
+            phone_number=(row.get(header["phone_number"]) or "").strip(),
+        )
+        for row in reader
+    ]
+    return idem.save(_import_workers(items, dry_run, session, admin))
+
+
+# Create many tasks in one transaction
+@router.post("/tasks", response_model=BulkTaskResponse)
+def bulk_create_tasks(
+    items: List[BulkTaskCreate],
+    session: Session = Depends(get_session),
+    admin: User = Depends(admin_required),
+    idem: Idempotency = Depends(idempotency)
+):
+    """
+    Same checks as POST /admin/tasks/ for every item, but with one query for
+    all workers and one for their active tasks. Valid items are inserted in a
+    single transaction; invalid ones are reported per item and skipped.
+    Assignment SMS are queued and sent in the background.
+    """
+    # Retried request with the same Idempotency-Key → original response, no new tasks/SMS
+    replayed = idem.replay()
+    if replayed:
+        return replayed
+    _check_size(items)
+
+    # 1️⃣ All referenced users and 2️⃣ which of them already have an active task
+    usernames = {item.assigned_to for item in items}
+    users = {u.username: u for u in session.exec(select(User).where(User.username.in_(usernames))).all()}
+    busy = set(session.exec(
+        select(Task.assigned_to).where(Task.assigned_to.in_(usernames), Task.status.in_(ACTIVE_STATUSES)).distinct()
+    ).all())
+
+    now = datetime.utcnow()
+    results, rows, logs = [], [], []
+    for index, item in enumerate(items):
+        worker = users.get(item.assigned_to)
+        if not worker:
+            results.append(_failed(index, 404, "Assigned worker not found"))
+            continue
+        if worker.role != UserRole.worker:
+            results.append(_failed(index, 400, "Assigned user is not a worker"))
+            continue
+        if item.assigned_to in busy:
+            results.append(_failed(index, 400, f"Worker '{item.assigned_to}' already has an active task"))
+            continue
+        # A second item for the same worker in this batch would be their second active task
+        busy.add(item.assigned_to)
+        row = {
+            "id": str(uuid.uuid4()), "title": item.title, "description": item.description,
+            "status": TaskStatus.pending, "assigned_to": item.assigned_to, "assigned_by": str(admin.username),
+            "created_at": now, "updated_at": now,
+        }
+        rows.append(row)
+        logs.append(_audit(admin, "created_task", f"Task '{item.title}' assigned to {item.assigned_to}"))
+        results.append({"index": index, "ok": True, "status_code": 200, "task": TaskRead.model_validate(row)})
+
+    # ✅ One multi-row INSERT for the tasks and one for their audit entries, one commit
+    if rows:
+        session.execute(insert(Task), rows)
+        session.execute(insert(AuditLog), logs)
+        session.commit()
+
+    # ✅ Events and SMS only for what was committed
+    queued = 0
+    for result in results:
+        task = result.get("task")
+        if task is None:
+            continue
+        publish_task("task.created", task)
+        try:
+            notification_buffer.add({
+                "idempotency_key": f"task-assigned-{task.id}",
+                "phone_number": users[task.assigned_to].phone_number,
+                "message": f"You have been assigned a new task: {task.title}",
+                "priority": PRIORITY_HIGH,
+                "task_id": task.id,
+                "about": f"task '{task.title}'",
+                "username": task.assigned_to,
+                "performed_by": admin.id,
+            })
+            result["notification"] = "queued"
+            queued += 1
+        except BufferFull:
+            result["notification"] = "dropped"
+            logger.warning("Notification buffer full, no assignment SMS for task %s", task.id)
+
+    return idem.save({**_summary(results), "notifications_queued": queued})
+
+
+# Update many tasks in one transaction
+@router.patch("/tasks", response_model=BulkTaskResponse)
+def bulk_update_tasks(
+    items: List[BulkTaskUpdate],
+    session: Session = Depends(get_session),
+    admin: User = Depends(admin_required)
+):
+    """
+    PATCH /admin/tasks/{task_id} for many tasks: one query loads them all and
+    every change is written in a single transaction. Fields left out (or
+    empty) are not changed.
+    """
+    _check_size(items)
+    ids = {item.task_id for item in items}
+    tasks = {t.id: t for t in session.exec(select(Task).where(Task.id.in_(ids))).all()}
+
+    results, updated, logs, seen = [], [], [], set()
+    for index, item in enumerate(items):
+        task = tasks.get(item.task_id)
+        if not task:
+            results.append(_failed(index, 404, "Task not found"))
+            continue
+        if item.task_id in seen:
+            results.append(_failed(index, 400, "Task appears more than once in this request"))
+            continue
+        if item.status and item.status not in TASK_STATUSES:
+            results.append(_failed(index, 400, "Invalid status"))
+            continue
+        seen.add(item.task_id)
+        if item.title: task.title = item.title
+        if item.description: task.description = item.description
+        if item.status: task.status = TaskStatus(item.status)
+        updated.append((index, task))
+        logs.append(_audit(admin, "updated_task", f"Updated task '{task.title}'"))
+
+    if updated:
+        session.flush()
+        # Snapshot before the commit expires the rows
+        snapshots = {index: TaskRead.model_validate(task) for index, task in updated}
+        session.execute(insert(AuditLog), logs)
+        session.commit()
+        for index, task in snapshots.items():
+            results.append({"index": index, "ok": True, "status_code": 200, "task": task})
+            publish_task("task.updated", task)
+
+    results.sort(key=lambda result: result["index"])
+    return _summary(results)
+
+
+# Set the status of many complaints (either table) in one transaction
+@router.patch("/complaints/status", response_model=BulkComplaintResponse)
+def bulk_update_complaint_status(
+    items: List[BulkComplaintStatus],
+    session: Session = Depends(get_session),
+    admin: User = Depends(admin_required)
+):
+    _check_size(items)
+
+    results, ids = [], {}
+    for index, item in enumerate(items):
+        try:
+            ids[index] = uuid.UUID(item.complaint_id)
+        except ValueError:
+            results.append(_failed(index, 400, "Invalid complaint ID"))
+            continue
+        if item.status not in COMPLAINT_STATUSES:
+            del ids[index]
+            results.append(_failed(index, 400, "Invalid status"))
+
+    # One query per table for every id
+    wanted = set(ids.values())
+    employee = {c.id: c for c in session.exec(select(EmployeeComplaint).where(EmployeeComplaint.id.in_(wanted))).all()}
+    general = {c.id: c for c in session.exec(select(Complaint).where(Complaint.id.in_(wanted))).all()}
+    filers = {u.id: u.username for u in session.exec(
+        select(User).where(User.id.in_({c.worker_id for c in employee.values()}))
+    ).all()}
+
+    changed, logs = [], []
+    for index, complaint_id in ids.items():
+        status = items[index].status
+        found = [c for c in (employee.get(complaint_id), general.get(complaint_id)) if c]
+        if not found:
+            results.append(_failed(index, 404, "Complaint not found in either table"))
+            continue
+        # Update whichever exists
+        for complaint in found:
+            complaint.status = status
+        updated = found[0]
+        changed.append((index, updated))
+        logs.append(_audit(admin, "updated_complaint_status", f"Complaint {items[index].complaint_id} set to {status}"))
+
+    if changed:
+        session.flush()
+        published = []
+        for index, updated in changed:
+            table = updated.__class__.__name__
+            worker = filers.get(updated.worker_id) if isinstance(updated, EmployeeComplaint) else None
+            status = items[index].status
+            results.append({"index": index, "ok": True, "status_code": 200, "id": str(updated.id),
+                            "status": status, "table": table})
+            published.append((worker, str(updated.id), status, table))
+        session.execute(insert(AuditLog), logs)
+        session.commit()
+        for worker, complaint_id, status, table in published:
+            bus.publish("complaint.updated", worker=worker, complaint_id=complaint_id, status=status, table=table)
+
+    results.sort(key=lambda result: result["index"])
+    return _summary(results)
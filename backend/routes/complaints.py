@@ -1,12 +1,20 @@
 import uuid
 import os
-import aiofiles
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, UploadFile, File, Form
 from sqlmodel import Session, select
 from core.database import get_session
 from models.complaints import Complaint, ComplaintStatus, ComplaintCategory
 from schemas.complaints import ComplaintRead
+from sqlalchemy.orm import selectinload
+from utils.serialization import COMPLAINT_LIST
+from utils.cache import CACHE_COMPLAINTS_TTL, cache
+from utils.change_versions import cache_headers, not_modified, versions
+from utils.event_bus import bus
+from utils.idempotency import Idempotency, idempotency
+from utils.uploads import sniff_image_type
+from utils.blob_store import discard_blobs, store_upload, take_blob_refs
+from utils.image_variants import schedule_variants
 
 UPLOAD_DIR = "uploads/complaints"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
@@ -22,55 +30,77 @@ async def create_complaint(
     location: str | None = Form(None),
     file: UploadFile | None = File(None),
     session: Session = Depends(get_session),
+    idem: Idempotency = Depends(idempotency),
 ):
-    file_path: str | None = None
+    # Retried submission with the same Idempotency-Key → original complaint, no duplicate row/file
+    replayed = idem.replay()
+    if replayed:
+        return replayed
+
+    stored = None
 
     if file:
-        # ✅ Check MIME type
-        if file.content_type not in ALLOWED_IMAGE_TYPES:
+        # ✅ Check the real type from the file's magic bytes
+        sniffed = await sniff_image_type(file)
+        if sniffed not in ALLOWED_IMAGE_TYPES:
             raise HTTPException(
                 status_code=400,
                 detail=f"Invalid file type: {file.content_type}. Only images are allowed.",
             )
 
-        # Save file asynchronously
+        # Stream into the content-addressed store (duplicates only bump a ref count)
         try:
-            file_ext = os.path.splitext(file.filename)[1]
-            saved_filename = f"{uuid.uuid4()}{file_ext}"
-            file_path = os.path.join(UPLOAD_DIR, saved_filename)
-
-            import aiofiles
-            async with aiofiles.open(file_path, "wb") as out_file:
-                content = await file.read()
-                await out_file.write(content)
+            stored = await store_upload(file, session, content_type=sniffed)
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
 
-    complaint = Complaint(
-        description=description,
-        category=category,
-        location=location,
-        evidence=file_path,
-        status=ComplaintStatus.pending,
-    )
-
     try:
+        # The blob reference is taken right before the commit, with no await in between
+        if stored:
+            take_blob_refs(session, [stored])
+        complaint = Complaint(
+            description=description,
+            category=category,
+            location=location,
+            evidence=stored.path if stored else None,
+            evidence_blob_id=stored.sha256 if stored else None,
+            status=ComplaintStatus.pending,
+        )
         session.add(complaint)
         session.commit()
         session.refresh(complaint)
     except Exception as e:
         session.rollback()
+        if stored:
+            discard_blobs([stored])
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
-    return complaint
+    if stored and stored.created:
+        schedule_variants(stored.sha256, stored.path)
+
+    body = ComplaintRead.model_validate(complaint)
+    bus.publish("complaint.created", complaint=body.model_dump(mode="json"), table="Complaint")
+    return idem.save(body)
 
 @router.get("/", response_model=List[ComplaintRead])
-def list_complaints(session: Session = Depends(get_session)):
+def list_complaints(request: Request, session: Session = Depends(get_session)):
     """
-    Retrieve all complaints.
+    Retrieve all complaints. Answers 304 when nothing changed since the client's ETag,
+    and serves the body from the cache until a complaint changes.
     """
-    complaints = session.exec(select(Complaint)).all()
-    return complaints
+    tags = ("complaint", "evidenceblob")
+    etag = versions.etag(*tags)
+    if cached := not_modified(request, etag):
+        return cached
+
+    def load() -> bytes:
+        complaints = session.exec(select(Complaint).options(selectinload(Complaint.evidence_blob))).all()
+        return COMPLAINT_LIST.dump(complaints)
+
+    body = cache.fetch("complaints", load, CACHE_COMPLAINTS_TTL, tags=tags)
+    return Response(content=body, media_type="application/json", headers=cache_headers(etag))
 
 @router.get("/{complaint_id}", response_model=ComplaintRead)
 def get_complaint_by_id(
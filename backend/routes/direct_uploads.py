@@ -0,0 +1,185 @@
+import re
+import os
+import time
+import uuid
+import asyncio
+from typing import List
+from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException
+from jose import jwt
+from pydantic import BaseModel
+from sqlmodel import Session
+from core.database import get_session
+from models.task import Task
+from models.user import User
+from routes.worker import ALLOWED_IMAGE_TYPES, record_evidence
+from utils.blob_store import BLOB_TMP_DIR, blob_path, discard_blobs, existing_blob_path, take_blob_refs
+from utils.idempotency import Idempotency, idempotency
+from utils.security import ALGORITHM, SECRET_KEY, decode_token, get_current_user
+from utils.storage import S3_PRESIGN_EXPIRY, get_storage
+from utils.uploads import MAX_UPLOAD_FILE_BYTES, StoredUpload, image_type_of
+
+# Direct-to-storage evidence uploads (object storage backends only):
+#   1. POST /worker/tasks/{task_id}/direct-uploads   → presigned PUT per file + upload_token
+#   2. client PUTs each file straight to the bucket, to a staging key of its own
+#   3. POST /worker/direct-uploads/complete           → verified, attached, task completed
+# The API only ever sees metadata; the bytes go from the phone to the bucket.
+# Every file is uploaded, even when its blob is already stored: the presigned PUT
+# carries the SHA-256, so a staged object proves the client has the bytes. Blob
+# hashes are visible in evidence URLs; knowing one must not be enough to attach it.
+
+router = APIRouter(tags=["Worker"])
+
+MAX_DIRECT_UPLOAD_FILES = int(os.getenv("MAX_DIRECT_UPLOAD_FILES", "10"))
+SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class DirectUploadFile(BaseModel):
+    filename: str
+    content_type: str
+    size: int
+    sha256: str
+
+
+class DirectUploadRequest(BaseModel):
+    files: List[DirectUploadFile]
+
+
+class DirectUploadComplete(BaseModel):
+    upload_token: str
+
+
+@router.post("/tasks/{task_id}/direct-uploads")
+def create_direct_uploads(
+    task_id: str,
+    payload: DirectUploadRequest,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Hand out presigned upload URLs for evidence the client has already hashed.
+    Each file goes to its own staging key; completion moves new blobs into place
+    and drops the staged copy of bytes that are already stored.
+    """
+    storage = get_storage()
+    if storage.is_local:
+        raise HTTPException(400, "Direct uploads need object storage; use POST /worker/tasks/{task_id}/evidence")
+
+    task = session.get(Task, task_id)
+    if not task:
+        raise HTTPException(404, "Task not found")
+    if task.assigned_to != current_user.username:
+        raise HTTPException(403, "Not your task")
+    if not payload.files:
+        raise HTTPException(400, "At least one evidence photo is required")
+    if len(payload.files) > MAX_DIRECT_UPLOAD_FILES:
+        raise HTTPException(400, f"At most {MAX_DIRECT_UPLOAD_FILES} files per upload")
+
+    files, token_files = [], []
+    for f in payload.files:
+        sha256 = f.sha256.lower()
+        if not SHA256_RE.match(sha256):
+            raise HTTPException(422, f"Invalid sha256 for '{f.filename}'")
+        if f.content_type not in ALLOWED_IMAGE_TYPES:
+            raise HTTPException(400, f"Invalid file type for '{f.filename}': only JPEG, PNG and GIF images are allowed")
+        if not 0 < f.size <= MAX_UPLOAD_FILE_BYTES:
+            raise HTTPException(413, f"File '{f.filename}' exceeds the limit of {MAX_UPLOAD_FILE_BYTES} bytes")
+
+        key = blob_path(sha256, os.path.splitext(f.filename)[1]).replace(os.sep, "/")
+        # Under the blob store's tmp dir, so the periodic GC removes staged files nobody completed
+        staging = os.path.join(BLOB_TMP_DIR, "direct", str(uuid.uuid4())).replace(os.sep, "/")
+        upload = storage.presigned_put(staging, f.content_type, f.size, sha256)
+        files.append({"sha256": sha256, "key": key, "upload": upload})
+        token_files.append({"sha256": sha256, "key": key, "staging": staging, "size": f.size,
+                            "content_type": f.content_type})
+
+    # Everything needed to finish is signed into the token, so any API node can complete it
+    upload_token = jwt.encode(
+        {
+            "type": "direct_upload",
+            "user_id": str(current_user.id),
+            "task_id": task.id,
+            "files": token_files,
+            "exp": datetime.utcnow() + timedelta(seconds=S3_PRESIGN_EXPIRY * 2),
+        },
+        SECRET_KEY,
+        algorithm=ALGORITHM,
+    )
+    return {"upload_token": upload_token, "expires_in": S3_PRESIGN_EXPIRY, "files": files}
+
+
+@router.post("/direct-uploads/complete")
+async def complete_direct_uploads(
+    payload: DirectUploadComplete,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+    idem: Idempotency = Depends(idempotency),
+):
+    """
+    Confirm that every file was uploaded to its staging key (size and image type
+    checked; S3 verified the SHA-256 on PUT), then attach them like a regular
+    upload. All storage calls happen before the blob references are taken, so
+    the write transaction never waits on the bucket.
+    """
+    replayed = idem.replay()
+    if replayed:
+        return replayed
+
+    started = time.perf_counter()
+    claims = decode_token(payload.upload_token)
+    if not claims or claims.get("type") != "direct_upload" or claims.get("user_id") != str(current_user.id):
+        raise HTTPException(400, "Invalid or expired upload token")
+
+    task = session.get(Task, claims["task_id"])
+    if not task:
+        raise HTTPException(404, "Task not found")
+    if task.assigned_to != current_user.username:
+        raise HTTPException(403, "Not your task")
+
+    # 1️⃣ Every staged file is there, complete, and really an image
+    storage = get_storage()
+    files = claims["files"]
+    sizes = await asyncio.gather(*(asyncio.to_thread(storage.size, f["staging"]) for f in files))
+    for f, size in zip(files, sizes):
+        if size is None:
+            raise HTTPException(409, f"File {f['sha256'][:12]} has not been uploaded yet")
+        if size != f["size"]:
+            raise HTTPException(409, f"File {f['sha256'][:12]} has {size} bytes, expected {f['size']}")
+    # Same magic-byte check as multipart uploads, on the first bytes only
+    heads = await asyncio.gather(*(asyncio.to_thread(storage.read_head, f["staging"], 16) for f in files))
+    for f, head in zip(files, heads):
+        if image_type_of(head) != f["content_type"]:
+            await asyncio.gather(*(asyncio.to_thread(storage.delete, f["staging"]) for f in files))
+            raise HTTPException(400, f"File {f['sha256'][:12]} is not a valid {f['content_type']} image")
+
+    # 2️⃣ New bytes move into place once per hash; staged copies of stored blobs are dropped
+    stored_files, placed = [], {}
+    try:
+        for f in files:
+            if f["sha256"] in placed:
+                await asyncio.to_thread(storage.delete, f["staging"])
+                first = placed[f["sha256"]]
+                stored_files.append(StoredUpload(path=first.path, sha256=first.sha256, size=first.size, created=False,
+                                                 content_type=f["content_type"]))
+                continue
+            path = existing_blob_path(session, f["sha256"]) or f["key"]
+            created = not await asyncio.to_thread(storage.exists, path)
+            if created:
+                await asyncio.to_thread(storage.move, f["staging"], path)
+            else:
+                await asyncio.to_thread(storage.delete, f["staging"])
+            placed[f["sha256"]] = StoredUpload(path=path, sha256=f["sha256"], size=f["size"], created=created,
+                                               content_type=f["content_type"])
+            stored_files.append(placed[f["sha256"]])
+    except Exception:
+        discard_blobs(list(placed.values()))
+        raise
+
+    # 3️⃣ References + evidence rows + task completion in one short transaction (no await from here)
+    try:
+        take_blob_refs(session, stored_files)
+    except Exception:
+        session.rollback()
+        discard_blobs(stored_files)
+        raise
+    return idem.save(record_evidence(task, stored_files, session, current_user, started))
@@ -0,0 +1,116 @@
+import asyncio
+import json
+import os
+import time
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, WebSocket, status
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session
+from core.database import engine
+from models.user import User, UserRole
+from utils.event_bus import HEARTBEAT, Subscriber, bus
+from utils.security import admin_required, user_from_access_token
+
+router = APIRouter(tags=["Events"])
+
+EVENT_HEARTBEAT_SECONDS = float(os.getenv("EVENT_HEARTBEAT_SECONDS", "20"))
+EVENT_SEND_TIMEOUT = float(os.getenv("EVENT_SEND_TIMEOUT", "10"))  # a client this slow to read is dropped
+# uvicorn waits for open responses before shutting down; ending SSE streams now and then
+# (EventSource reconnects with Last-Event-ID, nothing is missed) keeps that wait bounded
+EVENT_STREAM_MAX_SECONDS = float(os.getenv("EVENT_STREAM_MAX_SECONDS", "300"))
+
+
+def _authenticate(token: Optional[str]) -> User:
+    # Browsers can't set headers on EventSource/WebSocket, so the token may come as ?token=
+    if not token:
+        raise HTTPException(status_code=401, detail="Missing access token")
+    with Session(engine) as session:
+        return user_from_access_token(token, session)
+
+
+def _bearer(request_headers, token: Optional[str]) -> Optional[str]:
+    scheme, _, credentials = request_headers.get("authorization", "").partition(" ")
+    return credentials if scheme.lower() == "bearer" and credentials else token
+
+
+def _subscribe(user: User, last_event_id) -> Subscriber:
+    try:
+        resume_from = int(last_event_id) if last_event_id is not None and last_event_id != "" else None
+    except ValueError:
+        resume_from = None
+    return bus.subscribe(user.username, user.role == UserRole.admin, resume_from)
+
+
+@router.get("/stream")
+async def event_stream(request: Request, token: Optional[str] = None, last_event_id: Optional[int] = None):
+    """
+    Server-Sent Events: task and complaint changes for the caller (admins get
+    everything, workers their own tasks). Resumes after Last-Event-ID; a
+    "resync" event means events were missed and lists should be refetched.
+    """
+    user = _authenticate(_bearer(request.headers, token))
+    resume_from = request.headers.get("last-event-id") or last_event_id
+
+    async def frames():
+        # Subscribed inside the generator so the finally always pairs with it
+        sub = _subscribe(user, resume_from)
+        deadline = time.monotonic() + EVENT_STREAM_MAX_SECONDS
+        try:
+            yield "retry: 3000\n\n"
+            async for event in sub.events(min(EVENT_HEARTBEAT_SECONDS, EVENT_STREAM_MAX_SECONDS)):
+                if event is HEARTBEAT:
+                    # Comment line: keeps proxies from closing an idle stream
+                    yield ": ping\n\n"
+                else:
+                    yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+                if time.monotonic() >= deadline:
+                    return
+        finally:
+            bus.unsubscribe(sub)
+
+    return StreamingResponse(
+        frames(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/ws")
+async def event_socket(websocket: WebSocket, token: Optional[str] = None, last_event_id: Optional[int] = None):
+    """
+    WebSocket carrying the same events as /events/stream, as JSON text
+    messages, plus {"type": "ping"} heartbeats. Client messages are ignored.
+    """
+    try:
+        user = _authenticate(_bearer(websocket.headers, token))
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+    sub = _subscribe(user, last_event_id)
+
+    async def send():
+        async for event in sub.events(EVENT_HEARTBEAT_SECONDS):
+            # A client that stops reading fills the socket buffer; give up on it instead of waiting forever
+            await asyncio.wait_for(websocket.send_text(json.dumps(event)), EVENT_SEND_TIMEOUT)
+        await websocket.close(code=status.WS_1001_GOING_AWAY)
+
+    async def receive():
+        # Drains client frames so a disconnect is noticed even while no events flow
+        while True:
+            await websocket.receive_text()
+
+    sender = asyncio.create_task(send())
+    receiver = asyncio.create_task(receive())
+    try:
+        await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for job in (sender, receiver):
+            job.cancel()
+        await asyncio.gather(sender, receiver, return_exceptions=True)
+        bus.unsubscribe(sub)
+
+
+@router.get("/stats")
+def event_stats(admin: User = Depends(admin_required)):
+    return bus.snapshot()
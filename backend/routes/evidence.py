@@ -0,0 +1,159 @@
+import mimetypes
+import os
+import uuid
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import FileResponse, RedirectResponse
+from sqlmodel import Session, select
+from core.database import get_session
+from models.complaints import Complaint
+from models.evidence_blob import EvidenceBlob
+from models.task import Task, TaskEvidence
+from models.user import User
+from utils.security import decode_token
+from utils.storage import S3_PRESIGN_EXPIRY, get_storage
+
+router = APIRouter(tags=["Evidence"])
+
+# --- Config ---
+# "" → stream from Python (FileResponse: sendfile/pathsend when the server supports it)
+# "nginx" → X-Accel-Redirect to EVIDENCE_ACCEL_PREFIX + relative path, e.g.
+#     location /protected-uploads/ { internal; alias /srv/field-worker/backend/uploads/; }
+# "sendfile" → X-Sendfile with the absolute path (Apache mod_xsendfile, lighttpd)
+EVIDENCE_OFFLOAD = os.getenv("EVIDENCE_OFFLOAD", "").lower()
+EVIDENCE_ACCEL_PREFIX = os.getenv("EVIDENCE_ACCEL_PREFIX", "/protected-uploads/")
+EVIDENCE_MAX_AGE = int(os.getenv("EVIDENCE_MAX_AGE", str(365 * 24 * 3600)))
+
+VARIANTS = ("original", "thumbnail", "web")
+
+
+def _current_user(request: Request, session: Session) -> User:
+    """
+    Resolve the user from the Authorization header, or from `access_token` in the
+    query string so plain <img src> tags can load evidence.
+    """
+    token = request.query_params.get("access_token")
+    auth = request.headers.get("Authorization", "")
+    if auth.startswith("Bearer "):
+        token = auth[len("Bearer "):]
+    payload = decode_token(token) if token else None
+    if not payload or payload.get("type") != "access":
+        raise HTTPException(status_code=401, detail="Invalid or expired access token")
+    try:
+        user = session.get(User, uuid.UUID(payload.get("user_id", "")))
+    except ValueError:
+        raise HTTPException(status_code=401, detail="Invalid user ID in token")
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    return user
+
+
+def _can_view(session: Session, user: User, blob_id: str) -> bool:
+    """
+    Admins see everything; workers see evidence attached to their own tasks.
+    Complaint photos are admin-only by design: complaints are filed without an
+    account, so there is no filer to authorize, and they are usually about a
+    worker, who must not see them.
+    """
+    if user.role == "admin":
+        return True
+    # Workers may see evidence attached to their own tasks
+    owned = session.exec(
+        select(TaskEvidence.id)
+        .join(Task, Task.id == TaskEvidence.task_id)
+        .where(TaskEvidence.blob_id == blob_id, Task.assigned_to == user.username)
+        .limit(1)
+    ).first()
+    return owned is not None
+
+
+def _can_view_legacy(session: Session, user: User, paths: list[str]) -> bool:
+    """
+    Same rules as _can_view, for files referenced by path only. A path no row
+    points at is never served, so this can't be used to read arbitrary files.
+    """
+    owned = select(TaskEvidence.id).join(Task, Task.id == TaskEvidence.task_id).where(TaskEvidence.file_url.in_(paths))
+    if user.role != "admin":
+        return session.exec(owned.where(Task.assigned_to == user.username).limit(1)).first() is not None
+    if session.exec(owned.limit(1)).first() is not None:
+        return True
+    return session.exec(select(Complaint.id).where(Complaint.evidence.in_(paths)).limit(1)).first() is not None
+
+
+@router.get("/legacy/{path:path}")
+def get_legacy_evidence(path: str, request: Request, session: Session = Depends(get_session)):
+    """
+    Serve an evidence file stored before the blob store, by its uploads/ path,
+    until migrate_evidence_blobs.py has moved it. Such files are always on
+    local disk.
+    """
+    user = _current_user(request, session)
+    # Rows keep the path as written, with the OS separator of the time
+    paths = list({path, path.replace("/", os.sep)})
+    full_path = os.path.abspath(path)
+    inside_uploads = full_path.startswith(os.path.abspath("uploads") + os.sep)
+    if not inside_uploads or not _can_view_legacy(session, user, paths) or not os.path.isfile(full_path):
+        raise HTTPException(status_code=404, detail="Evidence not found")
+
+    media_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+    headers = {"Cache-Control": "private, no-cache"}
+    return FileResponse(full_path, media_type=media_type, headers=headers, content_disposition_type="inline")
+
+
+@router.get("/{blob_id}")
+def get_evidence(
+    blob_id: str,
+    request: Request,
+    variant: Optional[str] = "original",
+    session: Session = Depends(get_session),
+):
+    """
+    Serve an evidence blob (or its thumbnail / web rendition) after one
+    authorization check. Names are content-addressed, so responses carry a strong
+    ETag and an immutable Cache-Control; If-None-Match answers 304 and Range
+    requests are served as 206. With object storage the answer is a redirect to a
+    presigned URL instead, so the bytes never pass through the API.
+    """
+    if variant not in VARIANTS:
+        raise HTTPException(status_code=400, detail=f"variant must be one of {VARIANTS}")
+
+    user = _current_user(request, session)
+    blob = session.get(EvidenceBlob, blob_id)
+    if not blob or not _can_view(session, user, blob_id):
+        # Same answer for "missing" and "not yours" so ids can't be probed
+        raise HTTPException(status_code=404, detail="Evidence not found")
+
+    path = {"original": blob.path, "thumbnail": blob.thumbnail_path, "web": blob.web_path}[variant]
+    if not path:
+        raise HTTPException(status_code=404, detail=f"No {variant} rendition yet")
+
+    etag = f'"{blob.id}-{variant}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={EVIDENCE_MAX_AGE}, immutable",
+        "Accept-Ranges": "bytes",
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in {tag.strip() for tag in if_none_match.split(",")} or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+
+    media_type = blob.content_type if variant == "original" else "image/jpeg"
+    storage = get_storage()
+    if not storage.is_local:
+        # Object storage: send the client straight to a short-lived signed URL
+        headers["Cache-Control"] = f"private, max-age={max(0, S3_PRESIGN_EXPIRY - 60)}"
+        del headers["Accept-Ranges"]
+        return RedirectResponse(storage.presigned_get(path, media_type), status_code=307, headers=headers)
+
+    full_path = os.path.abspath(path)  # stored relative to the app's working directory, like /uploads
+    if EVIDENCE_OFFLOAD == "nginx":
+        relative = os.path.relpath(path, "uploads").replace(os.sep, "/")
+        headers["X-Accel-Redirect"] = EVIDENCE_ACCEL_PREFIX.rstrip("/") + "/" + relative
+        return Response(headers=headers, media_type=media_type)
+    if EVIDENCE_OFFLOAD == "sendfile":
+        headers["X-Sendfile"] = full_path
+        return Response(headers=headers, media_type=media_type)
+
+    if not os.path.isfile(full_path):
+        raise HTTPException(status_code=404, detail="Evidence file missing")
+    return FileResponse(full_path, media_type=media_type, headers=headers, content_disposition_type="inline")
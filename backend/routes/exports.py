@@ -0,0 +1,337 @@
+import re
+import io
+import os
+import csv
+import json
+import uuid
+import zlib
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from enum import Enum
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, literal, null
+from sqlmodel import Session, select
+from core.database import engine, get_session
+from models.audit_log import AuditLog
+from models.complaints import Complaint
+from models.employee_complaint import EmployeeComplaint
+from models.evidence_blob import EvidenceBlob
+from models.task import Task, TaskEvidence
+from models.user import User
+from routes.admin import log_action
+from schemas.audit_logs import AuditLogRead
+from schemas.tasks import TaskRead
+from schemas.users import WorkerRead
+from utils.fieldsets import FIELDS_QUERY, parse_fields
+from utils.security import admin_required
+from utils.storage import get_storage
+from utils.zipstream import ZipEntry, stream_zip
+
+router = APIRouter(tags=["Exports"])
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "500"))
+EXPORT_CHUNK_BYTES = 64 * 1024
+EXPORT_GZIP_LEVEL = int(os.getenv("EXPORT_GZIP_LEVEL", "6"))
+
+MANIFEST_FIELDS = [
+    "evidence_id", "file_in_zip", "task_id", "task_title", "task_status", "assigned_to", "assigned_by",
+    "task_created_at", "uploaded_at", "blob_id", "size", "content_type", "phash",
+]
+
+
+def _evidence_query(task_id: Optional[str], worker: Optional[str], date_from: Optional[date], date_to: Optional[date]):
+    query = (
+        select(TaskEvidence, Task, EvidenceBlob)
+        .join(Task, Task.id == TaskEvidence.task_id)
+        .outerjoin(EvidenceBlob, EvidenceBlob.id == TaskEvidence.blob_id)
+    )
+    if task_id:
+        query = query.where(Task.id == task_id)
+    if worker:
+        query = query.where(Task.assigned_to == worker)
+    return query.where(*_date_range(TaskEvidence.uploaded_at, date_from, date_to))
+
+
+def _date_range(column, date_from: Optional[date], date_to: Optional[date]) -> list:
+    # Whole days, date_to inclusive
+    conditions = []
+    if date_from:
+        conditions.append(column >= datetime.combine(date_from, datetime.min.time()))
+    if date_to:
+        conditions.append(column < datetime.combine(date_to + timedelta(days=1), datetime.min.time()))
+    return conditions
+
+
+def _slug(text: str, limit: int = 40) -> str:
+    return re.sub(r"[^\w.-]+", "_", text).strip("_")[:limit] or "untitled"
+
+
+def _archive_name(evidence: TaskEvidence, task: Task) -> str:
+    ext = os.path.splitext(evidence.file_url)[1].lower()
+    return (f"{_slug(task.assigned_to)}/{_slug(task.title)}_{task.id[:8]}/"
+            f"{evidence.uploaded_at:%Y%m%d-%H%M%S}_{evidence.id[:8]}{ext}")
+
+
+def _iter_rows(query):
+    # Fresh session: the response body is produced after the request's session is gone
+    with Session(engine) as session:
+        ordered = query.order_by(Task.assigned_to, Task.id, TaskEvidence.uploaded_at)
+        yield from session.exec(ordered.execution_options(yield_per=EXPORT_BATCH_SIZE))
+
+
+def _manifest(query):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(MANIFEST_FIELDS)
+    for evidence, task, blob in _iter_rows(query):
+        writer.writerow([
+            evidence.id, _archive_name(evidence, task), task.id, task.title, task.status.value, task.assigned_to,
+            task.assigned_by, task.created_at.isoformat(), evidence.uploaded_at.isoformat(), evidence.blob_id or "",
+            blob.size if blob else "", blob.content_type if blob else "", blob.phash if blob else "",
+        ])
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def _entries(query, missing: list):
+    storage = get_storage()
+    yield ZipEntry("manifest.csv", _manifest(query), compress=True)
+    for evidence, task, _ in _iter_rows(query):
+        path = evidence.file_url
+        yield ZipEntry(_archive_name(evidence, task), lambda path=path: storage.open(path), modified=evidence.uploaded_at)
+    if missing:
+        report = "evidence_file,error\n" + "".join(f"{name},{error}\n" for name, error in missing)
+        yield ZipEntry("missing.csv", [report.encode()], compress=True)
+
+
+@router.get("/evidence.zip")
+def export_evidence_zip(
+    task_id: Optional[str] = None,
+    worker: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    session: Session = Depends(get_session),
+    admin: User = Depends(admin_required)
+):
+    """
+    Stream a ZIP of evidence photos for a task, a worker and/or an upload date
+    range, with manifest.csv (task metadata per file) first. The archive is
+    assembled while it is sent, so memory use doesn't depend on its size.
+    Files that can't be read are listed in missing.csv at the end.
+    """
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from must not be after date_to")
+
+    query = _evidence_query(task_id, worker, date_from, date_to)
+    count = session.exec(select(func.count()).select_from(query.subquery())).one()
+    if count == 0:
+        raise HTTPException(status_code=404, detail="No evidence matches these filters")
+
+    filters = {"task": task_id, "worker": worker, "from": date_from, "to": date_to}
+    described = ", ".join(f"{k}={v}" for k, v in filters.items() if v) or "all"
+    log_action(session, performed_by=admin.id, action="evidence_exported",
+               details=f"Exported {count} evidence file(s) as ZIP ({described})")
+
+    missing = []
+    body = stream_zip(
+        _entries(query, missing),
+        on_error=lambda entry, e: missing.append((entry.name, type(e).__name__)),
+    )
+    filename = "evidence_" + "_".join(_slug(str(v)) for v in filters.values() if v) if any(filters.values()) else "evidence_all"
+    return StreamingResponse(
+        body,
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}.zip"',
+            "X-Evidence-Count": str(count),
+            "Cache-Control": "no-store",
+        },
+    )
+
+
+# -------------------------
+# Table exports (NDJSON / CSV)
+# -------------------------
+class ExportDataset(str, Enum):
+    tasks = "tasks"
+    workers = "workers"
+    complaints = "complaints"
+    audit_logs = "audit-logs"
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+@dataclass
+class ExportSource:
+    """
+    One table behind an export: output column name → SQL expression, plus the
+    columns the filters apply to (None: filter not supported).
+    """
+    table: object
+    columns: dict
+    created: object
+    worker: object = None
+    status: object = None
+    action: object = None
+    joins: list = field(default_factory=list)
+    where: list = field(default_factory=list)
+
+
+# Worker username for the user-id columns
+_complaint_worker = User.__table__.alias("complaint_worker")
+_log_user = User.__table__.alias("log_user")
+
+EXPORT_SOURCES = {
+    ExportDataset.tasks: [
+        ExportSource(Task, {name: getattr(Task, name) for name in TaskRead.model_fields},
+                     created=Task.created_at, worker=Task.assigned_to, status=Task.status),
+    ],
+    ExportDataset.workers: [
+        ExportSource(User, {**{name: getattr(User, name) for name in WorkerRead.model_fields},
+                            "phone_number": User.phone_number},
+                     created=User.created_at, worker=User.username, status=User.status,
+                     where=[User.role == "worker"]),
+    ],
+    # Both complaint tables, one after the other, with the same columns
+    ExportDataset.complaints: [
+        ExportSource(EmployeeComplaint, {
+            "id": EmployeeComplaint.id, "source": literal("employee"), "worker": _complaint_worker.c.username,
+            "description": EmployeeComplaint.description, "category": null(), "status": EmployeeComplaint.status,
+            "location": null(), "evidence": null(), "created_at": EmployeeComplaint.submitted_at,
+        }, created=EmployeeComplaint.submitted_at, worker=_complaint_worker.c.username,
+            status=EmployeeComplaint.status,
+            joins=[(_complaint_worker, _complaint_worker.c.id == EmployeeComplaint.worker_id)]),
+        ExportSource(Complaint, {
+            "id": Complaint.id, "source": literal("public"), "worker": null(),
+            "description": Complaint.description, "category": Complaint.category, "status": Complaint.status,
+            "location": Complaint.location, "evidence": Complaint.evidence, "created_at": Complaint.submitted_at,
+        }, created=Complaint.submitted_at, status=Complaint.status),
+    ],
+    ExportDataset.audit_logs: [
+        ExportSource(AuditLog, {**{name: getattr(AuditLog, name) for name in AuditLogRead.model_fields},
+                                "username": _log_user.c.username},
+                     created=AuditLog.created_at, worker=_log_user.c.username, action=AuditLog.action,
+                     joins=[(_log_user, _log_user.c.id == AuditLog.user_id)]),
+    ],
+}
+
+
+def _export_query(source: ExportSource, names, worker, status, action, date_from, date_to):
+    query = select(*[source.columns[name].label(name) for name in names]).select_from(source.table)
+    for target, on in source.joins:
+        query = query.outerjoin(target, on)
+    query = query.where(*source.where, *_date_range(source.created, date_from, date_to))
+    for column, value in ((source.worker, worker), (source.status, status), (source.action, action)):
+        if value is not None:
+            if column is None:
+                # Filter doesn't apply to this table (e.g. worker on public complaints): nothing matches
+                return None
+            query = query.where(column == value)
+    return query.order_by(source.created)
+
+
+def _plain(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def _export_rows(queries):
+    # Fresh session: the response body is produced after the request's session is gone.
+    # yield_per fetches in batches, so only one batch of rows is in memory at a time.
+    with Session(engine) as session:
+        for query in queries:
+            for batch in session.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE)).partitions():
+                yield from batch
+
+
+def _encode(rows, names, fmt: ExportFormat):
+    buffer = io.StringIO()
+    if fmt == ExportFormat.csv:
+        writer = csv.writer(buffer)
+        writer.writerow(names)
+        write = lambda row: writer.writerow(["" if value is None else _plain(value) for value in row])
+    else:
+        write = lambda row: buffer.write(
+            json.dumps(dict(zip(names, map(_plain, row))), separators=(",", ":")) + "\n"
+        )
+    for row in rows:
+        write(row)
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def _gzip(chunks):
+    compressor = zlib.compressobj(EXPORT_GZIP_LEVEL, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    for chunk in chunks:
+        if data := compressor.compress(chunk):
+            yield data
+    yield compressor.flush()
+
+
+@router.get("/{dataset}")
+def export_table(
+    dataset: ExportDataset,
+    format: ExportFormat = ExportFormat.ndjson,
+    fields: Optional[str] = FIELDS_QUERY,
+    worker: Optional[str] = None,
+    status: Optional[str] = None,
+    action: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    gzip: bool = False,
+    session: Session = Depends(get_session),
+    admin: User = Depends(admin_required)
+):
+    """
+    Stream a whole table as NDJSON or CSV, oldest first. Rows are fetched in
+    batches of EXPORT_BATCH_SIZE and written out as they arrive, so memory use
+    doesn't depend on the row count. Filters: worker (assignee / filer /
+    acting user), status, action (audit logs), and a created date range.
+    gzip=true sends a .gz file.
+    """
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from must not be after date_to")
+
+    sources = EXPORT_SOURCES[dataset]
+    names = parse_fields(fields, sources[0].columns) or tuple(sources[0].columns)
+    for name, value in (("worker", worker), ("status", status), ("action", action)):
+        if value is not None and all(getattr(source, name) is None for source in sources):
+            raise HTTPException(status_code=400, detail=f"'{name}' can't filter {dataset.value}")
+    if status is not None:
+        allowed = {value for source in sources if source.status is not None for value in source.status.type.enums}
+        if status not in allowed:
+            raise HTTPException(status_code=400, detail=f"Unknown status '{status}'. Choose from: {', '.join(sorted(allowed))}")
+
+    queries = [_export_query(source, names, worker, status, action, date_from, date_to) for source in sources]
+    body = _encode(_export_rows([query for query in queries if query is not None]), names, format)
+
+    filters = {"worker": worker, "status": status, "action": action, "from": date_from, "to": date_to}
+    described = ", ".join(f"{k}={v}" for k, v in filters.items() if v) or "all"
+    log_action(session, performed_by=admin.id, action=f"{dataset.value.replace('-', '_')}_exported",
+               details=f"Exported {dataset.value} as {format.value} ({described})")
+
+    filename = f"{dataset.value}.{format.value}"
+    media_type = "application/x-ndjson" if format == ExportFormat.ndjson else "text/csv; charset=utf-8"
+    if gzip:
+        body, filename, media_type = _gzip(body), filename + ".gz", "application/gzip"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "Cache-Control": "no-store"},
+    )
@@ -0,0 +1,265 @@
+import os
+import json
+import time
+import uuid
+import base64
+import asyncio
+import logging
+import aiofiles
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, UploadFile
+from sqlmodel import Session
+from core.database import get_session
+from models.task import Task
+from models.user import User
+from utils.security import get_current_user
+from utils.uploads import MAX_UPLOAD_FILE_BYTES
+from routes.worker import attach_evidence
+
+# Resumable evidence uploads, following the tus 1.0 core protocol:
+#   POST   /worker/tasks/{task_id}/uploads   Upload-Length (+ Upload-Metadata) → 201, Location
+#   HEAD   /worker/uploads/{upload_id}       → Upload-Offset / Upload-Length
+#   PATCH  /worker/uploads/{upload_id}       Upload-Offset + bytes → 204, new Upload-Offset
+#   DELETE /worker/uploads/{upload_id}       → 204
+# When the last byte arrives the file is attached to the task via attach_evidence.
+
+router = APIRouter(tags=["Worker"])
+logger = logging.getLogger(__name__)
+
+PARTIAL_DIR = os.path.join("uploads", "partial")
+os.makedirs(PARTIAL_DIR, exist_ok=True)
+
+TUS_VERSION = "1.0.0"
+RESUMABLE_UPLOAD_EXPIRY_SECONDS = float(os.getenv("RESUMABLE_UPLOAD_EXPIRY_SECONDS", str(24 * 3600)))
+RESUMABLE_CLEANUP_INTERVAL = float(os.getenv("RESUMABLE_CLEANUP_INTERVAL", "600"))
+
+# One PATCH at a time per upload (423 otherwise). The locks live in this process,
+# so the guard does not hold across several API workers: two concurrent PATCHes
+# for one upload on different workers can both pass the offset check and
+# interleave their bytes. Route an upload's requests to one worker (sticky by
+# upload id) when running more than one.
+_locks: dict[str, asyncio.Lock] = {}
+
+
+def _paths(upload_id: str) -> tuple[str, str]:
+    try:
+        upload_id = str(uuid.UUID(upload_id))
+    except ValueError:
+        raise HTTPException(404, "Upload not found")
+    base = os.path.join(PARTIAL_DIR, upload_id)
+    return f"{base}.part", f"{base}.json"
+
+
+def _load(upload_id: str, current_user: User) -> tuple[dict, str, str]:
+    data_path, meta_path = _paths(upload_id)
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+    except FileNotFoundError:
+        raise HTTPException(404, "Upload not found")
+    if meta["username"] != current_user.username:
+        raise HTTPException(404, "Upload not found")
+    if meta["expires_at"] < time.time():
+        _discard(data_path, meta_path)
+        raise HTTPException(410, "Upload expired")
+    return meta, data_path, meta_path
+
+
+def _discard(data_path: str, meta_path: str):
+    for path in (data_path, meta_path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _offset(data_path: str) -> int:
+    try:
+        return os.path.getsize(data_path)
+    except FileNotFoundError:
+        return 0
+
+
+def _tus_headers(meta: dict, offset: int) -> dict:
+    return {
+        "Tus-Resumable": TUS_VERSION,
+        "Upload-Offset": str(offset),
+        "Upload-Length": str(meta["length"]),
+        "Upload-Expires": time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(meta["expires_at"])),
+        "Cache-Control": "no-store",
+    }
+
+
+def _parse_metadata(header: Optional[str]) -> dict:
+    # "filename d29yay5qcGc=,filetype aW1hZ2UvanBlZw=="
+    metadata = {}
+    for pair in filter(None, (p.strip() for p in (header or "").split(","))):
+        key, _, value = pair.partition(" ")
+        try:
+            metadata[key] = base64.b64decode(value).decode() if value else ""
+        except (ValueError, UnicodeDecodeError):
+            raise HTTPException(400, "Invalid Upload-Metadata")
+    return metadata
+
+
+@router.post("/tasks/{task_id}/uploads", status_code=201)
+def create_upload(
+    task_id: str,
+    request: Request,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    task = session.get(Task, task_id)
+    if not task:
+        raise HTTPException(404, "Task not found")
+    if task.assigned_to != current_user.username:
+        raise HTTPException(403, "Not your task")
+
+    length = request.headers.get("Upload-Length", "")
+    if not length.isdigit() or int(length) == 0:
+        raise HTTPException(400, "Upload-Length header is required")
+    if int(length) > MAX_UPLOAD_FILE_BYTES:
+        raise HTTPException(413, f"Upload exceeds the limit of {MAX_UPLOAD_FILE_BYTES} bytes")
+
+    metadata = _parse_metadata(request.headers.get("Upload-Metadata"))
+    upload_id = str(uuid.uuid4())
+    data_path, meta_path = _paths(upload_id)
+    meta = {
+        "task_id": task.id,
+        "username": current_user.username,
+        "length": int(length),
+        "filename": os.path.basename(metadata.get("filename", "")) or f"{upload_id}.bin",
+        "expires_at": time.time() + RESUMABLE_UPLOAD_EXPIRY_SECONDS,
+    }
+    open(data_path, "wb").close()
+    with open(meta_path, "w") as f:
+        json.dump(meta, f)
+
+    headers = _tus_headers(meta, 0)
+    headers["Location"] = f"/worker/uploads/{upload_id}"
+    return Response(status_code=201, headers=headers)
+
+
+@router.head("/uploads/{upload_id}")
+def upload_status(upload_id: str, current_user: User = Depends(get_current_user)):
+    meta, data_path, _ = _load(upload_id, current_user)
+    return Response(status_code=200, headers=_tus_headers(meta, _offset(data_path)))
+
+
+@router.patch("/uploads/{upload_id}")
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    if request.headers.get("content-type") != "application/offset+octet-stream":
+        raise HTTPException(415, "Content-Type must be application/offset+octet-stream")
+    client_offset = request.headers.get("Upload-Offset", "")
+    if not client_offset.isdigit():
+        raise HTTPException(400, "Upload-Offset header is required")
+
+    lock = _locks.setdefault(upload_id, asyncio.Lock())
+    if lock.locked():
+        raise HTTPException(423, "Another request is writing to this upload")
+    try:
+        async with lock:
+            result, headers = await _append(upload_id, request, session, current_user)
+    finally:
+        _locks.pop(upload_id, None)
+
+    if result is None:
+        return Response(status_code=204, headers=headers)
+    return Response(
+        status_code=200,
+        headers={**headers, "Content-Type": "application/json"},
+        content=json.dumps(result),
+    )
+
+
+async def _append(upload_id: str, request: Request, session: Session, current_user: User):
+    """
+    Append one PATCH body under the upload's lock. Returns (result, headers);
+    result is the attach_evidence response once the last byte has arrived.
+    """
+    meta, data_path, meta_path = _load(upload_id, current_user)
+    offset = _offset(data_path)
+    if int(request.headers["Upload-Offset"]) != offset:
+        raise HTTPException(409, f"Upload-Offset mismatch, server has {offset}")
+
+    # Append the body in chunks; whatever arrived before a disconnect is kept
+    try:
+        async with aiofiles.open(data_path, "ab") as out_file:
+            async for chunk in request.stream():
+                if offset + len(chunk) > meta["length"]:
+                    raise HTTPException(413, "Data exceeds Upload-Length")
+                await out_file.write(chunk)
+                offset += len(chunk)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.info("Resumable upload %s interrupted at %d bytes: %s", upload_id, offset, e)
+
+    headers = _tus_headers(meta, offset)
+    if offset < meta["length"]:
+        return None, headers
+
+    # ✅ Complete: attach through the regular evidence path
+    task = session.get(Task, meta["task_id"])
+    if not task or task.assigned_to != current_user.username:
+        _discard(data_path, meta_path)
+        raise HTTPException(404, "Task no longer available")
+    with open(data_path, "rb") as f:
+        upload = UploadFile(file=f, filename=meta["filename"], size=offset)
+        try:
+            result = await attach_evidence(task, [upload], session, current_user)
+        except HTTPException as e:
+            # Rejected content (e.g. not an image) fails the same way on every retry: drop it
+            if 400 <= e.status_code < 500:
+                _discard(data_path, meta_path)
+            raise
+    _discard(data_path, meta_path)
+    return result, headers
+
+
+@router.delete("/uploads/{upload_id}", status_code=204)
+def terminate_upload(upload_id: str, current_user: User = Depends(get_current_user)):
+    _, data_path, meta_path = _load(upload_id, current_user)
+    _discard(data_path, meta_path)
+    return Response(status_code=204, headers={"Tus-Resumable": TUS_VERSION})
+
+
+def cleanup_expired_uploads() -> int:
+    """
+    Remove partial uploads past their expiry. Returns the number removed.
+    """
+    removed = 0
+    now = time.time()
+    for name in os.listdir(PARTIAL_DIR):
+        if not name.endswith(".json"):
+            continue
+        meta_path = os.path.join(PARTIAL_DIR, name)
+        data_path = meta_path[:-len(".json")] + ".part"
+        try:
+            with open(meta_path) as f:
+                expired = json.load(f)["expires_at"] < now
+        except (OSError, ValueError, KeyError):
+            expired = True
+        if expired:
+            _discard(data_path, meta_path)
+            removed += 1
+    return removed
+
+
+async def expired_upload_cleaner():
+    """
+    Background loop started from the app lifespan.
+    """
+    while True:
+        await asyncio.sleep(RESUMABLE_CLEANUP_INTERVAL)
+        try:
+            removed = await asyncio.to_thread(cleanup_expired_uploads)
+            if removed:
+                logger.info("Removed %d expired resumable upload(s)", removed)
+        except Exception as e:
+            logger.error("Resumable upload cleanup failed: %s", e)
@@ -3,10 +3,28 @@ from urllib3.contrib import pyopenssl
 pyopenssl.inject_into_urllib3()
 
 import os
+import time
+import uuid
+import asyncio
 import logging
+import threading
 import requests
-from fastapi import APIRouter, HTTPException, status
+from collections import deque
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
+from sqlalchemy import case, func
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import Session
+from core.database import engine
+from models.audit_log import AuditLog
+from models.sms_delivery import SmsDelivery, SmsInbound
+from utils.event_buffer import BatchBuffer, BufferFull
+from utils.idempotency import Idempotency, IdempotencyConflict, fingerprint_of, idempotency, store as idempotency_store
+from utils.circuit_breaker import AdaptiveTimeout, CircuitBreaker, CircuitOpenError
+from utils.rate_limiter import PriorityTokenBucket, RateLimitTimeout
 
 router = APIRouter(tags=["SMS"])
 logger = logging.getLogger(__name__)
@@ -19,23 +37,73 @@ AT_API_KEY = os.getenv(
 )
 AT_SENDER_ID = os.getenv("AFRICASTALKING_SENDER_ID", "32578")
 
-AT_BASE_URL = (
+# AT_BASE_URL overrides the endpoint, e.g. the local fake gateway
+# (fake_sms_gateway.py) at http://localhost:8900/version1/messaging
+AT_BASE_URL = os.getenv("AT_BASE_URL") or (
     "https://api.africastalking.com/version1/messaging"
     if AT_USERNAME != "sandbox"
     else "https://api.sandbox.africastalking.com/version1/messaging"
 )
 
+# --- Resilience config ---
+AT_BREAKER_FAILURE_THRESHOLD = int(os.getenv("AT_BREAKER_FAILURE_THRESHOLD", "5"))
+AT_BREAKER_RECOVERY_SECONDS = float(os.getenv("AT_BREAKER_RECOVERY_SECONDS", "30"))
+AT_TIMEOUT_MIN = float(os.getenv("AT_TIMEOUT_MIN", "2"))
+AT_TIMEOUT_MAX = float(os.getenv("AT_TIMEOUT_MAX", "15"))
+AT_TIMEOUT_PERCENTILE = float(os.getenv("AT_TIMEOUT_PERCENTILE", "0.99"))
+AT_DEFERRED_QUEUE_SIZE = int(os.getenv("AT_DEFERRED_QUEUE_SIZE", "1000"))
+AT_DEFERRED_RETRY_SECONDS = float(os.getenv("AT_DEFERRED_RETRY_SECONDS", "5"))
+
+# --- Rate limiting config ---
+AT_RATE_PER_SECOND = float(os.getenv("AT_RATE_PER_SECOND", "5"))
+AT_RATE_BURST = int(os.getenv("AT_RATE_BURST", "10"))
+AT_RATE_MAX_WAIT = float(os.getenv("AT_RATE_MAX_WAIT", "5"))  # keep below callers' HTTP timeouts
+
+# Priority lanes, highest first:
+#   high   → dismissals, task assignments / resets
+#   normal → anything not classified
+#   low    → verification tests, broadcasts, deferred re-sends
+PRIORITY_HIGH = "high"
+PRIORITY_NORMAL = "normal"
+PRIORITY_LOW = "low"
+
+breaker = CircuitBreaker(
+    "africastalking",
+    failure_threshold=AT_BREAKER_FAILURE_THRESHOLD,
+    recovery_timeout=AT_BREAKER_RECOVERY_SECONDS,
+)
+adaptive_timeout = AdaptiveTimeout(
+    min_timeout=AT_TIMEOUT_MIN,
+    max_timeout=AT_TIMEOUT_MAX,
+    percentile=AT_TIMEOUT_PERCENTILE,
+)
+
+rate_limiter = PriorityTokenBucket(
+    rate=AT_RATE_PER_SECOND,
+    burst=AT_RATE_BURST,
+    lanes=(PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW),
+)
+
+# Messages parked while the provider is unavailable: (phone_number, message, task_id, queued_at).
+# Bounded by AT_DEFERRED_QUEUE_SIZE in _park(): a full queue refuses new messages instead of
+# silently evicting the oldest.
+_deferred: deque = deque()
+_deferred_lock = threading.Lock()
+
 
 # --- Core function ---
-def send_sms(phone_number: str, message: str) -> dict:
-    # Normalize phone number
-    normalized = phone_number.strip()
-    if not normalized.startswith("+"):
-        if normalized.startswith("0"):
-            normalized = f"+254{normalized[1:]}"
-        elif normalized.startswith("254"):
-            normalized = f"+{normalized}"
+def _post_to_provider(normalized: str, message: str) -> dict:
+    """
+    Provider call for a slot reserved with breaker.allow_request(). The slot is
+    always given back, even if the call fails before reaching the provider.
+    """
+    try:
+        return _call_provider(normalized, message)
+    finally:
+        breaker.release()
+
 
+def _call_provider(normalized: str, message: str) -> dict:
     headers = {
         "apiKey": AT_API_KEY,
         "Accept": "application/json",
@@ -49,45 +117,386 @@ def send_sms(phone_number: str, message: str) -> dict:
     if AT_SENDER_ID:
         data["from"] = AT_SENDER_ID
 
+    timeout = adaptive_timeout.timeout
+    started = time.monotonic()
     try:
-        resp = requests.post(AT_BASE_URL, headers=headers, data=data, timeout=15)
-        logger.info("AT response: %s %s", resp.status_code, resp.text)
-
-        # Accept 200 or 201 as success
-        if resp.status_code not in (200, 201):
-            return {
-                "status": "failed",
-                "error": f"HTTP {resp.status_code}",
-                "raw": resp.text,
-            }
-
-        res = resp.json()
-        recipients = res.get("SMSMessageData", {}).get("Recipients", [])
+        resp = requests.post(AT_BASE_URL, headers=headers, data=data, timeout=timeout)
+    except requests.RequestException as e:
+        breaker.record_failure(f"{type(e).__name__}: {e}")
+        logger.error("AT error (timeout=%.1fs): %s", timeout, e)
+        raise
+    latency = time.monotonic() - started
+    logger.info("AT response: %s %s", resp.status_code, resp.text)
+
+    # Provider-side trouble (throttling / 5xx) counts against the breaker and is worth retrying
+    if resp.status_code == 429 or resp.status_code >= 500:
+        breaker.record_failure(f"HTTP {resp.status_code}")
         return {
-            "status": recipients[0].get("status") if recipients else "failed",
-            "messageId": recipients[0].get("messageId") if recipients else None,
-            "raw": res,
+            "status": "failed",
+            "error": f"HTTP {resp.status_code}",
+            "raw": resp.text,
+            "retryable": True,
         }
-    except Exception as e:
-        logger.error("AT error: %s", e)
+
+    breaker.record_success()
+    adaptive_timeout.observe(latency)
+
+    # Accept 200 or 201 as success
+    if resp.status_code not in (200, 201):
+        return {
+            "status": "failed",
+            "error": f"HTTP {resp.status_code}",
+            "raw": resp.text,
+        }
+
+    res = resp.json()
+    recipients = res.get("SMSMessageData", {}).get("Recipients", [])
+    return {
+        "status": recipients[0].get("status") if recipients else "failed",
+        "messageId": recipients[0].get("messageId") if recipients else None,
+        "raw": res,
+    }
+
+
+def send_sms(phone_number: str, message: str, defer: bool = False, priority: str = PRIORITY_NORMAL,
+             task_id: str | None = None, idempotency_key: str | None = None) -> dict:
+    """
+    Send an SMS through Africa's Talking, guarded by the circuit breaker and
+    throttled by the token bucket (`priority` picks the lane).
+    Accepted messages are recorded in the delivery-status table (linked to
+    `task_id` when given) so later delivery reports can be matched.
+
+    With `idempotency_key`, a repeated call for the same recipient and message
+    returns the first result instead of sending again.
+
+    When the circuit is open the call fails fast with CircuitOpenError. If
+    `defer` is set, the message is parked instead and {"status": "Queued"} is
+    returned; the same happens when no send slot frees up within
+    AT_RATE_MAX_WAIT or the provider is unreachable, times out or answers
+    429/5xx, so a deferred send only fails for a rejected message or
+    a full deferred queue (BufferFull).
+    """
+    # Normalize phone number
+    normalized = phone_number.strip()
+    if not normalized.startswith("+"):
+        if normalized.startswith("0"):
+            normalized = f"+254{normalized[1:]}"
+        elif normalized.startswith("254"):
+            normalized = f"+{normalized}"
+
+    if not idempotency_key:
+        return _send_sms(normalized, message, defer, priority, task_id)
+
+    key = f"sms:{idempotency_key}"
+    stored = idempotency_store.begin(key, fingerprint_of(normalized, message))
+    if stored is not None:
+        return stored[1]
+    try:
+        result = _send_sms(normalized, message, defer, priority, task_id)
+    except Exception:
+        idempotency_store.release(key)
         raise
+    if result.get("status") == "failed":
+        # Nothing reached the recipient; allow a retry with the same key
+        idempotency_store.release(key)
+    else:
+        idempotency_store.complete(key, 200, result)
+    return result
+
+
+def _park(normalized: str, message: str, task_id: str | None, reason: str) -> dict:
+    with _deferred_lock:
+        if len(_deferred) >= AT_DEFERRED_QUEUE_SIZE:
+            raise BufferFull(f"SMS deferred queue is full ({AT_DEFERRED_QUEUE_SIZE} messages)")
+        _deferred.append((normalized, message, task_id, time.time()))
+    logger.warning("%s, deferred SMS to %s", reason, normalized)
+    return {"status": "Queued", "messageId": None, "deferred": True}
+
+
+def _send_sms(normalized: str, message: str, defer: bool, priority: str, task_id: str | None) -> dict:
+    # Don't spend a send slot on a provider we already know is down
+    if breaker.state != CircuitBreaker.OPEN:
+        try:
+            rate_limiter.acquire(priority, timeout=AT_RATE_MAX_WAIT)
+        except RateLimitTimeout:
+            # Starved lane: the deferred worker sends it once tokens free up
+            if defer:
+                return _park(normalized, message, task_id, f"No {priority} send slot within {AT_RATE_MAX_WAIT}s")
+            raise
+
+    if not breaker.allow_request():
+        if defer:
+            return _park(normalized, message, task_id, "AT circuit open")
+        raise CircuitOpenError("SMS provider unavailable (circuit open)")
+
+    try:
+        result = _post_to_provider(normalized, message)
+    except requests.RequestException:
+        # The breaker may still be closed (below its failure threshold); park rather than fail
+        if defer:
+            return _park(normalized, message, task_id, "AT unreachable")
+        raise
+    if defer and result.get("retryable"):
+        return _park(normalized, message, task_id, f"AT answered {result['error']}")
+    if result.get("messageId"):
+        _record_sent(result["messageId"], normalized, task_id)
+    return result
+
+
+def flush_deferred() -> int:
+    """
+    Re-send parked messages while the breaker lets calls through.
+    Returns the number of messages the provider accepted.
+    """
+    sent = 0
+    while True:
+        if _deferred and breaker.state != CircuitBreaker.OPEN:
+            try:
+                rate_limiter.acquire(PRIORITY_LOW, timeout=AT_RATE_MAX_WAIT)
+            except RateLimitTimeout:
+                return sent  # busier lanes first; nothing was taken off the queue
+        with _deferred_lock:
+            if not _deferred:
+                return sent
+            if not breaker.allow_request():
+                return sent
+            normalized, message, task_id, queued_at = _deferred.popleft()
+        try:
+            result = _post_to_provider(normalized, message)
+        except Exception as e:
+            result = {"status": "failed", "error": f"{type(e).__name__}: {e}", "retryable": True}
+        if result.get("retryable"):
+            # Provider trouble, whatever the breaker state: put it back and wait for the next round
+            with _deferred_lock:
+                _deferred.appendleft((normalized, message, task_id, queued_at))
+            return sent
+        if result.get("status") == "failed":
+            # Rejected by the provider (bad number, auth...): retrying won't help
+            logger.error("Deferred SMS to %s rejected, dropped: %s", normalized, result.get("error") or result.get("raw"))
+            continue
+        if result.get("messageId"):
+            _record_sent(result["messageId"], normalized, task_id)
+        sent += 1
+
+
+async def deferred_sms_worker():
+    """
+    Background loop started from the app lifespan; drains deferred messages.
+    """
+    while True:
+        await asyncio.sleep(AT_DEFERRED_RETRY_SECONDS)
+        if _deferred:
+            try:
+                await run_in_threadpool(flush_deferred)
+            except Exception as e:
+                logger.error("Deferred SMS flush failed: %s", e)
+
+
+# --- Delivery reports & inbound messages ---
+def _upsert_deliveries(events: list[dict]):
+    stmt = insert(SmsDelivery).values(events)
+    excluded = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[SmsDelivery.message_id],
+        set_={
+            # A late "Sent" record must not overwrite a real delivery status
+            "status": case((excluded.status == "Sent", SmsDelivery.status), else_=excluded.status),
+            "phone_number": func.coalesce(excluded.phone_number, SmsDelivery.phone_number),
+            "task_id": func.coalesce(excluded.task_id, SmsDelivery.task_id),
+            "failure_reason": func.coalesce(excluded.failure_reason, SmsDelivery.failure_reason),
+            "network_code": func.coalesce(excluded.network_code, SmsDelivery.network_code),
+            "retry_count": func.coalesce(excluded.retry_count, SmsDelivery.retry_count),
+            "updated_at": excluded.updated_at,
+        },
+    )
+    with Session(engine) as session:
+        session.execute(stmt)
+        session.commit()
+
+
+def _insert_inbound(events: list[dict]):
+    stmt = insert(SmsInbound).values(events).on_conflict_do_nothing(index_elements=[SmsInbound.id])
+    with Session(engine) as session:
+        session.execute(stmt)
+        session.commit()
+
+
+_DELIVERY_FIELDS = ("message_id", "phone_number", "status", "failure_reason", "network_code",
+                    "retry_count", "task_id", "updated_at")
+
+delivery_buffer = BatchBuffer("sms_delivery", _upsert_deliveries, key=lambda e: e["message_id"])
+inbound_buffer = BatchBuffer("sms_inbound", _insert_inbound, key=lambda e: e["id"])
+
+
+# --- Batched notifications (bulk task assignment, bulk worker verification, broadcasts) ---
+def _send_notifications(events: list[dict]):
+    """
+    Send queued notifications on each event's priority lane (parked while the
+    circuit is open) and record every outcome in one audit insert.
+    """
+    logs = []
+    for event in events:
+        try:
+            result = send_sms(event["phone_number"], event["message"], defer=True, priority=event["priority"],
+                              task_id=event["task_id"], idempotency_key=event["idempotency_key"])
+            if result.get("deferred"):
+                action = "sms_notification_deferred"  # parked until the circuit closes, not sent yet
+            elif result.get("status") != "failed":
+                action = "sms_notification_sent"
+            else:
+                action = "sms_notification_failed"
+            outcome = f"Result: {result}"
+        except Exception as e:
+            action, outcome = "sms_notification_failed", f"Error: {e}"
+        logs.append({
+            "id": uuid.uuid4(),
+            "action": action,
+            "details": f"SMS to {event['username']} for {event['about']} | {outcome}",
+            "user_id": event["performed_by"],
+            "created_at": datetime.utcnow(),
+        })
+    with Session(engine) as session:
+        session.execute(insert(AuditLog), logs)
+        session.commit()
+
+
+# One event per message; the key keeps a retried enqueue from sending twice
+notification_buffer = BatchBuffer("sms_notifications", _send_notifications, key=lambda e: e["idempotency_key"],
+                                  batch_size=100, flush_interval=1.0, max_pending=10000)
+# Broadcasts get their own buffer, flushed alongside the one above: a long broadcast on the
+# low lane then never sits in front of task assignments waiting in the same queue
+broadcast_buffer = BatchBuffer("sms_broadcasts", _send_notifications, key=lambda e: e["idempotency_key"],
+                               batch_size=100, flush_interval=1.0, max_pending=10000)
+
+
+def _delivery_event(**fields) -> dict:
+    # Every row in a multi-row INSERT needs the same columns
+    event = dict.fromkeys(_DELIVERY_FIELDS)
+    event.update(fields)
+    event["updated_at"] = event["updated_at"] or datetime.utcnow()
+    return event
+
+
+def _record_sent(message_id: str, phone_number: str, task_id: str | None):
+    try:
+        delivery_buffer.add(_delivery_event(
+            message_id=message_id, phone_number=phone_number, status="Sent", task_id=task_id,
+        ))
+    except BufferFull:
+        logger.warning("Delivery buffer full, not tracking message %s", message_id)
+
+
+def _to_int(value: str | None) -> int | None:
+    try:
+        return int(value) if value not in (None, "") else None
+    except ValueError:
+        return None
 
 
 # --- Request Model ---
 class SMSRequest(BaseModel):
     phone_number: str
     message: str
+    defer: bool = False  # queue instead of failing fast when the provider is down
+    priority: str = PRIORITY_NORMAL  # "high" | "normal" | "low"
+    task_id: str | None = None  # links the delivery status to a task
 
 
 # --- Endpoint ---
 @router.post("/send-sms")
-def send_sms_endpoint(req: SMSRequest):
+def send_sms_endpoint(req: SMSRequest, idem: Idempotency = Depends(idempotency)):
     try:
-        result = send_sms(req.phone_number, req.message)
+        result = send_sms(req.phone_number, req.message, defer=req.defer, priority=req.priority,
+                          task_id=req.task_id, idempotency_key=idem.key)
         # Mark as success only if status is not "failed"
         success = result.get("status") != "failed"
         return {"success": success, "result": result}
+    except CircuitOpenError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e)
+        )
+    except IdempotencyConflict as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT if e.in_progress else status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    except RateLimitTimeout as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(e)
+        )
+    except BufferFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
         )
+
+
+# --- Status ---
+@router.get("/status")
+def sms_status():
+    with _deferred_lock:
+        deferred = len(_deferred)
+        oldest = _deferred[0][3] if _deferred else None
+    return {
+        "breaker": breaker.snapshot(),
+        "timeout": adaptive_timeout.snapshot(),
+        "rate_limiter": rate_limiter.snapshot(),
+        "delivery_reports": delivery_buffer.snapshot(),
+        "inbound": inbound_buffer.snapshot(),
+        "notifications": notification_buffer.snapshot(),
+        "broadcasts": broadcast_buffer.snapshot(),
+        "idempotency": idempotency_store.snapshot(),
+        "deferred": {"queued": deferred, "oldest_queued_at": oldest, "capacity": AT_DEFERRED_QUEUE_SIZE},
+    }
+
+
+# --- Provider callbacks ---
+# Both callbacks only parse the form and buffer the event; rows are bulk-upserted
+# by the buffer flush loop, so bursts never wait on per-row commits.
+@router.post("/delivery-report", response_class=PlainTextResponse)
+async def delivery_report(request: Request):
+    form = await request.form()
+    message_id = form.get("id")
+    if not message_id:
+        raise HTTPException(status_code=400, detail="Missing message id")
+
+    try:
+        delivery_buffer.add(_delivery_event(
+            message_id=message_id,
+            phone_number=form.get("phoneNumber"),
+            status=form.get("status") or "Unknown",
+            failure_reason=form.get("failureReason") or None,
+            network_code=form.get("networkCode") or None,
+            retry_count=_to_int(form.get("retryCount")),
+        ))
+    except BufferFull:
+        # Provider retries callbacks that don't get a 2xx
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Busy, retry later")
+    return "OK"
+
+
+@router.post("/inbound", response_class=PlainTextResponse)
+async def inbound_sms(request: Request):
+    form = await request.form()
+    message_id = form.get("id")
+    sender = form.get("from")
+    if not message_id or not sender:
+        raise HTTPException(status_code=400, detail="Missing message id or sender")
+
+    try:
+        inbound_buffer.add({
+            "id": message_id,
+            "phone_number": sender,
+            "to": form.get("to"),
+            "text": form.get("text") or "",
+            "link_id": form.get("linkId") or None,
+            "received_at": datetime.utcnow(),
+        })
+    except BufferFull:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Busy, retry later")
+    return "OK"
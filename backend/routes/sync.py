@@ -0,0 +1,91 @@
+import os
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, select
+from core.database import get_session
+from models.employee_complaint import EmployeeComplaint
+from models.sync import Tombstone
+from models.task import Task, TaskEvidence
+from models.user import User
+from schemas.sync import SyncResponse
+from utils.security import get_current_user
+from utils.serialization import SYNC_RESPONSE
+from utils.sync import current_seq
+
+router = APIRouter(tags=["Worker"])
+
+SYNC_PAGE_SIZE = int(os.getenv("SYNC_PAGE_SIZE", "500"))
+
+
+def _sources(worker: User):
+    """
+    (model, change_seq column, filter) for everything a worker syncs.
+    """
+    mine = Task.assigned_to == worker.username
+    return [
+        (Task, Task.change_seq, [mine]),
+        (TaskEvidence, TaskEvidence.change_seq,
+         [TaskEvidence.task_id.in_(select(Task.id).where(mine))]),
+        (EmployeeComplaint, EmployeeComplaint.change_seq, [EmployeeComplaint.worker_id == worker.id]),
+        (Tombstone, Tombstone.change_seq, [Tombstone.worker == worker.username]),
+    ]
+
+
+def _upper_bound(session: Session, sources, cursor: int, head: int, limit: int) -> int:
+    """
+    Highest change number to include so a page holds about `limit` rows.
+    Pages end on a whole transaction: every row sharing the last number is included.
+    """
+    seqs = []
+    for _, seq_col, where in sources:
+        seqs += session.exec(
+            select(seq_col).where(*where, seq_col > cursor, seq_col <= head).order_by(seq_col).limit(limit)
+        ).all()
+    if len(seqs) <= limit:
+        return head
+    return sorted(seqs)[limit - 1]
+
+
+@router.get("/sync", response_model=SyncResponse)
+def sync(
+    cursor: Optional[int] = Query(None, ge=0, description="`cursor` from the previous sync; omit for a full snapshot"),
+    limit: int = Query(SYNC_PAGE_SIZE, ge=1, le=5000),
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_session),
+):
+    """
+    Tasks, evidence records and complaint status changes since `cursor`, plus
+    tombstones for deleted tasks / evidence. Without a cursor (or when the
+    cursor is older than the kept tombstones) a full snapshot is returned
+    with `full: true`, and the client should replace its local copy.
+    """
+    if current_user.role != "worker":
+        raise HTTPException(status_code=403, detail="Access forbidden")
+
+    # Read the head first: anything committed after it is left for the next sync
+    head, pruned_through = current_seq(session)
+    sources = _sources(current_user)
+    full = cursor is None or cursor < pruned_through or cursor > head
+
+    if full:
+        lower, upper = None, head
+    else:
+        lower, upper = cursor, _upper_bound(session, sources, cursor, head, limit)
+
+    payload = {"cursor": upper, "has_more": upper < head, "full": full}
+    for key, (model, seq_col, where) in zip(("tasks", "evidence", "complaints", "deleted"), sources):
+        if full and model is Tombstone:
+            payload[key] = []
+            continue
+        query = select(model).where(*where, seq_col <= upper).order_by(seq_col)
+        if lower is not None:
+            query = query.where(seq_col > lower)
+        if model is TaskEvidence:
+            query = query.options(selectinload(TaskEvidence.blob))
+        payload[key] = session.exec(query).all()
+
+    payload["deleted"] = [
+        {"entity": t.entity, "id": t.entity_id, "deleted_at": t.deleted_at} for t in payload["deleted"]
+    ]
+    return SYNC_RESPONSE.response(payload)
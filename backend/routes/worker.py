@@ -1,57 +1,42 @@
 import uuid
 import os
-import aiofiles
+import time
+import logging
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, UploadFile, File
 from sqlmodel import Session, select
 from typing import List
 from datetime import datetime
-from pydantic import BaseModel
 from typing import Optional
 from models.task import Task, TaskStatus, TaskEvidence
+from models.evidence_blob import EvidenceBlob
 from models.user import User, UserRole
 from models.employee_complaint import EmployeeComplaint
 from models.audit_log import AuditLog
 from utils.security import hash_password
 from core.database import get_session
 from utils.security import get_current_user
+from schemas.tasks import TaskRead
+from schemas.users import WorkerRead
+from utils.idempotency import Idempotency, idempotency
+from utils.serialization import TASK_LIST
+from utils.cache import CACHE_TASKS_TTL, cache
+from utils.change_versions import cache_headers, not_modified, task_list_keys, versions
+from utils.event_bus import bus, publish_task
+from utils.fieldsets import FIELDS_QUERY, columns, schema_fields, subset_list
+from utils.uploads import StoredUpload, UploadBudget, sniff_image_type
+from utils.blob_store import discard_blobs, store_uploads, take_blob_refs
+from utils.image_variants import schedule_variants
+from utils.phash_index import report_reuse
+from utils.storage import evidence_url
 
 UPLOAD_DIR = "uploads/tasks"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 ALLOWED_IMAGE_TYPES = {"image/jpeg", "image/png", "image/gif"}
+EVIDENCE_UPLOAD_CONCURRENCY = int(os.getenv("EVIDENCE_UPLOAD_CONCURRENCY", "4"))
 
 router = APIRouter(tags=["Worker"])
-
-# Task response model
-class TaskRead(BaseModel):
-    id: str
-    title: str
-    description: str
-    status: TaskStatus
-    assigned_to: str
-    assigned_by: str
-    created_at: datetime
-    updated_at: datetime
-
-    class Config:
-        from_attributes = True
-
-class TaskEvidenceRead(BaseModel):
-    id: str
-    file_url: str
-    uploaded_at: datetime
-
-    class Config:
-        from_attributes = True
-
-class WorkerRead(BaseModel):
-    id: uuid.UUID
-    username: str
-    role: UserRole
-    created_at: datetime
-
-    class Config:
-        from_attributes = True
+logger = logging.getLogger(__name__)
 
 def log_action(session: Session, performed_by: uuid.UUID, action: str, details: Optional[str] = None):
     print(f"LOGGING: user={performed_by}, action={action}, details={details}")  # debug
@@ -122,33 +107,65 @@ def get_profile(
 # Get assigned tasks
 @router.get("/tasks", response_model=List[TaskRead])
 def get_assigned_tasks(
+    request: Request,
+    fields: Optional[str] = FIELDS_QUERY,
     current_user: User = Depends(get_current_user),
     session: Session = Depends(get_session)
 ):
     if current_user.role != "worker":
         raise HTTPException(status_code=403, detail="Access forbidden")
-    
-    # tasks assigned to this worker
-    statement = select(Task).where(Task.assigned_to == current_user.username)
-    tasks = session.exec(statement).all()
+    names = schema_fields(TaskRead, fields)
+
+    # None of this worker's tasks changed since the last poll → 304, no query (the poll is still audited)
+    etag = versions.etag(*task_list_keys(current_user.username))
+    if cached := not_modified(request, etag):
+        log_action(
+            session,
+            performed_by=current_user.id,
+            action="viewed_assigned_tasks",
+            details=f"Worker '{current_user.username}' viewed their tasks (unchanged since last poll)"
+        )
+        return cached
+
+    def load() -> bytes:
+        # tasks assigned to this worker (only the requested columns); the count rides along for the audit log
+        mine = Task.assigned_to == current_user.username
+        if names is None:
+            tasks = session.exec(select(Task).where(mine)).all()
+            return b"%d\n" % len(tasks) + TASK_LIST.dump(tasks)
+        tasks = session.execute(select(*columns(Task, names)).where(mine)).all()
+        return b"%d\n" % len(tasks) + subset_list(TaskRead, names).dump(tasks)
+
+    # Served from the cache until one of this worker's tasks changes
+    key = f"worker_tasks:{current_user.username}" + (f":{','.join(names)}" if names else "")
+    count, _, body = cache.fetch(
+        key, load, CACHE_TASKS_TTL, tags=task_list_keys(current_user.username)
+    ).partition(b"\n")
+    response = Response(content=body, media_type="application/json", headers=cache_headers(etag))
 
     # ✅ Log the action
     log_action(
         session,
         performed_by=current_user.id,
         action="viewed_assigned_tasks",
-        details=f"Worker '{current_user.username}' viewed {len(tasks)} tasks"
+        details=f"Worker '{current_user.username}' viewed {int(count)} tasks"
     )
 
-    return tasks
+    return response
 
 @router.post("/tasks/{task_id}/evidence")
 async def upload_task_evidence(
     task_id: str,
     files: List[UploadFile] = File(...),   # multiple photos allowed
     session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    idem: Idempotency = Depends(idempotency)
 ):
+    # Retried upload with the same Idempotency-Key → original response, no duplicate files
+    replayed = idem.replay()
+    if replayed:
+        return replayed
+
     task = session.get(Task, task_id)
     if not task:
         raise HTTPException(404, "Task not found")
@@ -161,38 +178,86 @@ async def upload_task_evidence(
     if not files:
         raise HTTPException(400, "At least one evidence photo is required")
 
-    saved_files = []
-    for file in files:
-        if file.content_type not in ALLOWED_IMAGE_TYPES:
-            raise HTTPException(400, f"Invalid file type {file.content_type}")
-
-        file_ext = os.path.splitext(file.filename)[1]
-        saved_filename = f"{uuid.uuid4()}{file_ext}"
-        file_path = os.path.join(UPLOAD_DIR, saved_filename)
+    return idem.save(await attach_evidence(task, files, session, current_user))
 
-        async with aiofiles.open(file_path, "wb") as out_file:
-            content = await file.read()
-            await out_file.write(content)
 
-        evidence = TaskEvidence(task_id=task.id, file_url=file_path)
-        session.add(evidence)
-        saved_files.append(file_path)
+async def attach_evidence(task: Task, files: List[UploadFile], session: Session, current_user: User) -> dict:
+    """
+    Validate, store and record evidence files for a task and mark it completed.
+    Shared by the multipart upload above and resumable uploads (routes/resumable.py).
+    """
+    started = time.perf_counter()
 
-    # ✅ Mark task as completed
+    # ✅ Validate every file by its magic bytes before writing anything
+    content_types = []
+    for file in files:
+        sniffed = await sniff_image_type(file)
+        if sniffed not in ALLOWED_IMAGE_TYPES:
+            raise HTTPException(400, f"Invalid file type for '{file.filename}': only JPEG, PNG and GIF images are allowed")
+        content_types.append(sniffed)
+
+    # Stream into the content-addressed store concurrently; all-or-nothing
+    stored_files = await store_uploads(
+        files, content_types, session, UploadBudget(), concurrency=EVIDENCE_UPLOAD_CONCURRENCY
+    )
+    # ✅ No await from here to the commit: the write transaction stays short
+    take_blob_refs(session, stored_files)
+    return record_evidence(task, stored_files, session, current_user, started)
+
+
+def record_evidence(task: Task, stored_files: List[StoredUpload], session: Session, current_user: User,
+                    started: float) -> dict:
+    """
+    Insert TaskEvidence rows for blobs already in the store (their ref counts taken
+    in this session just before), complete the task and commit. Also used by direct uploads
+    (routes/direct_uploads.py), where the bytes never touch the API.
+    """
+
+    # ✅ One bulk insert + task completion, committed together
+    session.add_all([
+        TaskEvidence(task_id=task.id, file_url=stored.path, blob_id=stored.sha256)
+        for stored in stored_files
+    ])
     task.status = TaskStatus.completed
     session.add(task)
-    session.commit()
+    try:
+        session.commit()
+    except Exception:
+        session.rollback()
+        discard_blobs(stored_files)
+        raise
     session.refresh(task)
+    saved_files = [evidence_url(stored.sha256, stored.path) for stored in stored_files]
+    publish_task("task.completed", task, evidence_count=len(stored_files))
+
+    batch_ms = (time.perf_counter() - started) * 1000
+    total_bytes = sum(stored.size for stored in stored_files)
+    logger.info("Evidence batch for task %s: %d file(s), %d bytes in %.1f ms",
+                task.id, len(stored_files), total_bytes, batch_ms)
+
+    # Thumbnails / web renditions are generated in a process pool, off the request path
+    for stored in stored_files:
+        if stored.created:
+            schedule_variants(stored.sha256, stored.path)
+        else:
+            # Byte-identical to earlier evidence: its hash is known, check for reuse right away
+            blob = session.get(EvidenceBlob, stored.sha256)
+            if blob and blob.phash:
+                report_reuse(session, blob.id, blob.phash)
 
     # ✅ Log audit action
     log_action(
         session,
         performed_by=current_user.id,
         action="uploaded_task_evidence",
-        details=f"Worker '{current_user.username}' uploaded {len(files)} evidence file(s) for task '{task.title}'"
+        details=f"Worker '{current_user.username}' uploaded {len(stored_files)} evidence file(s) for task '{task.title}'"
     )
 
-    return {"message": "Evidence uploaded and task completed", "files": saved_files}
+    return {
+        "message": "Evidence uploaded and task completed",
+        "files": saved_files,
+        "batch": {"count": len(stored_files), "bytes": total_bytes, "elapsed_ms": round(batch_ms, 1)},
+    }
 
 
 @router.patch("/tasks/{task_id}/acknowledge")
@@ -208,6 +273,7 @@ def acknowledge_task(task_id: str, current_user: User = Depends(get_current_user
     task.status = TaskStatus.in_progress
     session.commit()
     session.refresh(task)
+    publish_task("task.acknowledged", task)
 
     # ✅ Log action
     log_action(
@@ -266,6 +332,8 @@ def submit_employee_complaint(
     session.add(complaint)
     session.commit()
     session.refresh(complaint)
+    bus.publish("complaint.created", worker=current_user.username, complaint_id=str(complaint.id),
+                table="EmployeeComplaint", status=complaint.status)
 
     # ✅ Log complaint submission
     log_action(
@@ -0,0 +1,15 @@
+import uuid
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel
+
+# Audit log response schema
+class AuditLogRead(BaseModel):
+    id: uuid.UUID
+    action: str
+    details: Optional[str] = None
+    user_id: uuid.UUID
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
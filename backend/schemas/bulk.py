@@ -0,0 +1,64 @@
+from typing import List, Optional
+from pydantic import BaseModel
+from schemas.tasks import TaskRead
+
+# Bulk request items
+class BulkTaskCreate(BaseModel):
+    title: str
+    description: str
+    assigned_to: str
+
+class BulkTaskUpdate(BaseModel):
+    task_id: str
+    title: Optional[str] = None
+    description: Optional[str] = None
+    status: Optional[str] = None
+
+class BulkWorkerCreate(BaseModel):
+    username: str
+    password: str
+    phone_number: str
+
+class BulkComplaintStatus(BaseModel):
+    complaint_id: str
+    status: str
+
+# Outcome of one item, in request order; status_code is what the single-item endpoint would have answered
+class BulkItemResult(BaseModel):
+    index: int
+    ok: bool
+    status_code: int
+    detail: Optional[str] = None
+
+class BulkTaskResult(BulkItemResult):
+    task: Optional[TaskRead] = None
+    notification: Optional[str] = None  # "queued" or "dropped" (notification buffer full)
+
+class BulkComplaintResult(BulkItemResult):
+    id: Optional[str] = None
+    status: Optional[str] = None
+    table: Optional[str] = None
+
+class BulkWorkerResult(BulkItemResult):
+    username: Optional[str] = None
+    phone_number: Optional[str] = None  # normalized
+    worker_id: Optional[str] = None
+    verification: Optional[str] = None  # "queued" or "dropped" (notification buffer full)
+
+class BulkTaskResponse(BaseModel):
+    succeeded: int
+    failed: int
+    notifications_queued: int = 0
+    results: List[BulkTaskResult]
+
+class BulkComplaintResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkComplaintResult]
+
+class BulkWorkerResponse(BaseModel):
+    succeeded: int
+    failed: int
+    dry_run: bool = False
+    verifications_queued: int = 0
+    results: List[BulkWorkerResult]
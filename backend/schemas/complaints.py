@@ -1,6 +1,6 @@
 import uuid
 from typing import Optional
-from pydantic import BaseModel
+from pydantic import AliasChoices, BaseModel, Field
 from models.complaints import ComplaintCategory, ComplaintStatus
 
 # Request schema for creating a complaint
@@ -16,7 +16,9 @@ class ComplaintRead(BaseModel):
     category: ComplaintCategory
     location: Optional[str]
     status: ComplaintStatus
-    evidence: Optional[str]  # path to file if uploaded
+    # /evidence/{blob_id} if a file was uploaded (admins only), or its uploads/ path while PUBLIC_UPLOADS is on
+    evidence: Optional[str] = Field(validation_alias=AliasChoices("evidence_url", "evidence"))
+    evidence_thumbnail_url: Optional[str] = None  # small preview, once generated
 
     class Config:
         from_attributes = True  # allows reading from ORM objects
@@ -0,0 +1,36 @@
+import uuid
+from datetime import datetime
+from typing import List
+from pydantic import BaseModel
+from models.employee_complaint import EmployeeComplaintStatus
+from schemas.tasks import TaskEvidenceRead, TaskRead
+
+# Evidence record in a sync payload (flat, so it carries its task id)
+class SyncEvidence(TaskEvidenceRead):
+    task_id: str
+
+# Worker's own complaint and its current status
+class SyncComplaint(BaseModel):
+    id: uuid.UUID
+    description: str
+    status: EmployeeComplaintStatus
+    submitted_at: datetime
+
+    class Config:
+        from_attributes = True
+
+# Something the client should drop: entity is "task" or "evidence"
+class SyncDeleted(BaseModel):
+    entity: str
+    id: str
+    deleted_at: datetime
+
+# GET /worker/sync
+class SyncResponse(BaseModel):
+    cursor: int  # pass back as ?cursor= next time
+    has_more: bool  # more changes after `cursor`: call again right away
+    full: bool  # full snapshot: replace local state instead of merging
+    tasks: List[TaskRead] = []
+    evidence: List[SyncEvidence] = []
+    complaints: List[SyncComplaint] = []
+    deleted: List[SyncDeleted] = []
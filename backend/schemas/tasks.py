@@ -0,0 +1,36 @@
+from datetime import datetime
+from typing import List, Optional
+from pydantic import AliasChoices, BaseModel, Field
+from models.task import TaskStatus
+
+# Evidence attached to a task
+class TaskEvidenceRead(BaseModel):
+    id: str
+    # /evidence/{blob_id} (TaskEvidence.url), or the raw uploads/ path while PUBLIC_UPLOADS is on
+    file_url: str = Field(validation_alias=AliasChoices("url", "file_url"))
+    blob_id: Optional[str] = None
+    thumbnail_url: Optional[str] = None  # small preview, once generated
+    web_url: Optional[str] = None  # size-capped rendition, once generated
+    phash: Optional[str] = None  # perceptual hash, once generated
+    uploaded_at: datetime
+
+    class Config:
+        from_attributes = True
+
+# Task without its evidence (worker task list, create/update responses)
+class TaskRead(BaseModel):
+    id: str
+    title: str
+    description: str
+    status: TaskStatus
+    assigned_to: str
+    assigned_by: str
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+# Task with its evidence (admin views); reads Task.evidences straight off the ORM row
+class TaskWithEvidenceRead(TaskRead):
+    evidence: List[TaskEvidenceRead] = Field(default=[], validation_alias=AliasChoices("evidence", "evidences"))
@@ -0,0 +1,16 @@
+import uuid
+from datetime import datetime
+from pydantic import BaseModel
+from models.user import UserRole, UserStatus
+
+# Worker response schema
+class WorkerRead(BaseModel):
+    id: uuid.UUID
+    username: str
+    role: UserRole
+    status: UserStatus
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
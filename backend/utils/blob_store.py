@@ -0,0 +1,182 @@
+import asyncio
+import os
+import uuid
+
+import aiofiles.os
+from fastapi import UploadFile
+from sqlalchemy import update
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import Session, select
+
+from models.evidence_blob import EvidenceBlob
+from utils.evidence_gc import schedule_reclaim
+from utils.storage import get_storage
+from utils.uploads import MAX_UPLOAD_FILE_BYTES, StoredUpload, UploadBudget, stream_to_temp
+
+BLOB_DIR = os.path.join("uploads", "blobs")
+BLOB_TMP_DIR = os.path.join(BLOB_DIR, "tmp")
+os.makedirs(BLOB_TMP_DIR, exist_ok=True)
+
+
+def blob_path(sha256: str, ext: str = "") -> str:
+    """
+    Sharded location of a blob: uploads/blobs/ab/cd/abcd...<ext>
+    """
+    return os.path.join(BLOB_DIR, sha256[:2], sha256[2:4], f"{sha256}{ext.lower()}")
+
+
+def add_blob_ref(session: Session, sha256: str, path: str, size: int, content_type: str | None) -> str:
+    """
+    Insert the blob row or bump its reference count (one statement, race-free).
+    Returns the stored path, which is the first uploader's if the blob already existed.
+    Caller commits.
+    """
+    stmt = insert(EvidenceBlob).values(
+        id=sha256, path=path, size=size, content_type=content_type, ref_count=1,
+    ).on_conflict_do_update(
+        index_elements=[EvidenceBlob.id],
+        set_={"ref_count": EvidenceBlob.ref_count + 1},
+    ).returning(EvidenceBlob.path)
+    return session.execute(stmt).scalar_one()
+
+
+def release_blob_ref(session: Session, blob_id: str) -> str | None:
+    """
+    Drop one reference. Returns the file path if this was the last reference
+    (the row is deleted; the caller removes the file after committing).
+    """
+    session.execute(
+        update(EvidenceBlob).where(EvidenceBlob.id == blob_id).values(ref_count=EvidenceBlob.ref_count - 1)
+    )
+    blob = session.get(EvidenceBlob, blob_id)
+    if blob is not None and blob.ref_count <= 0:
+        session.delete(blob)
+        return blob.path
+    return None
+
+
+def existing_blob_path(session: Session, sha256: str) -> str | None:
+    # A plain read: pysqlite only opens a transaction for writes, so no lock is held afterwards
+    return session.exec(select(EvidenceBlob.path).where(EvidenceBlob.id == sha256)).first()
+
+
+def take_blob_refs(session: Session, stored_files: list[StoredUpload]):
+    """
+    Take one reference per stored file. Call it right before session.commit(),
+    with no await in between: the upserts open SQLite's write transaction, and
+    holding it across I/O would block every other writer in the app.
+    """
+    for stored in stored_files:
+        path = add_blob_ref(session, stored.sha256, stored.path, stored.size, stored.content_type)
+        if path != stored.path:
+            # Another upload registered these bytes under a different name meanwhile; use theirs
+            if stored.created:
+                schedule_reclaim([stored.path])
+            stored.path, stored.created = path, False
+
+
+def discard_blobs(stored_files: list[StoredUpload]):
+    """
+    Undo the placement of files whose references were not committed. Goes
+    through the reclaimer, which only deletes a file no row points at: a
+    concurrent upload of the same bytes may have committed a reference to it.
+    """
+    schedule_reclaim([stored.path for stored in stored_files if stored.created])
+
+
+async def _stream(file: UploadFile, budget: UploadBudget | None, max_file_bytes: int) -> tuple[str, str, int]:
+    tmp_path = os.path.join(BLOB_TMP_DIR, f"{uuid.uuid4()}.part")
+    sha256, size = await stream_to_temp(file, tmp_path, budget, max_file_bytes)
+    return tmp_path, sha256, size
+
+
+async def _place(tmp_path: str, path: str, content_type: str | None) -> bool:
+    """
+    Move a streamed temp file to `path` unless the blob is already there.
+    Returns True if the file was created. The temp file is always removed.
+    """
+    storage = get_storage()
+    try:
+        created = not await asyncio.to_thread(storage.exists, path)
+        if created:
+            await asyncio.to_thread(storage.put_file, tmp_path, path, content_type)
+        return created
+    finally:
+        if await aiofiles.os.path.exists(tmp_path):
+            await aiofiles.os.remove(tmp_path)
+
+
+async def store_upload(file: UploadFile, session: Session, budget: UploadBudget | None = None,
+                       max_file_bytes: int = MAX_UPLOAD_FILE_BYTES, content_type: str | None = None) -> StoredUpload:
+    """
+    Stream an upload into the content-addressed store.
+
+    The bytes are hashed while they are written to a temp file. If a blob with
+    that hash already exists the temp file is dropped, so a duplicate costs a
+    hash and a metadata row, not disk space. New blobs are moved into the
+    configured storage backend (utils/storage.py).
+
+    Nothing is written to the DB here: the caller takes the reference with
+    take_blob_refs() right before committing, and calls discard_blobs() if
+    that commit fails.
+    """
+    tmp_path, sha256, size = await _stream(file, budget, max_file_bytes)
+    ext = os.path.splitext(file.filename or "")[1]
+    content_type = content_type or file.content_type
+    path = existing_blob_path(session, sha256) or blob_path(sha256, ext)
+    created = await _place(tmp_path, path, content_type)
+    return StoredUpload(path=path, sha256=sha256, size=size, created=created, content_type=content_type)
+
+
+async def store_uploads(files: list[UploadFile], content_types: list[str], session: Session,
+                        budget: UploadBudget | None = None, concurrency: int = 4) -> list[StoredUpload]:
+    """
+    Store several uploads: stream and hash them concurrently (at most
+    `concurrency` at once), then place each distinct blob once, so files with
+    identical bytes in one batch share a single placement and only the first
+    reports `created`.
+
+    All-or-nothing: if any file fails, the others are awaited, temp files and
+    the blob files this call created are discarded and the first error is
+    re-raised. Like store_upload, no DB writes: the caller takes the references
+    (one per file) and commits.
+    """
+    sem = asyncio.Semaphore(concurrency)
+
+    async def stream(file: UploadFile) -> tuple[str, str, int]:
+        async with sem:
+            return await _stream(file, budget, MAX_UPLOAD_FILE_BYTES)
+
+    # 1️⃣ Stream + hash everything
+    streamed = await asyncio.gather(*(stream(f) for f in files), return_exceptions=True)
+    errors = [r for r in streamed if isinstance(r, BaseException)]
+    if errors:
+        for result in streamed:
+            if not isinstance(result, BaseException):
+                await aiofiles.os.remove(result[0])
+        raise errors[0]
+
+    # 2️⃣ One placement per distinct hash; duplicates drop their temp file
+    stored, pending = [], {}  # pending: sha256 -> (temp file, first StoredUpload with that hash)
+    for file, content_type, (tmp_path, sha256, size) in zip(files, content_types, streamed):
+        if sha256 in pending:
+            await aiofiles.os.remove(tmp_path)
+            stored.append(StoredUpload(path=pending[sha256][1].path, sha256=sha256, size=size, created=False,
+                                       content_type=content_type))
+            continue
+        ext = os.path.splitext(file.filename or "")[1]
+        path = existing_blob_path(session, sha256) or blob_path(sha256, ext)
+        blob = StoredUpload(path=path, sha256=sha256, size=size, content_type=content_type)
+        pending[sha256] = (tmp_path, blob)
+        stored.append(blob)
+
+    # 3️⃣ Place the distinct blobs concurrently
+    placed = await asyncio.gather(*(_place(tmp_path, blob.path, blob.content_type)
+                                    for tmp_path, blob in pending.values()), return_exceptions=True)
+    for (_, blob), created in zip(pending.values(), placed):
+        blob.created = created is True
+    errors = [r for r in placed if isinstance(r, BaseException)]
+    if errors:
+        discard_blobs([blob for _, blob in pending.values()])
+        raise errors[0]
+    return stored
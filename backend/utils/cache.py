@@ -0,0 +1,227 @@
+"""
+Read-through cache for hot read endpoints (the worker task list and the
+public complaint list).
+
+Entries are serialized response bodies stored under a key plus the current
+version of each tag the entry depends on. Tags are the change-version keys
+("complaint", "task:*", "task:<username>", ...), read from the same counters
+that build the list ETags (utils/change_versions.py): when a commit bumps a
+key, every entry built from the old data stops matching at once and ages out,
+in every process that shares those counters. A body is never served under a
+newer ETag than the data it was built from. Versions are read before the
+loader runs, so a write that commits while an entry is being built leaves that
+entry under the old version, where nobody looks it up. Each entry also has its
+own TTL as a safety net for writes made outside the app.
+
+Backends (CACHE_BACKEND):
+
+- memory (default): bounded LRU in this process (CACHE_MAX_BYTES / CACHE_MAX_ENTRIES).
+- redis: shared by every API process (CACHE_REDIS_URL, needs the `redis`
+  package). Requires CHANGE_VERSIONS_BACKEND=redis: with per-process versions
+  no two processes would build the same key.
+- none: caching disabled.
+
+The cache never fails a request: backend errors fall back to the loader.
+"""
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional
+
+from utils.change_versions import versions
+
+logger = logging.getLogger(__name__)
+
+# Config
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").lower()
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+CACHE_KEY_PREFIX = os.getenv("CACHE_KEY_PREFIX", "fieldworker:")
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+CACHE_TASKS_TTL = float(os.getenv("CACHE_TASKS_TTL", "60"))  # seconds
+CACHE_COMPLAINTS_TTL = float(os.getenv("CACHE_COMPLAINTS_TTL", "300"))
+
+
+# -------------------------
+# Backends
+# -------------------------
+class CacheBackend:
+    """
+    Interface shared by the backends. Values are bytes.
+    """
+    name = "none"
+
+    def get(self, key: str) -> Optional[bytes]:
+        return None
+
+    def set(self, key: str, value: bytes, ttl: float):
+        pass
+
+    def usage(self) -> dict:
+        return {}
+
+
+class MemoryBackend(CacheBackend):
+    """
+    LRU map of key → (value, expires_at), bounded by total size and entry count.
+    """
+    name = "memory"
+
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[bytes, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _size(key: str, value: bytes) -> int:
+        return sys.getsizeof(key) + sys.getsizeof(value)
+
+    def _drop(self, key: str):
+        value, _ = self._entries.pop(key)
+        self.bytes -= self._size(key, value)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: str, value: bytes, ttl: float):
+        size = self._size(key, value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self.bytes += size
+            while self.bytes > self.max_bytes or len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def usage(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "max_entries": self.max_entries,
+                "evictions": self.evictions,
+            }
+
+
+class RedisBackend(CacheBackend):
+    name = "redis"
+
+    def __init__(self, url: str = CACHE_REDIS_URL, prefix: str = CACHE_KEY_PREFIX):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("CACHE_BACKEND=redis needs the 'redis' package (pip install redis)") from e
+        # Short timeouts: a slow cache must not be slower than the query it saves
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: float):
+        self.client.set(self.prefix + key, value, px=max(1, int(ttl * 1000)))
+
+    def usage(self) -> dict:
+        memory = self.client.info("memory")
+        return {
+            "entries": self.client.dbsize(),
+            "bytes": memory.get("used_memory"),
+            "max_bytes": memory.get("maxmemory"),
+            "policy": memory.get("maxmemory_policy"),
+        }
+
+
+# -------------------------
+# Read-through cache
+# -------------------------
+class ReadThroughCache:
+    def __init__(self, backend: CacheBackend, counters=None):
+        self.backend = backend
+        # Versions come from the change-version counters, so entries and ETags can't disagree
+        self.counters = counters or versions.counters
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _count(self, field: str):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def fetch(self, key: str, loader: Callable[[], bytes], ttl: float, tags: Iterable[str] = ()) -> bytes:
+        """
+        Cached value for `key`, or `loader()` stored for `ttl` seconds. The
+        entry stops matching as soon as any of `tags` is bumped.
+        """
+        tags = sorted(tags)
+        try:
+            epoch, current = self.counters.read(tags)
+            full_key = f"{key}|{epoch}." + ".".join(map(str, current))
+            value = self.backend.get(full_key)
+        except Exception as e:
+            logger.warning("Cache read failed for %s: %s", key, e)
+            self._count("errors")
+            return loader()
+
+        if value is not None:
+            self._count("hits")
+            return value
+
+        self._count("misses")
+        value = loader()
+        try:
+            self.backend.set(full_key, value, ttl)
+        except Exception as e:
+            logger.warning("Cache write failed for %s: %s", key, e)
+            self._count("errors")
+        return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            counters = {
+                "backend": self.backend.name,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "errors": self.errors,
+            }
+        try:
+            counters["usage"] = self.backend.usage()
+        except Exception as e:
+            counters["usage"] = {"error": str(e)}
+        return counters
+
+
+def _backend() -> CacheBackend:
+    if CACHE_BACKEND == "redis":
+        if versions.counters.name != "redis":
+            # Entries are keyed on the versions: per-process ones would never be shared
+            raise RuntimeError("CACHE_BACKEND=redis needs CHANGE_VERSIONS_BACKEND=redis")
+        return RedisBackend()
+    if CACHE_BACKEND == "memory":
+        return MemoryBackend()
+    if CACHE_BACKEND == "none":
+        return CacheBackend()
+    raise RuntimeError(f"Unknown CACHE_BACKEND '{CACHE_BACKEND}' (expected 'memory', 'redis' or 'none')")
+
+
+cache = ReadThroughCache(_backend())
@@ -0,0 +1,212 @@
+"""
+Per-table change counters for cheap conditional GETs.
+
+Every committed write bumps the version of the tables it touched, so a list
+endpoint can build its ETag from a few counters and answer If-None-Match with
+304 before running any query. Task writes also bump a per-worker key
+("task:<username>", for both the old and new assignee), so a worker's poll
+only misses when their own tasks change.
+
+Writes are picked up from Session events rather than in each route: ORM
+changes in after_flush, bulk UPDATE/DELETE/INSERT statements in
+do_orm_execute (those can't be attributed to a worker, so they bump
+"task:*", which every worker's ETag includes). Versions are applied only
+after the transaction commits, and dropped on rollback. The read-through
+cache (utils/cache.py) keys its entries on the same counters.
+
+Where the counters live (CHANGE_VERSIONS_BACKEND):
+
+- memory (default): this process only. With several API processes one of
+  them would answer 304 after another one's write, so run a single process.
+- redis: shared by every API process (CHANGE_VERSIONS_REDIS_URL, needs the
+  `redis` package). Required for CACHE_BACKEND=redis (utils/cache.py).
+"""
+import hashlib
+import logging
+import os
+import secrets
+import threading
+from typing import Optional
+
+from fastapi import Request, Response
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from models.task import Task
+
+logger = logging.getLogger(__name__)
+
+# Config
+CHANGE_VERSIONS_BACKEND = os.getenv("CHANGE_VERSIONS_BACKEND", "memory").lower()
+CHANGE_VERSIONS_REDIS_URL = os.getenv("CHANGE_VERSIONS_REDIS_URL", "redis://localhost:6379/0")
+CHANGE_VERSIONS_KEY_PREFIX = os.getenv("CHANGE_VERSIONS_KEY_PREFIX", "fieldworker:version:")
+
+_PENDING = "change_versions.pending"
+
+
+# -------------------------
+# Counter stores
+# -------------------------
+class MemoryCounters:
+    name = "memory"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions: dict[str, int] = {}
+        # Counters restart at 0 with the process; the boot token keeps old ETags from matching
+        self._epoch = secrets.token_hex(4)
+
+    def incr(self, keys):
+        with self._lock:
+            for key in keys:
+                self._versions[key] = self._versions.get(key, 0) + 1
+
+    def read(self, keys: list[str]) -> tuple[str, list[int]]:
+        with self._lock:
+            return self._epoch, [self._versions.get(key, 0) for key in keys]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._versions)
+
+
+class RedisCounters:
+    """
+    Counters shared by every API process. An epoch key plays the part of the
+    boot token: if Redis loses its data the epoch changes with the counters.
+    """
+    name = "redis"
+
+    def __init__(self, url: str = CHANGE_VERSIONS_REDIS_URL, prefix: str = CHANGE_VERSIONS_KEY_PREFIX):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("CHANGE_VERSIONS_BACKEND=redis needs the 'redis' package (pip install redis)") from e
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.prefix = prefix
+        self._epoch_key = f"{prefix}__epoch__"
+
+    def incr(self, keys):
+        pipe = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipe.incr(self.prefix + key)
+        pipe.execute()
+
+    def read(self, keys: list[str]) -> tuple[str, list[int]]:
+        epoch, *values = self.client.mget([self._epoch_key, *(self.prefix + key for key in keys)])
+        if epoch is None:
+            self.client.set(self._epoch_key, secrets.token_hex(4), nx=True)
+            epoch = self.client.get(self._epoch_key)
+        return epoch.decode(), [int(value or 0) for value in values]
+
+    def snapshot(self) -> dict:
+        keys = [key for key in self.client.scan_iter(match=self.prefix + "*") if key != self._epoch_key.encode()]
+        values = self.client.mget(keys) if keys else []
+        return {key.decode()[len(self.prefix):]: int(value or 0) for key, value in zip(keys, values)}
+
+
+class ChangeVersions:
+    def __init__(self, counters=None):
+        self.counters = counters or MemoryCounters()
+
+    def bump(self, keys):
+        try:
+            self.counters.incr(keys)
+        except Exception as e:
+            # ETags and cached bodies for these keys stay as they were until the next successful bump
+            logger.error("Change version bump failed for %s: %s", sorted(keys), e)
+
+    def etag(self, *keys: str) -> str:
+        try:
+            epoch, values = self.counters.read(list(keys))
+        except Exception as e:
+            # An ETag nothing matches: the request is answered in full
+            logger.warning("Change version read failed for %s: %s", keys, e)
+            return f'W/"{secrets.token_hex(8)}"'
+        current = [f"{key}={value}" for key, value in zip(keys, values)]
+        digest = hashlib.blake2b(" ".join([epoch, *current]).encode(), digest_size=8).hexdigest()
+        return f'W/"{digest}"'
+
+    def snapshot(self) -> dict:
+        return self.counters.snapshot()
+
+
+def _counters():
+    if CHANGE_VERSIONS_BACKEND == "redis":
+        return RedisCounters()
+    if CHANGE_VERSIONS_BACKEND == "memory":
+        return MemoryCounters()
+    raise RuntimeError(f"Unknown CHANGE_VERSIONS_BACKEND '{CHANGE_VERSIONS_BACKEND}' (expected 'memory' or 'redis')")
+
+
+versions = ChangeVersions(_counters())
+
+
+def task_list_keys(username: str) -> tuple[str, str]:
+    return ("task:*", f"task:{username}")
+
+
+# -------------------------
+# Session hooks
+# -------------------------
+def _pending(session: Session) -> set:
+    return session.info.setdefault(_PENDING, set())
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed(session: Session, flush_context):
+    keys = _pending(session)
+    for obj in [*session.new, *session.deleted, *(o for o in session.dirty if session.is_modified(o))]:
+        table = getattr(obj, "__table__", None)
+        if table is None:
+            continue
+        keys.add(table.name)
+        if isinstance(obj, Task):
+            keys.add(f"task:{obj.assigned_to}")
+            previous = inspect(obj).attrs.assigned_to.history.deleted
+            keys.update(f"task:{name}" for name in previous if name)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk(state):
+    if not (state.is_update or state.is_delete or state.is_insert):
+        return
+    table = state.statement.table
+    keys = _pending(state.session)
+    keys.add(table.name)
+    if table.name == Task.__tablename__:
+        keys.add("task:*")
+
+
+@event.listens_for(Session, "after_commit")
+def _apply(session: Session):
+    keys = session.info.pop(_PENDING, None)
+    if keys:
+        versions.bump(keys)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session: Session):
+    session.info.pop(_PENDING, None)
+
+
+# -------------------------
+# Conditional GET
+# -------------------------
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """
+    304 response if the request's If-None-Match matches `etag` (weak comparison), else None.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    opaque = etag.removeprefix("W/")
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if opaque in tags or "*" in tags:
+        return Response(status_code=304, headers=cache_headers(etag))
+    return None
+
+
+def cache_headers(etag: str) -> dict:
+    # Clients may keep the body but must revalidate on every poll
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
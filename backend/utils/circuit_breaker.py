@@ -0,0 +1,184 @@
+import threading
+import time
+from collections import deque
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised when a call is rejected because the circuit is open.
+    """
+
+
+# -------------------------
+# Circuit breaker
+# -------------------------
+class CircuitBreaker:
+    """
+    Classic three-state breaker (closed → open → half_open → closed).
+
+    - closed: calls go through, consecutive failures are counted.
+    - open: calls fail fast until `recovery_timeout` seconds have passed.
+    - half_open: up to `half_open_max_calls` probe calls are let through;
+      a success closes the circuit, a failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0,
+                 half_open_max_calls: int = 1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+
+        # Counters for the status endpoint
+        self.total_calls = 0
+        self.total_failures = 0
+        self.total_rejected = 0
+        self.last_failure: str | None = None
+        self.last_state_change = time.time()
+
+    def _set_state(self, state: str):
+        if state != self._state:
+            self._state = state
+            self.last_state_change = time.time()
+
+    def _refresh(self):
+        # Open → half_open once the recovery window has elapsed
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._set_state(self.HALF_OPEN)
+            self._half_open_in_flight = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._refresh()
+            return self._state
+
+    def allow_request(self) -> bool:
+        """
+        Reserve a slot for a call. Returns False if the call must fail fast.
+        """
+        with self._lock:
+            self._refresh()
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and self._half_open_in_flight < self.half_open_max_calls:
+                self._half_open_in_flight += 1
+                return True
+            self.total_rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.total_calls += 1
+            self._consecutive_failures = 0
+            self._set_state(self.CLOSED)
+
+    def record_failure(self, reason: str | None = None):
+        with self._lock:
+            self.total_calls += 1
+            self.total_failures += 1
+            self.last_failure = reason
+            self._consecutive_failures += 1
+            if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                self._half_open_in_flight = 0
+                self._opened_at = time.monotonic()
+                self._set_state(self.OPEN)
+
+    def release(self):
+        """
+        Give back a half-open probe slot. Call it in a `finally` after every
+        allowed call: once the outcome was recorded the circuit has left
+        half_open and this does nothing, otherwise (the call raised before
+        reaching the provider) the slot would be lost and the circuit would
+        stay half_open, rejecting everything.
+        """
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            self._refresh()
+            retry_in = None
+            if self._state == self.OPEN:
+                retry_in = max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at))
+            return {
+                "name": self.name,
+                "state": self._state,
+                "consecutive_failures": self._consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "recovery_timeout": self.recovery_timeout,
+                "retry_in_seconds": round(retry_in, 2) if retry_in is not None else None,
+                "total_calls": self.total_calls,
+                "total_failures": self.total_failures,
+                "total_rejected": self.total_rejected,
+                "last_failure": self.last_failure,
+                "last_state_change": self.last_state_change,
+            }
+
+
+# -------------------------
+# Adaptive timeout
+# -------------------------
+class AdaptiveTimeout:
+    """
+    Derive a request timeout from recent latencies.
+
+    timeout = clamp(percentile(latencies) * multiplier, min_timeout, max_timeout)
+
+    Until `min_samples` latencies have been observed the maximum is used.
+    """
+
+    def __init__(self, min_timeout: float = 2.0, max_timeout: float = 15.0, percentile: float = 0.99,
+                 multiplier: float = 2.0, window: int = 200, min_samples: int = 20):
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.min_samples = min_samples
+        self._samples: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, latency: float):
+        with self._lock:
+            self._samples.append(latency)
+
+    def _quantile(self, q: float) -> float | None:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(q * len(ordered)))
+        return ordered[index]
+
+    @property
+    def timeout(self) -> float:
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return self.max_timeout
+            value = self._quantile(self.percentile) * self.multiplier
+        return min(self.max_timeout, max(self.min_timeout, value))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            p50 = self._quantile(0.5)
+            p99 = self._quantile(self.percentile)
+            samples = len(self._samples)
+        return {
+            "current_timeout": round(self.timeout, 3),
+            "samples": samples,
+            "p50_latency": round(p50, 3) if p50 is not None else None,
+            "p_latency": round(p99, 3) if p99 is not None else None,
+            "percentile": self.percentile,
+            "min_timeout": self.min_timeout,
+            "max_timeout": self.max_timeout,
+        }
@@ -0,0 +1,171 @@
+"""
+Response compression negotiated from Accept-Encoding: brotli, zstd or gzip.
+
+Built on Starlette's GZip responder, which already handles the size threshold,
+streaming bodies (each chunk is flushed so clients see data as it is produced),
+206 responses, bodies that are already encoded and excluded content types.
+This module adds the choice of encoder and path exclusions for routes that
+serve photos and archives.
+
+brotli and zstandard are optional; encodings whose library is missing are not offered.
+"""
+import os
+import zlib
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import DEFAULT_EXCLUDED_CONTENT_TYPES, IdentityResponder
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Config
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_ENCODINGS = os.getenv("COMPRESSION_ENCODINGS", "br,zstd,gzip")  # server preference order
+COMPRESSION_EXCLUDE_PATHS = os.getenv("COMPRESSION_EXCLUDE_PATHS", "/uploads,/evidence,/admin/exports")
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+ZSTD_LEVEL = int(os.getenv("ZSTD_LEVEL", "3"))
+
+# Chunks at least this big are compressed off the event loop
+THREAD_MIN_SIZE = 128 * 1024
+
+
+# -------------------------
+# Encoders
+# -------------------------
+class GzipEncoder:
+    def __init__(self):
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        flush = zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+        return self._compressor.compress(data) + self._compressor.flush(flush)
+
+
+class BrotliEncoder:
+    def __init__(self):
+        self._compressor = brotli.Compressor(mode=brotli.MODE_TEXT, quality=BROTLI_QUALITY)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        out = self._compressor.process(data)
+        return out + (self._compressor.finish() if final else self._compressor.flush())
+
+
+class ZstdEncoder:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        flush = zstandard.COMPRESSOBJ_FLUSH_FINISH if final else zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        return self._compressor.compress(data) + self._compressor.flush(flush)
+
+
+ENCODERS = {"gzip": GzipEncoder}
+if brotli:
+    ENCODERS["br"] = BrotliEncoder
+if zstandard:
+    ENCODERS["zstd"] = ZstdEncoder
+
+
+def negotiate(accept_encoding: str, offered: list[str]) -> str | None:
+    """
+    Pick the encoding to use for an Accept-Encoding header: highest q-value
+    first, then server preference (the order of `offered`). None means identity.
+    """
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[coding] = q
+    wildcard = weights.get("*", 0.0)
+    best, best_q = None, 0.0
+    for coding in offered:
+        q = weights.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+# -------------------------
+# Middleware
+# -------------------------
+class EncodedResponder(IdentityResponder):
+    def __init__(self, app: ASGIApp, encoding: str, minimum_size: int, exclude_content_types: tuple[str, ...]):
+        super().__init__(app, minimum_size, exclude_content_types=exclude_content_types)
+        self.content_encoding = encoding
+        self._encoder = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        async def send_weak_etag(message: Message):
+            # The compressed body is a different representation: a strong ETag would be wrong for it
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                etag = headers.get("etag")
+                if headers.get("content-encoding") == self.content_encoding and etag and not etag.startswith("W/"):
+                    headers["ETag"] = "W/" + etag
+            await send(message)
+
+        await super().__call__(scope, receive, send_weak_etag)
+
+    async def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if self._encoder is None:
+            self._encoder = ENCODERS[self.content_encoding]()
+        if len(body) >= THREAD_MIN_SIZE:
+            return await anyio.to_thread.run_sync(self._encoder.compress, body, not more_body)
+        return self._encoder.compress(body, not more_body)
+
+
+class CompressionMiddleware:
+    """
+    Compress responses of at least `minimum_size` bytes with the best encoding
+    the client accepts. Paths under `exclude_paths` are passed through untouched.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = COMPRESSION_MIN_SIZE,
+        encodings: str = COMPRESSION_ENCODINGS,
+        exclude_paths: str = COMPRESSION_EXCLUDE_PATHS,
+        exclude_content_types: tuple[str, ...] = DEFAULT_EXCLUDED_CONTENT_TYPES,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.offered = [e.strip() for e in encodings.split(",") if e.strip() in ENCODERS]
+        self.exclude_paths = tuple(p.strip().rstrip("/") for p in exclude_paths.split(",") if p.strip())
+        self.exclude_content_types = exclude_content_types
+
+    def _excluded(self, path: str) -> bool:
+        return any(path == prefix or path.startswith(prefix + "/") for prefix in self.exclude_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self._excluded(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""), self.offered)
+        if encoding is None:
+            # Still goes through the responder so Vary: Accept-Encoding is set on compressible responses
+            responder = IdentityResponder(self.app, self.minimum_size, exclude_content_types=self.exclude_content_types)
+        else:
+            responder = EncodedResponder(self.app, encoding, self.minimum_size, self.exclude_content_types)
+        await responder(scope, receive, send)
@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Callable, Hashable, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+
+class BufferFull(Exception):
+    """
+    Raised when the buffer is at capacity and the event cannot be accepted.
+    """
+
+
+# -------------------------
+# Batching buffer
+# -------------------------
+class BatchBuffer:
+    """
+    In-memory buffer that collects events and hands them to `sink` in batches.
+
+    - `key`: optional function; events with the same key are coalesced into one,
+      later non-null fields winning (e.g. several delivery reports for one messageId).
+    - Flushes happen every `flush_interval` seconds from `run()`, or as soon as
+      `batch_size` events are pending.
+    - `sink(list_of_events)` runs in the threadpool so DB writes don't block
+      the event loop.
+    - A batch the sink fails on goes back into the buffer and is retried, with
+      the flush interval doubling up to `max_retry_interval` while failures
+      continue. Events are only lost if the process stops before they are
+      written. Sinks must therefore be safe to repeat (upserts, idempotency keys).
+    """
+
+    def __init__(self, name: str, sink: Callable[[list], None], key: Optional[Callable[[dict], Hashable]] = None,
+                 batch_size: int = 500, flush_interval: float = 0.5, max_pending: int = 50000,
+                 max_retry_interval: float = 30.0):
+        self.name = name
+        self.sink = sink
+        self.key = key
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_retry_interval = max_retry_interval
+
+        self._lock = threading.Lock()
+        self._pending: dict | list = {} if key else []
+        self._wakeup: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+        # Metrics
+        self.accepted = 0
+        self.coalesced = 0
+        self.flushed = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.requeued = 0
+        self.consecutive_failures = 0
+        self.last_flush_seconds: float | None = None
+
+    def add(self, event: dict):
+        with self._lock:
+            if self.key:
+                k = self.key(event)
+                if k in self._pending:
+                    self.coalesced += 1
+                    merged = dict(self._pending[k])
+                    merged.update({f: v for f, v in event.items() if v is not None})
+                    event = merged
+                elif len(self._pending) >= self.max_pending:
+                    raise BufferFull(f"{self.name} buffer is full")
+                self._pending[k] = event
+            else:
+                if len(self._pending) >= self.max_pending:
+                    raise BufferFull(f"{self.name} buffer is full")
+                self._pending.append(event)
+            self.accepted += 1
+            full = len(self._pending) >= self.batch_size
+
+        if full and self._wakeup is not None and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def _take(self) -> list:
+        with self._lock:
+            if not self._pending:
+                return []
+            if self.key:
+                batch = list(self._pending.values())
+                self._pending = {}
+            else:
+                batch = self._pending
+                self._pending = []
+            return batch
+
+    def _requeue(self, events: list):
+        """
+        Put unwritten events back in front of the pending ones. Events added
+        since were newer, so their non-null fields win when keys collide.
+        The capacity check is skipped: these were already accepted.
+        """
+        with self._lock:
+            if self.key:
+                pending = {}
+                for event in events:
+                    pending[self.key(event)] = event
+                for k, event in self._pending.items():
+                    if k in pending:
+                        merged = dict(pending[k])
+                        merged.update({f: v for f, v in event.items() if v is not None})
+                        event = merged
+                    pending[k] = event
+                self._pending = pending
+            else:
+                self._pending = events + self._pending
+            self.requeued += len(events)
+
+    def flush(self) -> int:
+        """
+        Synchronously write everything pending. Returns the number of events written.
+        If the sink fails, that chunk and the rest of the batch are put back for
+        the next flush.
+        """
+        batch = self._take()
+        written = 0
+        for start in range(0, len(batch), self.batch_size):
+            chunk = batch[start:start + self.batch_size]
+            started = time.monotonic()
+            try:
+                self.sink(chunk)
+            except Exception as e:
+                self.failed_batches += 1
+                self.consecutive_failures += 1
+                logger.error("%s flush failed, %d events kept for retry: %s", self.name, len(batch) - start, e)
+                self._requeue(batch[start:])
+                break
+            self.consecutive_failures = 0
+            self.last_flush_seconds = time.monotonic() - started
+            self.batches += 1
+            self.flushed += len(chunk)
+            written += len(chunk)
+        return written
+
+    async def run(self):
+        """
+        Background loop started from the app lifespan.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        try:
+            while True:
+                if self.consecutive_failures:
+                    # Back off while the sink keeps failing; a full buffer doesn't cut the wait short
+                    delay = min(self.max_retry_interval, self.flush_interval * 2 ** self.consecutive_failures)
+                    await asyncio.sleep(delay)
+                else:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                self._wakeup.clear()
+                await run_in_threadpool(self.flush)
+        finally:
+            # Drain on shutdown
+            await run_in_threadpool(self.flush)
+            with self._lock:
+                lost = len(self._pending)
+            if lost:
+                logger.error("%s stopped with %d unwritten events", self.name, lost)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "pending": pending,
+            "accepted": self.accepted,
+            "coalesced": self.coalesced,
+            "flushed": self.flushed,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "requeued": self.requeued,
+            "consecutive_failures": self.consecutive_failures,
+            "last_flush_seconds": round(self.last_flush_seconds, 4) if self.last_flush_seconds is not None else None,
+        }
@@ -0,0 +1,172 @@
+"""
+In-process pub/sub for task and complaint changes, pushed to clients over
+WebSocket / SSE (routes/events.py).
+
+Routes publish after their commit. Admins receive every event; a worker only
+receives events whose `worker` is their username. Each connection has a
+bounded queue: a client that can't keep up has its backlog dropped and gets a
+single "resync" event instead, telling it to refetch the lists (the ETag'd
+list endpoints make that cheap). Recent events are kept so a reconnecting
+client can resume from its last event id.
+
+Like the change versions, this is per process.
+"""
+import asyncio
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Optional
+
+from schemas.tasks import TaskRead
+
+# Config
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "256"))  # per connection
+EVENT_HISTORY_SIZE = int(os.getenv("EVENT_HISTORY_SIZE", "1000"))  # for resume by last event id
+
+
+HEARTBEAT = {"type": "ping"}
+
+
+def _resync(last_id: int) -> dict:
+    return {"id": last_id, "type": "resync", "worker": None, "data": {}, "at": datetime.utcnow().isoformat()}
+
+
+class Subscriber:
+    """
+    One connected client. Events are delivered on the loop the client was
+    subscribed from; a None in the queue means the bus is shutting down.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, username: str, is_admin: bool, queue_size: int):
+        self.loop = loop
+        self.username = username
+        self.is_admin = is_admin
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.connected_at = datetime.utcnow()
+        self.delivered = 0
+        self.resyncs = 0
+
+    def wants(self, event: dict) -> bool:
+        return self.is_admin or event["worker"] == self.username
+
+    def offer(self, event: Optional[dict]):
+        # Runs on self.loop
+        if self.queue.full():
+            # Too slow: drop the backlog, the client refetches instead
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.resyncs += 1
+            if event is not None:
+                event = _resync(event["id"])
+        self.queue.put_nowait(event)
+
+    async def events(self, heartbeat: float):
+        """
+        Yield queued events, and HEARTBEAT after `heartbeat` idle seconds. Ends on shutdown.
+        """
+        # One pending get() across heartbeats: cancelling it on every timeout could lose an event
+        getter = None
+        try:
+            while True:
+                if getter is None:
+                    getter = asyncio.ensure_future(self.queue.get())
+                done, _ = await asyncio.wait({getter}, timeout=heartbeat)
+                if not done:
+                    yield HEARTBEAT
+                    continue
+                event, getter = getter.result(), None
+                if event is None:
+                    return
+                self.delivered += 1
+                yield event
+        finally:
+            if getter is not None:
+                getter.cancel()
+
+
+class EventBus:
+    def __init__(self, queue_size: int = EVENT_QUEUE_SIZE, history: int = EVENT_HISTORY_SIZE):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers: set[Subscriber] = set()
+        self._history: deque = deque(maxlen=history)
+        self._last_id = 0
+        self.published = 0
+
+    def publish(self, event_type: str, worker: Optional[str] = None, **data):
+        """
+        Send an event to every interested subscriber. Safe to call from sync
+        routes (threadpool) and from the event loop.
+        """
+        with self._lock:
+            self._last_id += 1
+            self.published += 1
+            event = {"id": self._last_id, "type": event_type, "worker": worker, "data": data,
+                     "at": datetime.utcnow().isoformat()}
+            self._history.append(event)
+            # Scheduled under the lock so every subscriber sees events in id order
+            for sub in self._subscribers:
+                if sub.wants(event):
+                    try:
+                        sub.loop.call_soon_threadsafe(sub.offer, event)
+                    except RuntimeError:
+                        # Loop already closed (shutdown); the subscriber is going away
+                        pass
+
+    def subscribe(self, username: str, is_admin: bool, last_event_id: Optional[int] = None) -> Subscriber:
+        """
+        Register a subscriber on the running loop. With `last_event_id`, missed
+        events are queued first, or a resync if they are no longer kept.
+        """
+        sub = Subscriber(asyncio.get_running_loop(), username, is_admin, self.queue_size)
+        with self._lock:
+            if last_event_id is not None and last_event_id < self._last_id:
+                oldest = self._history[0]["id"] if self._history else self._last_id + 1
+                if last_event_id + 1 < oldest or last_event_id < 0:
+                    sub.offer(_resync(self._last_id))
+                else:
+                    for event in self._history:
+                        if event["id"] > last_event_id and sub.wants(event):
+                            sub.offer(event)
+            elif last_event_id is not None and last_event_id > self._last_id:
+                # Id from before a restart
+                sub.offer(_resync(self._last_id))
+            self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def close(self):
+        """
+        End every open stream (application shutdown).
+        """
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            try:
+                sub.loop.call_soon_threadsafe(sub.offer, None)
+            except RuntimeError:
+                pass
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        return {
+            "published": self.published,
+            "last_event_id": self._last_id,
+            "connections": len(subscribers),
+            "admins": sum(sub.is_admin for sub in subscribers),
+            "resyncs": sum(sub.resyncs for sub in subscribers),
+            "queued": sum(sub.queue.qsize() for sub in subscribers),
+        }
+
+
+bus = EventBus()
+
+
+def publish_task(event_type: str, task, **extra):
+    bus.publish(event_type, worker=task.assigned_to,
+                task=TaskRead.model_validate(task).model_dump(mode="json"), **extra)
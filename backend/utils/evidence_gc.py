@@ -0,0 +1,218 @@
+"""
+Evidence cleanup.
+
+- delete_task_evidence(): set-based removal of all evidence for a set of tasks
+  (a few statements regardless of row count), returning the files that became
+  unreferenced.
+- reclaimer: background buffer that removes those files after the DB commit,
+  so requests never wait on disk / object-storage deletes.
+- collect_garbage(): periodic reconciliation of storage against the DB. Finds
+  evidence rows whose task is gone, blobs nothing references, and files under
+  uploads/ that no row points at, and reclaims them in batches.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import Counter
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, func, true, update
+from sqlmodel import Session, select
+
+from core.database import engine
+from models.complaints import Complaint
+from models.evidence_blob import EvidenceBlob
+from models.task import Task, TaskEvidence
+from utils.event_buffer import BatchBuffer, BufferFull
+from utils.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+# --- Config ---
+EVIDENCE_GC_INTERVAL = float(os.getenv("EVIDENCE_GC_INTERVAL", str(6 * 3600)))
+EVIDENCE_GC_BATCH_SIZE = int(os.getenv("EVIDENCE_GC_BATCH_SIZE", "500"))
+# Files younger than this are left alone: an upload writes its file before its row commits
+EVIDENCE_GC_MIN_AGE = float(os.getenv("EVIDENCE_GC_MIN_AGE", "3600"))
+GC_ROOTS = [os.path.join("uploads", "blobs"), os.path.join("uploads", "tasks"), os.path.join("uploads", "complaints")]
+
+reclaim_stats = Counter()
+last_gc_report: dict | None = None
+
+
+# -------------------------
+# Set-based deletes
+# -------------------------
+def delete_task_evidence(session: Session, task_ids) -> list[str]:
+    """
+    Delete every TaskEvidence row of `task_ids` (a list or a select of task ids),
+    release their blob references and drop blobs that reach zero.
+    Returns the file paths to reclaim once the caller has committed.
+    """
+    in_tasks = TaskEvidence.task_id.in_(task_ids)
+    blob_ids = session.exec(
+        select(TaskEvidence.blob_id).where(in_tasks, TaskEvidence.blob_id != None).distinct()  # noqa: E711
+    ).all()
+    legacy_files = session.exec(
+        select(TaskEvidence.file_url).where(in_tasks, TaskEvidence.blob_id == None)  # noqa: E711
+    ).all()
+
+    paths = list(legacy_files)
+    if blob_ids:
+        # One UPDATE for every blob: subtract the references held by these tasks
+        held = (
+            select(func.count()).select_from(TaskEvidence)
+            .where(TaskEvidence.blob_id == EvidenceBlob.id, in_tasks)
+            .scalar_subquery()
+        )
+        session.execute(
+            update(EvidenceBlob).where(EvidenceBlob.id.in_(blob_ids)).values(ref_count=EvidenceBlob.ref_count - held)
+        )
+        paths += _drop_dead_blobs(session, EvidenceBlob.id.in_(blob_ids))
+
+    session.execute(delete(TaskEvidence).where(in_tasks))
+    return paths
+
+
+def _drop_dead_blobs(session: Session, where) -> list[str]:
+    dead = EvidenceBlob.ref_count <= 0
+    rows = session.exec(
+        select(EvidenceBlob.path, EvidenceBlob.thumbnail_path, EvidenceBlob.web_path).where(where, dead)
+    ).all()
+    session.execute(delete(EvidenceBlob).where(where, dead))
+    return [path for row in rows for path in row if path]
+
+
+def _referenced(session: Session, paths: list[str]) -> set[str]:
+    """
+    The subset of `paths` some row still points at.
+    """
+    columns = (EvidenceBlob.path, EvidenceBlob.thumbnail_path, EvidenceBlob.web_path,
+               TaskEvidence.file_url, Complaint.evidence)
+    live = set()
+    for column in columns:
+        live.update(session.exec(select(column).where(column.in_(paths))).all())
+    return live
+
+
+def _remove_unreferenced(items: list[tuple[str, int | None]], dry_run: bool = False) -> tuple[int, int]:
+    """
+    Delete the given (path, size) files unless a row references them again
+    (e.g. the same content was re-uploaded meanwhile). Returns (files, bytes).
+    """
+    if not items:
+        return 0, 0
+    with Session(engine) as session:
+        live = _referenced(session, [path for path, _ in items])
+
+    storage = get_storage()
+    files = reclaimed = 0
+    for path, size in items:
+        if path in live:
+            continue
+        if size is None:
+            size = storage.size(path)
+            if size is None:
+                continue
+        if not dry_run:
+            storage.delete(path)
+        files += 1
+        reclaimed += size
+    return files, reclaimed
+
+
+# -------------------------
+# Deferred file removal
+# -------------------------
+def _reclaim(events: list):
+    files, reclaimed = _remove_unreferenced([(e["path"], None) for e in events])
+    reclaim_stats["kept_or_missing"] += len(events) - files
+    reclaim_stats["files"] += files
+    reclaim_stats["bytes"] += reclaimed
+
+
+reclaimer = BatchBuffer("evidence_reclaimer", _reclaim, key=lambda e: e["path"], batch_size=200, flush_interval=2.0)
+
+
+def schedule_reclaim(paths: list[str]):
+    """
+    Queue files for removal after the caller's commit. If the buffer is full
+    they stay on disk until the next collect_garbage() run.
+    """
+    try:
+        for path in paths:
+            reclaimer.add({"path": path})
+    except BufferFull:
+        logger.warning("Evidence reclaimer full; leaving files for the periodic GC")
+
+
+# -------------------------
+# Periodic GC
+# -------------------------
+def collect_garbage(dry_run: bool = False, batch_size: int = EVIDENCE_GC_BATCH_SIZE,
+                    min_age: float = EVIDENCE_GC_MIN_AGE) -> dict:
+    """
+    Reconcile storage against the DB and reclaim everything dead. Returns a report.
+    """
+    global last_gc_report
+    started = time.perf_counter()
+    report = Counter()
+
+    # 1. DB side: evidence of deleted tasks, blobs with no references left
+    with Session(engine) as session:
+        orphan_tasks = session.exec(
+            select(TaskEvidence.task_id).where(TaskEvidence.task_id.not_in(select(Task.id))).distinct()
+        ).all()
+        leaked = session.exec(select(func.count()).select_from(EvidenceBlob).where(EvidenceBlob.ref_count <= 0)).one()
+        report["orphan_evidence_tasks"] = len(orphan_tasks)
+        report["unreferenced_blob_rows"] = leaked
+        if not dry_run:
+            paths = delete_task_evidence(session, orphan_tasks) if orphan_tasks else []
+            paths += _drop_dead_blobs(session, true())
+            session.commit()
+            files, reclaimed = _remove_unreferenced([(path, None) for path in paths])
+            report["files_reclaimed"] += files
+            report["bytes_reclaimed"] += reclaimed
+
+    # 2. Storage side: files no row points at, in batches
+    storage = get_storage()
+    cutoff = time.time() - min_age
+    for root in GC_ROOTS:
+        batch = []
+        for path, size, mtime in storage.list(root):
+            report["files_scanned"] += 1
+            if mtime > cutoff:
+                continue
+            batch.append((path, size))
+            if len(batch) >= batch_size:
+                _collect_batch(batch, report, dry_run)
+                batch = []
+        _collect_batch(batch, report, dry_run)
+
+    report["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+    last_gc_report = {"dry_run": dry_run, "finished_at": time.time(), **report}
+    return last_gc_report
+
+
+def _collect_batch(batch: list, report: Counter, dry_run: bool):
+    files, reclaimed = _remove_unreferenced(batch, dry_run)
+    report["files_reclaimed"] += files
+    report["bytes_reclaimed"] += reclaimed
+
+
+async def gc_loop():
+    """
+    Background loop started from the app lifespan.
+    """
+    while True:
+        await asyncio.sleep(EVIDENCE_GC_INTERVAL)
+        try:
+            report = await run_in_threadpool(collect_garbage)
+            logger.info("Evidence GC reclaimed %d file(s), %d bytes in %.1fs",
+                        report["files_reclaimed"], report["bytes_reclaimed"], report["elapsed_seconds"])
+        except Exception as e:
+            logger.error("Evidence GC failed: %s", e)
+
+
+def snapshot() -> dict:
+    return {"reclaimer": {**reclaimer.snapshot(), **reclaim_stats}, "last_gc": last_gc_report}
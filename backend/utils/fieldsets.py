@@ -0,0 +1,55 @@
+"""
+Sparse fieldsets for list endpoints: `?fields=id,title,status`.
+
+The requested names are checked against the endpoint's response schema, the
+route selects only those columns (plain rows, no ORM objects, no long text
+the table doesn't show) and serializes them with an adapter built for just
+those fields. Without `fields` the endpoints behave as before.
+"""
+from functools import lru_cache
+from typing import Iterable, List, Optional
+
+from fastapi import HTTPException, Query
+from pydantic import BaseModel, ConfigDict, create_model
+
+from utils.serialization import ResponseAdapter
+
+FIELDS_QUERY = Query(
+    None,
+    description="Comma-separated fields to return, e.g. `id,title,status`. Omit for every field.",
+)
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str]) -> Optional[tuple[str, ...]]:
+    """
+    Requested field names in `allowed` order, or None when `fields` wasn't given.
+    """
+    if fields is None:
+        return None
+    allowed = tuple(allowed)
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested.difference(allowed)
+    if unknown or not requested:
+        problem = f"Unknown field(s): {', '.join(sorted(unknown))}" if unknown else "No fields given"
+        raise HTTPException(status_code=400, detail=f"{problem}. Choose from: {', '.join(allowed)}")
+    return tuple(name for name in allowed if name in requested)
+
+
+def schema_fields(schema: type[BaseModel], fields: Optional[str]) -> Optional[tuple[str, ...]]:
+    return parse_fields(fields, schema.model_fields)
+
+
+@lru_cache(maxsize=256)
+def subset_list(schema: type[BaseModel], names: tuple[str, ...]) -> ResponseAdapter:
+    """
+    List adapter for `schema` trimmed to `names` (built once per combination).
+    """
+    definitions = {name: (field.annotation, field) for name, field in schema.model_fields.items() if name in names}
+    model = create_model(
+        f"{schema.__name__}Fields", __config__=ConfigDict(from_attributes=True), **definitions
+    )
+    return ResponseAdapter(List[model])
+
+
+def columns(model, names: Iterable[str]) -> list:
+    return [getattr(model, name) for name in names]
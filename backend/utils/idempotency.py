@@ -0,0 +1,190 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from fastapi import HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from starlette.datastructures import UploadFile
+from utils.security import decode_token
+
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", str(24 * 3600)))
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "50000"))
+
+_IN_PROGRESS = object()
+
+
+class IdempotencyConflict(Exception):
+    """
+    Raised when a key is reused for a different request, or while the
+    original request is still being processed.
+    """
+
+    def __init__(self, message: str, in_progress: bool = False):
+        super().__init__(message)
+        self.in_progress = in_progress
+
+
+# -------------------------
+# Store
+# -------------------------
+class IdempotencyStore:
+    """
+    Bounded in-memory map of key → (request fingerprint, stored response).
+
+    Entries are kept in insertion order; since every entry has the same TTL the
+    oldest ones expire first, so eviction only ever looks at the front.
+    Fingerprints are 16-byte digests and responses are stored as compact JSON.
+    """
+
+    def __init__(self, ttl: float = IDEMPOTENCY_TTL_SECONDS, max_entries: int = IDEMPOTENCY_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[bytes, Any, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _evict(self, now: float):
+        while self._entries:
+            key, (_, _, expires_at) = next(iter(self._entries.items()))
+            if expires_at > now and len(self._entries) <= self.max_entries:
+                break
+            self._entries.popitem(last=False)
+
+    def begin(self, key: str, fingerprint: bytes) -> Optional[tuple[int, Any]]:
+        """
+        Return the stored (status_code, body) for a completed request, or reserve
+        the key and return None if this is the first time it is seen.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            entry = self._entries.get(key)
+            if entry is None:
+                self._entries[key] = (fingerprint, _IN_PROGRESS, now + self.ttl)
+                self.misses += 1
+                return None
+
+            stored_fingerprint, stored, _ = entry
+            if stored_fingerprint != fingerprint:
+                raise IdempotencyConflict("Idempotency-Key was already used for a different request")
+            if stored is _IN_PROGRESS:
+                raise IdempotencyConflict("A request with this Idempotency-Key is still in progress", in_progress=True)
+            self.hits += 1
+            status_code, body = stored
+            return status_code, json.loads(body)
+
+    def complete(self, key: str, status_code: int, body: Any):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                fingerprint, _, expires_at = entry
+                encoded = json.dumps(jsonable_encoder(body), separators=(",", ":"))
+                self._entries[key] = (fingerprint, (status_code, encoded), expires_at)
+
+    def release(self, key: str):
+        """
+        Forget an unfinished reservation so the client can retry (e.g. the handler failed).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is _IN_PROGRESS:
+                del self._entries[key]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+store = IdempotencyStore()
+
+
+def fingerprint_of(*parts: Any) -> bytes:
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(repr(part).encode())
+        digest.update(b"\0")
+    return digest.digest()
+
+
+# -------------------------
+# Request helper / dependency
+# -------------------------
+class Idempotency:
+    """
+    Per-request handle. Endpoints call `replay()` first and return its result if
+    it is not None, then pass their response through `save()`.
+    Without an Idempotency-Key header both are no-ops.
+    """
+
+    def __init__(self, key: Optional[str], fingerprint: bytes):
+        self.key = key
+        self.fingerprint = fingerprint
+        self._reserved = False
+
+    def replay(self) -> Optional[JSONResponse]:
+        if not self.key:
+            return None
+        try:
+            stored = store.begin(self.key, self.fingerprint)
+        except IdempotencyConflict as e:
+            raise HTTPException(status_code=409 if e.in_progress else 422, detail=str(e))
+        if stored is None:
+            self._reserved = True
+            return None
+        status_code, body = stored
+        return JSONResponse(status_code=status_code, content=body, headers={"Idempotent-Replayed": "true"})
+
+    def save(self, body: Any, status_code: int = 200) -> Any:
+        if self.key and self._reserved:
+            store.complete(self.key, status_code, body)
+            self._reserved = False
+        return body
+
+    def release(self):
+        if self.key and self._reserved:
+            store.release(self.key)
+            self._reserved = False
+
+
+async def idempotency(request: Request):
+    """
+    Dependency reading the `Idempotency-Key` header. Keys are scoped to the
+    caller (user id from the access token, or client address for anonymous routes) and
+    the route, and bound to a fingerprint of the query string and form/JSON body.
+    Uploaded files contribute their name, type and size.
+    """
+    header = request.headers.get("Idempotency-Key")
+    if not header:
+        yield Idempotency(None, b"")
+        return
+
+    principal = request.client.host if request.client else ""
+    auth = request.headers.get("Authorization", "")
+    if auth.startswith("Bearer "):
+        # Scope to the user, not the token, so retries survive a token refresh
+        payload = decode_token(auth[len("Bearer "):]) or {}
+        principal = payload.get("user_id") or principal
+    form_parts = []
+    if request.headers.get("content-type", "").startswith(("multipart/form-data", "application/x-www-form-urlencoded")):
+        form = await request.form()  # already parsed by FastAPI, served from cache
+        for name, value in form.multi_items():
+            if isinstance(value, UploadFile):
+                form_parts.append((name, value.filename, value.content_type, value.size))
+            else:
+                form_parts.append((name, value))
+    elif request.headers.get("content-type", "").startswith("application/json"):
+        form_parts.append(await request.body())  # cached by FastAPI's body parsing
+
+    key = fingerprint_of(principal, request.method, request.url.path, header).hex()
+    handle = Idempotency(key, fingerprint_of(str(request.query_params), form_parts))
+    try:
+        yield handle
+    finally:
+        # Handler raised before saving: let the client retry with the same key
+        handle.release()
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi.concurrency import run_in_threadpool
+from PIL import Image, ImageOps
+from sqlmodel import Session
+
+from core.database import engine
+from models.evidence_blob import EvidenceBlob
+from utils.phash_index import dhash, index as phash_index, report_reuse
+from utils.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+# Config
+VARIANT_DIR = os.path.join("uploads", "blobs", "variants")
+THUMBNAIL_MAX_PX = int(os.getenv("THUMBNAIL_MAX_PX", "320"))
+WEB_MAX_PX = int(os.getenv("WEB_RENDITION_MAX_PX", "1600"))
+WEB_QUALITY = int(os.getenv("WEB_RENDITION_QUALITY", "80"))
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+
+VARIANTS = {
+    # name: (longest side in px, JPEG quality)
+    "thumbnail": (THUMBNAIL_MAX_PX, 75),
+    "web": (WEB_MAX_PX, WEB_QUALITY),
+}
+
+_pool: ProcessPoolExecutor | None = None
+_pending: set[asyncio.Task] = set()
+
+
+def variant_path(sha256: str, name: str) -> str:
+    return os.path.join(VARIANT_DIR, sha256[:2], sha256[2:4], f"{sha256}_{name}.jpg")
+
+
+# -------------------------
+# Worker-process side
+# -------------------------
+def generate_variants(src_path: str, sha256: str) -> dict:
+    """
+    Build the thumbnail and web rendition for one image. Runs in a worker process.
+    Returns {"width", "height", "phash", "<variant>": path, ...}.
+    """
+    with Image.open(src_path) as img:
+        img = ImageOps.exif_transpose(img)  # phone photos carry rotation in EXIF
+        width, height = img.size
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+
+        result = {"width": width, "height": height, "phash": dhash(img)}
+        for name, (max_px, quality) in VARIANTS.items():
+            out_path = variant_path(sha256, name)
+            os.makedirs(os.path.dirname(out_path), exist_ok=True)
+            variant = img.copy()
+            variant.thumbnail((max_px, max_px), Image.Resampling.LANCZOS)
+            tmp_path = f"{out_path}.part"
+            variant.save(tmp_path, "JPEG", quality=quality, optimize=True, progressive=True)
+            os.replace(tmp_path, out_path)
+            result[name] = out_path
+    return result
+
+
+# -------------------------
+# API-process side
+# -------------------------
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=IMAGE_WORKERS)
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def save_variants(blob_id: str, result: dict):
+    with Session(engine) as session:
+        blob = session.get(EvidenceBlob, blob_id)
+        if blob is None:
+            return
+        blob.width = result["width"]
+        blob.height = result["height"]
+        blob.thumbnail_path = result["thumbnail"]
+        blob.web_path = result["web"]
+        blob.phash = result["phash"]
+        session.add(blob)
+        session.commit()
+
+        phash_index.add(blob_id, blob.phash)
+        report_reuse(session, blob_id, blob.phash)
+
+
+async def process_variants(blob_id: str, path: str):
+    """
+    Generate and record the variants of one blob (fetched first when it lives in object storage).
+    """
+    loop = asyncio.get_running_loop()
+    storage = get_storage()
+    local_src = path
+    try:
+        if not storage.is_local:
+            # Object storage: work on a local copy, then push the renditions back
+            fd, local_src = tempfile.mkstemp(suffix=os.path.splitext(path)[1])
+            os.close(fd)
+            await asyncio.to_thread(storage.fetch, path, local_src)
+        result = await loop.run_in_executor(get_pool(), generate_variants, local_src, blob_id)
+        if not storage.is_local:
+            for name in VARIANTS:
+                await asyncio.to_thread(storage.put_file, result[name], result[name], "image/jpeg")
+        await run_in_threadpool(save_variants, blob_id, result)
+    except Exception as e:
+        logger.error("Variant generation failed for blob %s: %s", blob_id, e)
+    finally:
+        if local_src != path and os.path.exists(local_src):
+            os.remove(local_src)
+
+
+def schedule_variants(blob_id: str, path: str):
+    """
+    Queue thumbnail/web generation for a freshly stored blob, off the request path.
+    """
+    job = asyncio.get_running_loop().create_task(process_variants(blob_id, path))
+    _pending.add(job)
+    job.add_done_callback(_pending.discard)
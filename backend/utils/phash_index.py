@@ -0,0 +1,198 @@
+"""
+Perceptual hashes for evidence photos and an in-memory index to find
+near-duplicates (the same photo re-saved, resized or recompressed).
+
+The hash is a 64-bit difference hash (dHash): the image is reduced to 9x8
+greyscale and each bit says whether a pixel is brighter than its right-hand
+neighbour. Visually similar images differ in only a few bits, so similarity is
+the Hamming distance between hashes. Lookups go through a BK-tree, which only
+visits subtrees that can still contain a hash within the requested distance.
+
+Blank or low-detail shots (lens covered, dark, a plain wall) hash to (nearly)
+all zeros or all ones whatever the scene, so they would all match each other.
+Such hashes are kept on the blob but never indexed or matched.
+"""
+import logging
+import os
+import threading
+import time
+
+from PIL import Image
+from sqlmodel import Session, select
+
+from core.database import engine
+from models.evidence_blob import EvidenceBlob
+from models.task import Task, TaskEvidence
+
+logger = logging.getLogger(__name__)
+
+# Config
+PHASH_MATCH_DISTANCE = int(os.getenv("PHASH_MATCH_DISTANCE", "6"))  # out of 64 bits
+PHASH_MIN_BITS = int(os.getenv("PHASH_MIN_BITS", "3"))  # set and clear bits a hash needs to be compared
+
+
+def dhash(img: Image.Image) -> str:
+    """
+    64-bit difference hash of an already opened (and EXIF-rotated) image, as 16 hex chars.
+    """
+    small = img.convert("L").resize((9, 8), Image.Resampling.LANCZOS)
+    pixels = list(small.getdata())
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            bits = (bits << 1) | (left > pixels[row * 9 + col + 1])
+    return f"{bits:016x}"
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def is_degenerate(phash: str) -> bool:
+    """
+    True for hashes of images with too little detail to compare (see module docstring).
+    """
+    ones = int(phash, 16).bit_count()
+    return ones < PHASH_MIN_BITS or 64 - ones < PHASH_MIN_BITS
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree over 64-bit ints with Hamming distance.
+    Each node is [hash, items, {distance: child}]; equal hashes share a node.
+    """
+
+    def __init__(self):
+        self.root: list | None = None
+        self.size = 0
+
+    def add(self, value: int, item):
+        self.size += 1
+        if self.root is None:
+            self.root = [value, [item], {}]
+            return
+        node = self.root
+        while True:
+            d = hamming(value, node[0])
+            if d == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = [value, [item], {}]
+                return
+            node = child
+
+    def search(self, value: int, max_distance: int) -> list[tuple[int, object]]:
+        """
+        All (distance, item) within max_distance, closest first.
+        """
+        if self.root is None:
+            return []
+        found = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            d = hamming(value, node[0])
+            if d <= max_distance:
+                found.extend((d, item) for item in node[1])
+            # Triangle inequality: only children at distance d±max_distance can match
+            for child_d, child in node[2].items():
+                if d - max_distance <= child_d <= d + max_distance:
+                    stack.append(child)
+        found.sort(key=lambda pair: pair[0])
+        return found
+
+
+class PhashIndex:
+    """
+    Process-wide BK-tree of blob id by perceptual hash. Rebuilt from the DB at
+    startup and extended as new images are hashed. Deleted blobs may linger
+    until the next rebuild; callers resolve ids against the DB anyway.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tree = BKTree()
+        self._known: set[str] = set()
+        self.built_at: float | None = None
+        self.build_seconds: float | None = None
+
+    def rebuild(self):
+        started = time.perf_counter()
+        with Session(engine) as session:
+            rows = session.exec(
+                select(EvidenceBlob.id, EvidenceBlob.phash).where(EvidenceBlob.phash != None)  # noqa: E711
+            ).all()
+        rows = [(blob_id, phash) for blob_id, phash in rows if not is_degenerate(phash)]
+        tree = BKTree()
+        for blob_id, phash in rows:
+            tree.add(int(phash, 16), blob_id)
+        with self._lock:
+            self._tree = tree
+            self._known = {blob_id for blob_id, _ in rows}
+            self.built_at = time.time()
+            self.build_seconds = time.perf_counter() - started
+        logger.info("Perceptual hash index built: %d image(s) in %.3fs", len(rows), self.build_seconds)
+
+    def add(self, blob_id: str, phash: str):
+        if is_degenerate(phash):
+            return
+        with self._lock:
+            if blob_id not in self._known:
+                self._known.add(blob_id)
+                self._tree.add(int(phash, 16), blob_id)
+
+    def search(self, phash: str, max_distance: int = PHASH_MATCH_DISTANCE) -> list[tuple[int, str]]:
+        if is_degenerate(phash):
+            return []
+        with self._lock:
+            return self._tree.search(int(phash, 16), max_distance)
+
+    def snapshot(self) -> dict:
+        return {
+            "images": self._tree.size,
+            "built_at": self.built_at,
+            "build_seconds": round(self.build_seconds, 4) if self.build_seconds is not None else None,
+        }
+
+
+index = PhashIndex()
+
+
+# -------------------------
+# Queries
+# -------------------------
+def matching_evidence(session: Session, phash: str, max_distance: int = PHASH_MATCH_DISTANCE) -> list[tuple]:
+    """
+    (distance, TaskEvidence, Task) for every evidence item whose image is within
+    max_distance of `phash`, closest first.
+    """
+    hits = index.search(phash, max_distance)
+    if not hits:
+        return []
+    distance = {}
+    for d, blob_id in hits:
+        distance.setdefault(blob_id, d)
+    rows = session.exec(
+        select(TaskEvidence, Task)
+        .join(Task, Task.id == TaskEvidence.task_id)
+        .where(TaskEvidence.blob_id.in_(distance))
+    ).all()
+    return sorted(((distance[e.blob_id], e, t) for e, t in rows), key=lambda r: (r[0], r[1].uploaded_at))
+
+
+def report_reuse(session: Session, blob_id: str, phash: str) -> bool:
+    """
+    Log a warning when an image (or a near-copy of it) is evidence on more than
+    one task. Returns True if it was flagged.
+    """
+    matches = matching_evidence(session, phash)
+    tasks = {task.id: task for _, _, task in matches}
+    if len(tasks) < 2:
+        return False
+    workers = sorted({task.assigned_to for task in tasks.values()})
+    logger.warning("Possible reused evidence: blob %s matches photos on %d task(s) by %s",
+                   blob_id[:12], len(tasks), ", ".join(workers))
+    return True
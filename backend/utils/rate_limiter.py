@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import deque
+
+
+class RateLimitTimeout(Exception):
+    """
+    Raised when no token could be acquired within the allowed wait.
+    """
+
+
+# -------------------------
+# Token bucket with priority lanes
+# -------------------------
+class PriorityTokenBucket:
+    """
+    Token bucket (`rate` tokens/second, at most `burst` stored) shared by
+    several priority lanes.
+
+    Waiters queue per lane; a token is only handed to the oldest waiter of the
+    highest-priority non-empty lane, so urgent messages overtake bulk ones.
+    `lanes` is ordered from highest to lowest priority.
+    """
+
+    def __init__(self, rate: float, burst: int, lanes: tuple[str, ...] = ("high", "normal", "low"),
+                 wait_window: int = 500):
+        self.rate = rate
+        self.burst = burst
+        self.lanes = lanes
+
+        self._cond = threading.Condition()
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._waiting: dict[str, deque] = {lane: deque() for lane in lanes}
+
+        # Metrics
+        self._waits: dict[str, deque] = {lane: deque(maxlen=wait_window) for lane in lanes}
+        self._acquired = {lane: 0 for lane in lanes}
+        self._timed_out = {lane: 0 for lane in lanes}
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _is_next(self, lane: str, ticket: object) -> bool:
+        for name in self.lanes:
+            if self._waiting[name]:
+                return name == lane and self._waiting[name][0] is ticket
+        return False
+
+    def acquire(self, lane: str = "normal", timeout: float | None = None) -> float:
+        """
+        Block until a token is available for `lane`. Returns the time waited.
+        Raises RateLimitTimeout if `timeout` seconds pass first.
+        """
+        if lane not in self._waiting:
+            raise ValueError(f"Unknown priority lane: {lane}")
+
+        ticket = object()
+        started = time.monotonic()
+        deadline = started + timeout if timeout is not None else None
+
+        with self._cond:
+            self._waiting[lane].append(ticket)
+            try:
+                while True:
+                    self._refill()
+                    if self._is_next(lane, ticket) and self._tokens >= 1:
+                        self._tokens -= 1
+                        break
+
+                    # Sleep until the next token is due (or we are woken up)
+                    delay = max((1 - self._tokens) / self.rate, 0.001)
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._timed_out[lane] += 1
+                            raise RateLimitTimeout(f"No SMS send slot within {timeout}s ({lane} lane)")
+                        delay = min(delay, remaining)
+                    self._cond.wait(delay)
+            finally:
+                self._waiting[lane].remove(ticket)
+                self._cond.notify_all()
+
+            waited = time.monotonic() - started
+            self._acquired[lane] += 1
+            self._waits[lane].append(waited)
+            return waited
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            self._refill()
+            lanes = {}
+            for lane in self.lanes:
+                waits = sorted(self._waits[lane])
+                lanes[lane] = {
+                    "queue_depth": len(self._waiting[lane]),
+                    "acquired": self._acquired[lane],
+                    "timed_out": self._timed_out[lane],
+                    "avg_wait": round(sum(waits) / len(waits), 4) if waits else None,
+                    "p95_wait": round(waits[min(len(waits) - 1, int(0.95 * len(waits)))], 4) if waits else None,
+                    "max_wait": round(waits[-1], 4) if waits else None,
+                }
+            return {
+                "rate_per_second": self.rate,
+                "burst": self.burst,
+                "tokens_available": round(self._tokens, 2),
+                "lanes": lanes,
+            }
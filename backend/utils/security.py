@@ -68,7 +68,10 @@
 #         raise HTTPException(status_code=403, detail="Admin access required")
 #     return current_user
 
+import os
+import threading
 import uuid
+from concurrent.futures import ProcessPoolExecutor
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
@@ -83,6 +86,7 @@ SECRET_KEY = "xdXqTpxa1U1ms8vmuXgfQH1bfGecFsoSM8ozhEr6)mS02QgWwe91rP33ZPloQ"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 REFRESH_TOKEN_EXPIRE_DAYS = 7
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))  # bulk imports
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
@@ -99,6 +103,33 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+_hash_pool: ProcessPoolExecutor | None = None
+_hash_pool_lock = threading.Lock()
+
+
+def hash_passwords(passwords: list[str]) -> list[str]:
+    """
+    hash_password for many passwords (bulk worker import), spread over a
+    process pool: bcrypt is slow on purpose, ~0.25 s per hash.
+    """
+    global _hash_pool
+    if len(passwords) < 2 or PASSWORD_HASH_WORKERS < 2:
+        return [hash_password(p) for p in passwords]
+    with _hash_pool_lock:
+        if _hash_pool is None:
+            _hash_pool = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS)
+    chunksize = max(1, len(passwords) // (PASSWORD_HASH_WORKERS * 4))
+    return list(_hash_pool.map(hash_password, passwords, chunksize=chunksize))
+
+
+def shutdown_hash_pool():
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is not None:
+            _hash_pool.shutdown(wait=False, cancel_futures=True)
+            _hash_pool = None
+
+
 # -------------------------
 # JWT helpers
 # -------------------------
@@ -139,6 +170,14 @@ def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Dep
     """
     Dependency to get the current user from an access token.
     """
+    return user_from_access_token(token, session)
+
+
+def user_from_access_token(token: str, session: Session) -> User:
+    """
+    Resolve an access token to its user, raising 401/404 like get_current_user.
+    For connections that can't use the dependency (WebSocket / EventSource clients pass ?token=).
+    """
     payload = decode_token(token)
     if not payload or payload.get("type") != "access":
         raise HTTPException(status_code=401, detail="Invalid or expired access token")
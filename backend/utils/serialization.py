@@ -0,0 +1,45 @@
+"""
+Precompiled response adapters.
+
+When an endpoint returns ORM rows, FastAPI validates them against the
+response_model on every request and then serializes the result. For the big
+list endpoints we do that once ourselves: a TypeAdapter built at import time
+validates straight from the ORM attributes and dumps to JSON bytes in
+pydantic-core, and the endpoint returns the finished Response (FastAPI skips
+its own pass for Response objects). Keep `response_model=` on the route for the
+OpenAPI schema.
+
+benchmarks/bench_serialization.py compares this with the per-row model + stdlib
+json path and with orjson.
+"""
+from typing import Any, List
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from schemas.audit_logs import AuditLogRead
+from schemas.complaints import ComplaintRead
+from schemas.sync import SyncResponse
+from schemas.tasks import TaskRead, TaskWithEvidenceRead
+from schemas.users import WorkerRead
+
+
+class ResponseAdapter:
+    def __init__(self, tp: Any):
+        self.adapter = TypeAdapter(tp)
+
+    def dump(self, data: Any) -> bytes:
+        return self.adapter.dump_json(self.adapter.validate_python(data, from_attributes=True))
+
+    def response(self, data: Any, status_code: int = 200, headers: dict | None = None) -> Response:
+        return Response(content=self.dump(data), status_code=status_code, media_type="application/json",
+                        headers=headers)
+
+
+TASK_LIST = ResponseAdapter(List[TaskRead])
+TASK_WITH_EVIDENCE = ResponseAdapter(TaskWithEvidenceRead)
+TASK_WITH_EVIDENCE_LIST = ResponseAdapter(List[TaskWithEvidenceRead])
+WORKER_LIST = ResponseAdapter(List[WorkerRead])
+AUDIT_LOG_LIST = ResponseAdapter(List[AuditLogRead])
+COMPLAINT_LIST = ResponseAdapter(List[ComplaintRead])
+SYNC_RESPONSE = ResponseAdapter(SyncResponse)
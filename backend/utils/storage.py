@@ -0,0 +1,246 @@
+"""
+Where evidence bytes live.
+
+Blobs and their variants are addressed by a key such as
+"uploads/blobs/ab/cd/<sha256>.jpg" (the same string stored in
+EvidenceBlob.path). The backend decides what a key means:
+
+- LocalStorage (default): the key is a path relative to the working directory,
+  exactly as before.
+- S3Storage: the key is an object key in S3_BUCKET. Works with AWS S3 and
+  S3-compatible servers such as MinIO, e.g. for local testing:
+
+      docker run -p 9000:9000 minio/minio server /data
+      STORAGE_BACKEND=s3 S3_ENDPOINT_URL=http://localhost:9000 S3_BUCKET=evidence \\
+      S3_ACCESS_KEY_ID=minioadmin S3_SECRET_ACCESS_KEY=minioadmin uvicorn main:app
+
+  With S3 the API can hand out presigned URLs, so clients upload and download
+  directly against the bucket (see routes/direct_uploads.py and routes/evidence.py).
+
+All methods are blocking; call them via asyncio.to_thread from async code.
+"""
+import base64
+import os
+import shutil
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from urllib.parse import quote
+
+# --- Config ---
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local").lower()
+S3_BUCKET = os.getenv("S3_BUCKET", "field-worker-evidence")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL") or None  # None → AWS
+S3_REGION = os.getenv("S3_REGION", "us-east-1")
+S3_PRESIGN_EXPIRY = int(os.getenv("S3_PRESIGN_EXPIRY", "900"))
+# Serve uploads/ as unauthenticated static files for legacy clients (off: evidence goes through /evidence)
+PUBLIC_UPLOADS = os.getenv("PUBLIC_UPLOADS", "false").lower() == "true"
+
+
+class Storage(ABC):
+    """
+    Interface shared by the backends. Abstract methods must all be implemented:
+    a partial backend fails when it is instantiated, not on first use.
+    """
+    is_local = True
+
+    @abstractmethod
+    def put_file(self, src_path: str, key: str, content_type: str | None = None):
+        """Move a local file into storage under `key` (src_path is consumed)."""
+
+    def exists(self, key: str) -> bool:
+        return self.size(key) is not None
+
+    @abstractmethod
+    def size(self, key: str) -> int | None:
+        """Size in bytes, or None if the key doesn't exist."""
+
+    @abstractmethod
+    def read_head(self, key: str, n: int) -> bytes:
+        """First n bytes (used to sniff the type of directly uploaded files)."""
+
+    @abstractmethod
+    def fetch(self, key: str, dest_path: str):
+        """Copy the object to a local file."""
+
+    @abstractmethod
+    def open(self, key: str):
+        """Readable binary stream of the object (use as a context manager)."""
+
+    @abstractmethod
+    def move(self, src_key: str, dst_key: str):
+        """Rename an object within the store (overwrites dst_key)."""
+
+    @abstractmethod
+    def delete(self, key: str):
+        """Remove the object; missing keys are ignored."""
+
+    @abstractmethod
+    def list(self, prefix: str):
+        """Yield (key, size, mtime) for every object under prefix."""
+
+    def presigned_put(self, key: str, content_type: str, size: int, sha256: str) -> dict | None:
+        """Direct-upload instructions {"url", "method", "headers"}, or None if unsupported."""
+        return None
+
+    def presigned_get(self, key: str, content_type: str | None = None) -> str | None:
+        """Time-limited download URL, or None if the API serves the bytes itself."""
+        return None
+
+
+class LocalStorage(Storage):
+    is_local = True
+
+    def put_file(self, src_path: str, key: str, content_type: str | None = None):
+        if os.path.abspath(src_path) == os.path.abspath(key):
+            return
+        os.makedirs(os.path.dirname(key), exist_ok=True)
+        os.replace(src_path, key)
+
+    def size(self, key: str) -> int | None:
+        try:
+            return os.path.getsize(key)
+        except FileNotFoundError:
+            return None
+
+    def read_head(self, key: str, n: int) -> bytes:
+        with open(key, "rb") as f:
+            return f.read(n)
+
+    def fetch(self, key: str, dest_path: str):
+        shutil.copyfile(key, dest_path)
+
+    def open(self, key: str):
+        return open(key, "rb")
+
+    def move(self, src_key: str, dst_key: str):
+        os.makedirs(os.path.dirname(dst_key), exist_ok=True)
+        os.replace(src_key, dst_key)
+
+    def delete(self, key: str):
+        try:
+            os.remove(key)
+        except FileNotFoundError:
+            pass
+
+    def list(self, prefix: str):
+        for root, _, names in os.walk(prefix):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, st.st_size, st.st_mtime
+
+
+class S3Storage(Storage):
+    is_local = False
+
+    def __init__(self, bucket: str = S3_BUCKET, endpoint_url: str | None = S3_ENDPOINT_URL,
+                 region: str = S3_REGION, presign_expiry: int = S3_PRESIGN_EXPIRY):
+        try:
+            import boto3
+            from botocore.config import Config
+        except ImportError:
+            raise RuntimeError("STORAGE_BACKEND=s3 needs boto3 (pip install boto3)")
+
+        self.bucket = bucket
+        self.presign_expiry = presign_expiry
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=os.getenv("S3_ACCESS_KEY_ID"),
+            aws_secret_access_key=os.getenv("S3_SECRET_ACCESS_KEY"),
+            # Path-style keeps MinIO and other single-host S3 servers happy
+            config=Config(signature_version="s3v4", s3={"addressing_style": "path"},
+                          max_pool_connections=32, retries={"max_attempts": 3, "mode": "standard"}),
+        )
+        self._missing_codes = {"404", "NoSuchKey", "NotFound"}
+
+    def put_file(self, src_path: str, key: str, content_type: str | None = None):
+        extra = {"ContentType": content_type} if content_type else None
+        self.client.upload_file(src_path, self.bucket, key, ExtraArgs=extra)
+        os.remove(src_path)
+
+    def size(self, key: str) -> int | None:
+        from botocore.exceptions import ClientError
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=key)["ContentLength"]
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in self._missing_codes:
+                return None
+            raise
+
+    def read_head(self, key: str, n: int) -> bytes:
+        obj = self.client.get_object(Bucket=self.bucket, Key=key, Range=f"bytes=0-{n - 1}")
+        return obj["Body"].read()
+
+    def fetch(self, key: str, dest_path: str):
+        self.client.download_file(self.bucket, key, dest_path)
+
+    def open(self, key: str):
+        return self.client.get_object(Bucket=self.bucket, Key=key)["Body"]
+
+    def move(self, src_key: str, dst_key: str):
+        # Server-side copy: the bytes never leave the bucket
+        self.client.copy_object(Bucket=self.bucket, Key=dst_key, CopySource={"Bucket": self.bucket, "Key": src_key})
+        self.client.delete_object(Bucket=self.bucket, Key=src_key)
+
+    def delete(self, key: str):
+        # DeleteObject is already a no-op for missing keys
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def list(self, prefix: str):
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix.rstrip("/") + "/"):
+            for obj in page.get("Contents", []):
+                yield obj["Key"], obj["Size"], obj["LastModified"].timestamp()
+
+    def presigned_put(self, key: str, content_type: str, size: int, sha256: str) -> dict | None:
+        # The checksum is part of the signature: S3 rejects a body whose SHA-256
+        # doesn't match, so the content-addressed key can be trusted on completion.
+        checksum = base64.b64encode(bytes.fromhex(sha256)).decode()
+        url = self.client.generate_presigned_url(
+            "put_object",
+            Params={"Bucket": self.bucket, "Key": key, "ContentType": content_type,
+                    "ContentLength": size, "ChecksumSHA256": checksum},
+            ExpiresIn=self.presign_expiry,
+        )
+        return {
+            "url": url,
+            "method": "PUT",
+            "headers": {"Content-Type": content_type, "x-amz-checksum-sha256": checksum},
+            "expires_in": self.presign_expiry,
+        }
+
+    def presigned_get(self, key: str, content_type: str | None = None) -> str | None:
+        params = {"Bucket": self.bucket, "Key": key}
+        if content_type:
+            params["ResponseContentType"] = content_type
+        return self.client.generate_presigned_url("get_object", Params=params, ExpiresIn=self.presign_expiry)
+
+
+@lru_cache(maxsize=1)
+def get_storage() -> Storage:
+    if STORAGE_BACKEND == "s3":
+        return S3Storage()
+    if STORAGE_BACKEND != "local":
+        raise RuntimeError(f"Unknown STORAGE_BACKEND '{STORAGE_BACKEND}' (expected 'local' or 's3')")
+    return LocalStorage()
+
+
+def evidence_url(blob_id: str | None, path: str | None, variant: str = "original") -> str | None:
+    """
+    URL clients should fetch a stored evidence file from: the authorized
+    /evidence/{blob_id} route, or the raw uploads/ path while PUBLIC_UPLOADS is
+    on. Legacy files with no blob (not yet moved by migrate_evidence_blobs.py)
+    go through the equally authorized /evidence/legacy/{path} route.
+    """
+    if path is None:
+        return None
+    if PUBLIC_UPLOADS:
+        return path
+    if blob_id is None:
+        return "/evidence/legacy/" + quote(path.replace(os.sep, "/"))
+    return f"/evidence/{blob_id}" + ("" if variant == "original" else f"?variant={variant}")
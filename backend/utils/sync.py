@@ -0,0 +1,168 @@
+"""
+Change sequence numbers and tombstones for delta sync (routes/sync.py).
+
+Every transaction that writes a Task, TaskEvidence or EmployeeComplaint row
+takes the next number from the ChangeCounter row and stamps it on the rows it
+touched (change_seq). Taking the number updates the counter row, which holds
+the write lock until commit, so numbers become visible in commit order and a
+client that has seen everything up to N never misses a later row with a number
+<= N.
+
+Deleted tasks and evidence leave a Tombstone with the same number, and so does
+a task reassigned away from a worker. All of this hangs off Session events, so
+ORM writes and bulk UPDATE/DELETE/INSERT statements are covered without the
+routes having to remember it. Tombstones older than
+SYNC_TOMBSTONE_RETENTION_DAYS are pruned; clients whose cursor predates the
+pruning get a full resync.
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, event, func, insert, inspect, literal, select, update
+from sqlalchemy.orm import Session, aliased
+
+from core.database import engine
+from models.employee_complaint import EmployeeComplaint
+from models.sync import ChangeCounter, Tombstone
+from models.task import Task, TaskEvidence
+
+logger = logging.getLogger(__name__)
+
+# Config
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv("SYNC_TOMBSTONE_RETENTION_DAYS", "30"))
+SYNC_PRUNE_INTERVAL = int(os.getenv("SYNC_PRUNE_INTERVAL", "3600"))  # seconds
+
+SYNCED = (Task, TaskEvidence, EmployeeComplaint)
+SYNCED_TABLES = {model.__tablename__ for model in SYNCED}
+
+_SEQ = "sync.change_seq"
+_counter = ChangeCounter.__table__
+_tombstones = Tombstone.__table__
+
+
+def _next_seq(session: Session) -> int:
+    """
+    This transaction's change number, allocated on first use.
+    """
+    seq = session.info.get(_SEQ)
+    if seq is None:
+        # Core, on the session's connection: no autoflush, so safe inside flush events
+        conn = session.connection()
+        seq = conn.execute(
+            update(_counter).where(_counter.c.id == 1).values(value=_counter.c.value + 1).returning(_counter.c.value)
+        ).scalar()
+        if seq is None:
+            conn.execute(insert(_counter).values(id=1, value=1, pruned_through=0))
+            seq = 1
+        session.info[_SEQ] = seq
+    return seq
+
+
+def current_seq(session) -> tuple[int, int]:
+    """
+    (latest change number, tombstones pruned through).
+    """
+    counter = session.get(ChangeCounter, 1)
+    return (counter.value, counter.pruned_through) if counter else (0, 0)
+
+
+# -------------------------
+# Session hooks
+# -------------------------
+@event.listens_for(Session, "before_flush")
+def _stamp_flush(session: Session, flush_context, instances):
+    changed = [obj for obj in session.new if isinstance(obj, SYNCED)]
+    changed += [obj for obj in session.dirty if isinstance(obj, SYNCED) and session.is_modified(obj)]
+    deleted = [obj for obj in session.deleted if isinstance(obj, (Task, TaskEvidence))]
+    if not changed and not deleted:
+        return
+
+    seq = _next_seq(session)
+    for obj in changed:
+        obj.change_seq = seq
+        if isinstance(obj, Task):
+            # Reassigned: the previous worker has to drop it
+            for previous in inspect(obj).attrs.assigned_to.history.deleted:
+                if previous and previous != obj.assigned_to:
+                    session.add(Tombstone(entity="task", entity_id=obj.id, worker=previous, change_seq=seq))
+
+    with session.no_autoflush:
+        for obj in deleted:
+            if isinstance(obj, Task):
+                session.add(Tombstone(entity="task", entity_id=obj.id, worker=obj.assigned_to, change_seq=seq))
+            else:
+                task = session.get(Task, obj.task_id)
+                if task:
+                    session.add(Tombstone(entity="evidence", entity_id=obj.id, worker=task.assigned_to, change_seq=seq))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _stamp_bulk(state):
+    if not (state.is_update or state.is_delete or state.is_insert):
+        return
+    table = state.statement.table
+    if table.name not in SYNCED_TABLES:
+        return
+    seq = _next_seq(state.session)
+
+    if state.is_delete:
+        # Same WHERE as the DELETE, run first: one INSERT ... SELECT of tombstones
+        now = datetime.utcnow()
+        if table.name == Task.__tablename__:
+            rows = select(literal("task"), Task.id, Task.assigned_to, literal(seq), literal(now))
+        elif table.name == TaskEvidence.__tablename__:
+            owner = aliased(Task)  # aliased so a WHERE that selects from task isn't correlated to the join
+            rows = (
+                select(literal("evidence"), TaskEvidence.id, owner.assigned_to, literal(seq), literal(now))
+                .join(owner, owner.id == TaskEvidence.task_id)
+            )
+        else:
+            return
+        if state.statement.whereclause is not None:
+            rows = rows.where(state.statement.whereclause)
+        state.session.connection().execute(
+            insert(_tombstones).from_select(["entity", "entity_id", "worker", "change_seq", "deleted_at"], rows)
+        )
+    else:
+        state.statement = state.statement.values(change_seq=seq)
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _end_transaction(session: Session):
+    session.info.pop(_SEQ, None)
+
+
+# -------------------------
+# Tombstone pruning
+# -------------------------
+def prune_tombstones(retention_days: int = SYNC_TOMBSTONE_RETENTION_DAYS) -> int:
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    with Session(engine) as session:
+        through = session.execute(
+            select(func.max(Tombstone.change_seq)).where(Tombstone.deleted_at < cutoff)
+        ).scalar()
+        if through is None:
+            return 0
+        removed = session.execute(delete(Tombstone).where(Tombstone.change_seq <= through)).rowcount
+        session.connection().execute(
+            update(_counter).where(_counter.c.id == 1, _counter.c.pruned_through < through).values(pruned_through=through)
+        )
+        session.commit()
+    return removed
+
+
+async def tombstone_pruner():
+    """
+    Background loop started from the app lifespan.
+    """
+    while True:
+        await asyncio.sleep(SYNC_PRUNE_INTERVAL)
+        try:
+            removed = await asyncio.to_thread(prune_tombstones)
+            if removed:
+                logger.info("Pruned %d sync tombstone(s)", removed)
+        except Exception as e:
+            logger.error("Tombstone pruning failed: %s", e)
@@ -0,0 +1,155 @@
+import hashlib
+import os
+from dataclasses import dataclass
+
+import aiofiles
+import aiofiles.os
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Config
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(64 * 1024)))
+MAX_UPLOAD_FILE_BYTES = int(os.getenv("MAX_UPLOAD_FILE_BYTES", str(15 * 1024 * 1024)))
+MAX_UPLOAD_REQUEST_BYTES = int(os.getenv("MAX_UPLOAD_REQUEST_BYTES", str(60 * 1024 * 1024)))
+
+# Leading bytes of the image formats we accept
+IMAGE_SIGNATURES = {
+    b"\xff\xd8\xff": "image/jpeg",
+    b"\x89PNG\r\n\x1a\n": "image/png",
+    b"GIF87a": "image/gif",
+    b"GIF89a": "image/gif",
+}
+
+
+@dataclass
+class StoredUpload:
+    path: str
+    sha256: str
+    size: int
+    created: bool = True  # False when the bytes were already stored (deduplicated)
+    content_type: str | None = None
+
+
+class UploadBudget:
+    """
+    Tracks bytes written across all files of one request.
+    """
+
+    def __init__(self, max_request_bytes: int = MAX_UPLOAD_REQUEST_BYTES):
+        self.max_request_bytes = max_request_bytes
+        self.used = 0
+
+    def consume(self, n: int):
+        self.used += n
+        if self.used > self.max_request_bytes:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Upload exceeds the per-request limit of {self.max_request_bytes} bytes",
+            )
+
+
+async def sniff_image_type(file: UploadFile) -> str | None:
+    """
+    Detect the image type from the file's magic bytes (the client-sent
+    Content-Type is not trusted). Returns the MIME type, or None if unknown.
+    """
+    head = await file.read(16)
+    await file.seek(0)
+    return image_type_of(head)
+
+
+def image_type_of(head: bytes) -> str | None:
+    """
+    MIME type for the leading bytes of a file, or None if it isn't an accepted image.
+    """
+    for signature, mime in IMAGE_SIGNATURES.items():
+        if head.startswith(signature):
+            return mime
+    return None
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Enforce MAX_UPLOAD_REQUEST_BYTES on multipart bodies while they arrive.
+
+    Starlette parses and spools the whole multipart body before the route (or
+    any dependency) runs, so limits checked in the handler only fire once the
+    full transfer is on disk. This middleware rejects a too-large Content-Length
+    before reading anything and counts the bytes of bodies without one, ending
+    the request with 413 as soon as the limit is crossed. The per-file limit is
+    still checked by stream_to_temp, after spooling.
+    """
+
+    def __init__(self, app: ASGIApp, max_request_bytes: int = MAX_UPLOAD_REQUEST_BYTES):
+        self.app = app
+        self.max_request_bytes = max_request_bytes
+
+    def _too_large(self) -> HTTPException:
+        return HTTPException(
+            status_code=413,
+            detail=f"Upload exceeds the per-request limit of {self.max_request_bytes} bytes",
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        if not headers.get(b"content-type", b"").startswith(b"multipart/form-data"):
+            await self.app(scope, receive, send)
+            return
+
+        length = headers.get(b"content-length", b"")
+        if length.isdigit() and int(length) > self.max_request_bytes:
+            error = self._too_large()
+            response = JSONResponse({"detail": error.detail}, status_code=413, headers={"Connection": "close"})
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def counting_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_request_bytes:
+                    # Raised inside the route's form parsing; turned into a 413 response
+                    raise self._too_large()
+            return message
+
+        await self.app(scope, counting_receive, send)
+
+
+async def stream_to_temp(file: UploadFile, tmp_path: str, budget: UploadBudget | None = None,
+                         max_file_bytes: int = MAX_UPLOAD_FILE_BYTES) -> tuple[str, int]:
+    """
+    Copy an upload to `tmp_path` in UPLOAD_CHUNK_SIZE chunks, computing the
+    SHA-256 and size on the fly. Returns (sha256, size). Stops copying with 413
+    as soon as a limit is crossed; the temp file is removed on any failure.
+    The upload itself is already spooled by then: only UploadSizeLimitMiddleware
+    ends an oversized transfer early.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(tmp_path, "wb") as out_file:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_file_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File '{file.filename}' exceeds the limit of {max_file_bytes} bytes",
+                    )
+                if budget is not None:
+                    budget.consume(len(chunk))
+                digest.update(chunk)
+                await out_file.write(chunk)
+    except BaseException:
+        try:
+            await aiofiles.os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    return digest.hexdigest(), size
@@ -0,0 +1,87 @@
+"""
+Build a ZIP archive on the fly, yielding bytes as they are produced.
+
+zipfile writes to any object with write(); when that object can't tell() or
+seek(), it switches to streaming mode (sizes and CRC in a data descriptor after
+each entry) and ZIP64 records once offsets pass 4 GiB. So memory stays at about
+one chunk no matter how large the archive gets.
+"""
+import io
+import zipfile
+from datetime import datetime
+from typing import Callable, Iterable, Iterator
+
+ZIP_CHUNK_SIZE = 256 * 1024
+
+
+class _Sink(io.RawIOBase):
+    """
+    Write-only, non-seekable buffer the ZipFile writes into; drained after every chunk.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._buffer += data
+        return len(data)
+
+    def drain(self) -> Iterator[bytes]:
+        if self._buffer:
+            data = bytes(self._buffer)
+            self._buffer.clear()
+            yield data
+
+
+class ZipEntry:
+    """
+    One archive member. `source` is a callable returning a readable binary
+    stream (opened lazily, when the entry is reached) or an iterable of byte chunks.
+    """
+
+    def __init__(self, name: str, source: Callable[[], object] | Iterable[bytes], modified: datetime | None = None,
+                 compress: bool = False):
+        self.name = name
+        self.source = source
+        self.modified = modified or datetime.utcnow()
+        self.compress = compress
+
+
+def _chunks(source) -> Iterator[bytes]:
+    if callable(source):
+        with source() as stream:
+            while chunk := stream.read(ZIP_CHUNK_SIZE):
+                yield chunk
+    else:
+        yield from source
+
+
+def stream_zip(entries: Iterable[ZipEntry], on_error: Callable[[ZipEntry, Exception], None] | None = None) -> Iterator[bytes]:
+    """
+    Yield the bytes of a ZIP archive containing `entries`. Entries that fail to
+    open are skipped (reported to `on_error`) instead of breaking the download;
+    `entries` may be a generator, so later entries can depend on earlier failures.
+    """
+    sink = _Sink()
+    with zipfile.ZipFile(sink, mode="w", allowZip64=True) as archive:
+        for entry in entries:
+            info = zipfile.ZipInfo(entry.name, date_time=entry.modified.timetuple()[:6])
+            # Photos are already compressed; deflating them only costs CPU
+            info.compress_type = zipfile.ZIP_DEFLATED if entry.compress else zipfile.ZIP_STORED
+            chunks = _chunks(entry.source)
+            try:
+                first = next(chunks, b"")
+            except Exception as e:
+                if on_error:
+                    on_error(entry, e)
+                continue
+            with archive.open(info, mode="w", force_zip64=True) as member:
+                member.write(first)
+                for chunk in chunks:
+                    yield from sink.drain()
+                    member.write(chunk)
+            yield from sink.drain()
+    yield from sink.drain()